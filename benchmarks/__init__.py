@@ -0,0 +1,10 @@
+"""
+Offline performance benchmarks for TP-Agent.
+
+Everything runs locally: the LLM is either MockLLMInterface or the
+Responses stand-in server in responses_server.py, so no network or API
+key is needed.
+
+    python -m benchmarks run --out benchmarks/results/latest.json
+    python -m benchmarks compare benchmarks/baseline.json benchmarks/results/latest.json
+"""
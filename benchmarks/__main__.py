@@ -0,0 +1,158 @@
+"""
+Command-line entry point.
+
+    python -m benchmarks run [--only executor throughput] [--quick] [--out PATH]
+    python -m benchmarks compare BASELINE CURRENT [--threshold 0.25]
+    python -m benchmarks serve --port 8800 --latency lognormal:0.8,0.4 --error 429=0.05
+    python -m benchmarks load --problems 200 --concurrency 16 [--base-url URL]
+
+serve runs the Responses stand-in in the foreground; set
+providers.openai.base_url to the printed URL to point any run at it.
+load drives the whole agent stack against --base-url, or against a
+stand-in started with the same options as serve.
+
+compare exits with status 1 when any metric regressed past the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+from .loadgen import run_load
+from .report import compare, load_results, run_benchmarks, save_results
+from .responses_server import ResponsesServer, replies_from_file
+from .suite import BENCHMARKS
+
+
+def cmd_run(args):
+    doc = run_benchmarks(args.only, quick=args.quick)
+    print(f"Results: {save_results(doc, args.out)}")
+    for bench, metrics in doc["results"].items():
+        for name, m in metrics.items():
+            print(f"  {bench}.{name:<28} {m['value']:>12} {m['unit']}")
+    return 0
+
+
+def cmd_compare(args):
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        for row in rows:
+            change = f"{row['change']:+.1%}" if row["change"] is not None else "-"
+            print(
+                f"{row['status']:<10} {row['metric']:<40} "
+                f"{row['baseline']!s:>12} -> {row['current']!s:<12} {row['unit']:<12} {change}"
+            )
+    regressions = [r for r in rows if r["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _parse_errors(values):
+    errors = {}
+    for item in values or []:
+        status, _, probability = item.partition("=")
+        errors[int(status)] = float(probability)
+    return errors
+
+
+def _make_server(args):
+    return ResponsesServer(
+        replies=replies_from_file(args.replay) if args.replay else None,
+        latency=args.latency,
+        tokens_per_sec=args.tokens_per_sec,
+        errors=_parse_errors(args.error),
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+
+
+def cmd_serve(args):
+    server = _make_server(args)
+    print(f"Responses stand-in listening on {server.base_url} (latency {server.latency!r})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats()))
+    return 0
+
+
+def cmd_load(args):
+    server = None if args.base_url else _make_server(args).start()
+    try:
+        stats = run_load(
+            args.base_url or server.base_url,
+            problems=args.problems,
+            concurrency=args.concurrency,
+            max_rounds=args.max_rounds,
+        )
+        if server is not None:
+            stats["server"] = server.stats()
+    finally:
+        if server is not None:
+            server.close()
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+    print(f"{stats['problems']} problems at concurrency {stats['concurrency']} in {stats['elapsed_sec']}s")
+    print(f"throughput: {stats['problems_per_sec']} problems/s, {stats['llm_calls_per_sec']} LLM calls/s")
+    for key in ("problem_ms", "llm_call_ms", "tool_ms"):
+        p = stats[key]
+        print(f"{key:<12} p50={p['p50']} p90={p['p90']} p99={p['p99']} max={p['max']}")
+    print(f"statuses: {stats['statuses']}  llm_errors: {stats['llm_errors']}  tokens: {stats['tokens']}")
+    return 0
+
+
+def _add_server_args(p):
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    p.add_argument("--latency", default="0", help="e.g. 0.5, uniform:0.2,1.0, exponential:0.5, lognormal:0.8,0.4")
+    p.add_argument("--tokens-per-sec", type=float, default=None, help="Output token rate (streaming and generation time)")
+    p.add_argument("--error", action="append", metavar="STATUS=P", help="Inject an error status with probability P")
+    p.add_argument("--replay", help="Reply with the model turns of a saved .json/.jsonl run")
+    p.add_argument("--seed", type=int, default=None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="TP-Agent performance benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Run benchmarks and save JSON results")
+    p.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    p.add_argument("--quick", action="store_true", help="Fewer repetitions (noisier, much faster)")
+    p.add_argument("--out", default="benchmarks/results/latest.json", help="Output JSON path")
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("compare", help="Flag regressions against a baseline")
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown (default 0.25)")
+    p.add_argument("--json", action="store_true", help="Print rows as JSON")
+    p.set_defaults(func=cmd_compare)
+
+    p = sub.add_parser("serve", help="Run the Responses API stand-in server")
+    _add_server_args(p)
+    p.set_defaults(func=cmd_serve, port=8800)
+
+    p = sub.add_parser("load", help="Drive the full agent stack and report throughput/latency")
+    _add_server_args(p)
+    p.add_argument("--base-url", default=None, help="Existing endpoint (default: start a local stand-in)")
+    p.add_argument("--problems", type=int, default=50)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--max-rounds", type=int, default=10)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_load)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
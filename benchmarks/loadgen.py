@@ -0,0 +1,88 @@
+"""
+Load generator for the whole agent stack.
+
+Runs `problems` TPAgent trajectories at a fixed concurrency through a real
+LLMInterface (HTTP client, connection pool, JSON parsing) and the real
+executors, against the Responses stand-in server or any base_url, and
+reports throughput plus latency percentiles per problem and per LLM call.
+"""
+
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from tp_agent.core.host import TPAgent
+from tp_agent.core.llm_interface import LLMInterface
+from tp_agent.utils.stats import quantile
+
+# Agent config for load runs: no stall hints, stores disabled
+LOAD_CONFIG: Dict[str, Any] = {"max_rounds": 20, "stall": {"enabled": False}}
+
+LLM_ERROR_PREFIX = "Error communicating with LLM"
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p90/p99/max in milliseconds of a list of seconds."""
+    vals = sorted(values)
+    if not vals:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    return {k: round(quantile(vals, q) * 1000, 3) for k, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))}
+
+
+def run_load(
+    base_url: str,
+    problems: int = 50,
+    concurrency: int = 8,
+    max_rounds: int = 10,
+    problem_text: str = "Problem: benchmark load",
+    config: Optional[Dict[str, Any]] = None,
+    tools: Optional[Dict[str, Any]] = None,
+    api_key: str = "load-test",
+    model: str = "load-model",
+) -> Dict[str, Any]:
+    """Drive `problems` runs at `concurrency` and return throughput and latency stats."""
+    config = config or LOAD_CONFIG
+    llm = LLMInterface(api_key=api_key, model=model, base_url=base_url, max_connections=max(concurrency, 1))
+
+    def solve(_: int) -> Dict[str, Any]:
+        agent = TPAgent(llm_interface=llm, config=config, tools=tools, system_prompt="sys")
+        t0 = time.perf_counter()
+        context = agent.run(initial_context=[{"role": "llm", "say": problem_text}], max_rounds=max_rounds)
+        wall = time.perf_counter() - t0
+        last = context[-1] if context else {}
+        return {
+            "wall": wall,
+            "status": agent.status,
+            "llm_error": str(last.get("say", "")).startswith(LLM_ERROR_PREFIX),
+            "llm_secs": [r["llm_sec"] for r in agent.rounds if r.get("llm_sec") is not None],
+            "tool_secs": [r["tool_sec"] for r in agent.rounds if r.get("tool_sec") is not None],
+            "tokens": sum(
+                (r["usage"] or {}).get("input_tokens", 0) + (r["usage"] or {}).get("output_tokens", 0)
+                for r in agent.rounds if r.get("usage")
+            ),
+        }
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        runs = list(pool.map(solve, range(problems)))
+    elapsed = time.perf_counter() - t0
+
+    llm_secs = [s for r in runs for s in r["llm_secs"]]
+    statuses: Dict[str, int] = {}
+    for r in runs:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    return {
+        "problems": problems,
+        "concurrency": concurrency,
+        "elapsed_sec": round(elapsed, 3),
+        "problems_per_sec": round(problems / elapsed, 3) if elapsed else None,
+        "llm_calls_per_sec": round(len(llm_secs) / elapsed, 3) if elapsed else None,
+        "problem_ms": percentiles([r["wall"] for r in runs]),
+        "llm_call_ms": percentiles(llm_secs),
+        "tool_ms": percentiles([s for r in runs for s in r["tool_secs"]]),
+        "mean_rounds": round(statistics.mean(len(r["llm_secs"]) for r in runs), 2) if runs else None,
+        "tokens": sum(r["tokens"] for r in runs),
+        "statuses": statuses,
+        "llm_errors": sum(r["llm_error"] for r in runs),
+    }
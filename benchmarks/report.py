@@ -0,0 +1,97 @@
+"""Running the suite, saving results and comparing them against a baseline."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .suite import BENCHMARKS
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_benchmarks(names: Optional[Iterable[str]] = None, quick: bool = False) -> Dict[str, Any]:
+    """Run the selected benchmarks (all by default) and return the results document."""
+    selected = list(names) if names else list(BENCHMARKS)
+    unknown = [n for n in selected if n not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    results: Dict[str, Any] = {}
+    for name in selected:
+        t0 = time.perf_counter()
+        results[name] = BENCHMARKS[name](quick)
+        print(f"{name}: done in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def save_results(doc: Dict[str, Any], path: str) -> str:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    One row per metric present in either document. status is
+    "regression" when the metric got worse by more than `threshold`
+    (a fraction), "improved" when it got better by as much, else "ok";
+    "new" / "missing" mark metrics found in only one document.
+    """
+    rows: List[Dict[str, Any]] = []
+    base_results = baseline.get("results", {})
+    cur_results = current.get("results", {})
+    for bench in sorted(set(base_results) | set(cur_results)):
+        base_metrics = base_results.get(bench, {})
+        cur_metrics = cur_results.get(bench, {})
+        for name in sorted(set(base_metrics) | set(cur_metrics)):
+            base, cur = base_metrics.get(name), cur_metrics.get(name)
+            row: Dict[str, Any] = {
+                "metric": f"{bench}.{name}",
+                "baseline": base["value"] if base else None,
+                "current": cur["value"] if cur else None,
+                "unit": (cur or base)["unit"],
+                "change": None,
+            }
+            if base is None or cur is None:
+                row["status"] = "new" if base is None else "missing"
+            elif not base["value"]:
+                row["status"] = "ok"
+            else:
+                change = (cur["value"] - base["value"]) / base["value"]
+                worse = change if (cur.get("better") or base.get("better")) != "higher" else -change
+                row["change"] = round(change, 4)
+                row["status"] = "regression" if worse > threshold else "improved" if worse < -threshold else "ok"
+            rows.append(row)
+    return rows
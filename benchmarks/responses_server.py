@@ -0,0 +1,329 @@
+"""
+Local stand-in for the OpenAI Responses API.
+
+Serves POST /v1/responses with the subset of the response schema that
+LLMInterface.query reads (output[].content[].output_text and usage), so
+the real client, connection pool and JSON handling can be exercised
+without network access. Point LLMInterface (or providers.openai.base_url
+in the config) at `server.base_url`.
+
+Behaviour is configurable per server:
+
+- replies: a script (list of agent replies, indexed by how many turns the
+  conversation in the request already has, last one repeated), a callable
+  mapping the request to a reply, or a script replayed from a saved run
+  (replies_from_file);
+- latency: a LatencyModel sampled before every response, plus generation
+  time at `tokens_per_sec` for the output tokens;
+- stream: requests with "stream": true get server-sent events, with text
+  deltas paced at `tokens_per_sec`;
+- errors: {status: probability} of answering 429 (with Retry-After) or 5xx
+  instead of a reply;
+- usage: every response carries input/output token counts estimated at
+  four characters per token.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+DONE_REPLY = {"role": "llm", "say": "done", "done": True}
+
+# Characters per token used for usage estimates and streaming chunks
+CHARS_PER_TOKEN = 4
+
+Reply = Union[List[Dict[str, Any]], Callable[[Dict[str, Any]], Dict[str, Any]]]
+
+
+class LatencyModel:
+    """
+    Random response latency in seconds. Kinds and parameters:
+    constant(sec), uniform(low, high), exponential(mean) and
+    lognormal(median, sigma).
+    """
+
+    KINDS = {"constant": 1, "uniform": 2, "exponential": 1, "lognormal": 2}
+
+    def __init__(self, kind: str = "constant", *params: float, seed: Optional[int] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r}; expected one of {', '.join(self.KINDS)}")
+        if len(params) != self.KINDS[kind]:
+            raise ValueError(f"{kind} latency takes {self.KINDS[kind]} parameter(s), got {len(params)}")
+        self.kind = kind
+        self.params = tuple(float(p) for p in params)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, "LatencyModel", None], seed: Optional[int] = None) -> "LatencyModel":
+        """Accept 0.05, "0.05", "uniform:0.01,0.1", "exponential:0.2" or "lognormal:0.5,0.4"."""
+        if isinstance(spec, LatencyModel):
+            return spec
+        if spec is None:
+            return cls("constant", 0.0, seed=seed)
+        if isinstance(spec, (int, float)):
+            return cls("constant", spec, seed=seed)
+        kind, _, args = str(spec).partition(":")
+        if not args:
+            return cls("constant", float(kind), seed=seed)
+        return cls(kind, *(float(a) for a in args.split(",")), seed=seed)
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "constant":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._rng.uniform(*self.params)
+            if self.kind == "exponential":
+                return self._rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+            median, sigma = self.params
+            return self._rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return f"LatencyModel({self.kind}:{','.join(str(p) for p in self.params)})"
+
+
+def replies_from_context(context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The model's turns of a saved run, without the problem statement."""
+    replies = [m for m in context if m.get("role") == "llm"]
+    if replies and not replies[0].get("tool") and str(replies[0].get("say", "")).startswith("Problem:"):
+        replies = replies[1:]
+    return replies
+
+
+def replies_from_file(path: str) -> List[Dict[str, Any]]:
+    """Replay script from a run_problem.py .json output or a .jsonl transcript."""
+    if path.endswith(".jsonl"):
+        from tp_agent.core.transcript import read_transcript
+
+        context = read_transcript(path)["context"]
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            context = json.load(f).get("context", [])
+    replies = replies_from_context(context)
+    if not replies:
+        raise ValueError(f"No model replies found in {path}")
+    return replies
+
+
+def request_turn(request: Dict[str, Any]) -> Optional[int]:
+    """
+    Number of model turns already in the conversation of a request built
+    by LLMInterface._format_responses_input, or None if it cannot be parsed.
+    """
+    try:
+        text = request["input"][0]["content"][0]["text"]
+        context = json.loads(text.split("\n\n", 1)[1])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    return len(replies_from_context(context))
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def response_body(reply: Dict[str, Any], input_tokens: int, output_tokens: int) -> Dict[str, Any]:
+    """Wrap an agent reply (the JSON the model would emit) in a Responses API object."""
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "status": "completed",
+        "output": [
+            {
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": json.dumps(reply)}],
+            }
+        ],
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_event(self, event: Dict[str, Any]) -> None:
+        data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, body: Dict[str, Any], tokens_per_sec: Optional[float]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        text = body["output"][0]["content"][0]["text"]
+        self._send_event({"type": "response.created", "response": dict(body, status="in_progress", output=[])})
+        delay = 1.0 / tokens_per_sec if tokens_per_sec else 0.0
+        for i in range(0, len(text), CHARS_PER_TOKEN):
+            if delay:
+                time.sleep(delay)
+            self._send_event({"type": "response.output_text.delta", "delta": text[i:i + CHARS_PER_TOKEN]})
+        self._send_event({"type": "response.output_text.done", "text": text})
+        self._send_event({"type": "response.completed", "response": body})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/v1/responses":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        owner = self.server.owner
+        status, body = owner.handle(request)
+        if status != 200:
+            headers = {"Retry-After": str(owner.retry_after)} if status == 429 else None
+            self._send_json(status, body, headers)
+        elif request.get("stream"):
+            self._stream(body, owner.tokens_per_sec)
+        else:
+            self._send_json(200, body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    owner: "ResponsesServer"
+
+
+class ResponsesServer:
+    """Threaded stand-in server; see the module docstring for the options."""
+
+    def __init__(
+        self,
+        replies: Optional[Reply] = None,
+        latency: Union[str, float, LatencyModel, None] = 0.0,
+        tokens_per_sec: Optional[float] = None,
+        errors: Optional[Dict[int, float]] = None,
+        retry_after: int = 1,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.replies = replies if replies is not None else [DONE_REPLY]
+        self.latency = LatencyModel.parse(latency, seed=seed)
+        self.tokens_per_sec = tokens_per_sec
+        self.errors = {int(k): float(v) for k, v in (errors or {}).items()}
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        # Status code -> number of responses sent with it
+        self.status_counts: Dict[int, int] = {}
+        self.output_tokens = 0
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _next_reply(self, request: Dict[str, Any], index: int) -> Dict[str, Any]:
+        if callable(self.replies):
+            return self.replies(request)
+        turn = request_turn(request)
+        if turn is None:
+            turn = index
+        return self.replies[min(turn, len(self.replies) - 1)]
+
+    def _injected_error(self) -> Optional[int]:
+        with self._lock:
+            roll = self._rng.random()
+        for status, probability in sorted(self.errors.items()):
+            if roll < probability:
+                return status
+            roll -= probability
+        return None
+
+    def handle(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """(status, body) for one request; sleeps for the sampled latency."""
+        with self._lock:
+            index = self.requests
+            self.requests += 1
+
+        status = self._injected_error()
+        delay = self.latency.sample()
+        if status is not None:
+            time.sleep(delay)
+            body = {"error": {
+                "message": "Rate limit reached" if status == 429 else "The server had an error processing your request",
+                "type": "rate_limit_error" if status == 429 else "server_error",
+            }}
+        else:
+            reply = self._next_reply(request, index)
+            output_tokens = estimate_tokens(json.dumps(reply))
+            cap = request.get("max_output_tokens")
+            if isinstance(cap, int) and cap > 0:
+                output_tokens = min(output_tokens, cap)
+            # Streaming paces the tokens itself; otherwise generation time is part of the wait
+            if self.tokens_per_sec and not request.get("stream"):
+                delay += output_tokens / self.tokens_per_sec
+            time.sleep(delay)
+            status = 200
+            body = response_body(reply, estimate_tokens(json.dumps(request.get("input", ""))), output_tokens)
+            with self._lock:
+                self.output_tokens += output_tokens
+
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        return status, body
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "status_counts": dict(self.status_counts),
+                "output_tokens": self.output_tokens,
+            }
+
+    def start(self) -> "ResponsesServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "ResponsesServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
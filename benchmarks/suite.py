@@ -0,0 +1,190 @@
+"""
+Benchmark definitions.
+
+Each benchmark takes `quick` (fewer repetitions, for CI and tests) and
+returns {metric: {"value", "unit", "better"}} where better is "lower" or
+"higher". BENCHMARKS maps names to functions in the order they run.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from tp_agent.core.host import TPAgent
+from tp_agent.core.llm_interface import LLMInterface, MockLLMInterface
+from tp_agent.core.messages import Message
+from tp_agent.core.transcript import TranscriptWriter, render_log
+from tp_agent.executors.kernel_pool import KernelPool
+from tp_agent.executors.tools import PythonExecutor
+
+from .loadgen import run_load
+from .responses_server import ResponsesServer
+
+Metrics = Dict[str, Dict[str, Any]]
+
+# Agent config used by the benchmarks: no stall hints, no stores
+BENCH_CONFIG: Dict[str, Any] = {"max_rounds": 1000, "stall": {"enabled": False}}
+
+
+def metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int, pause: float = 0.0) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        if pause:
+            time.sleep(pause)
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def synthetic_context(rounds: int, out_chars: int = 400) -> List[Dict[str, Any]]:
+    """A problem statement followed by `rounds` python_exec calls and results."""
+    context: List[Dict[str, Any]] = [{"role": "llm", "say": "Problem: benchmark"}]
+    for i in range(rounds):
+        context.append({
+            "role": "llm",
+            "say": f"Step {i}: evaluate the integral numerically",
+            "tool": "python_exec",
+            "code": f"import math\nx = {i}\nprint(math.sin(x) ** 2 + math.cos(x) ** 2)\nprint('OK_{i}')",
+        })
+        context.append({
+            "role": "tool",
+            "tool": "python_exec",
+            "ok": True,
+            "out": ("%d " % i) * (out_chars // 4),
+            "err": "",
+        })
+    return context
+
+
+def bench_executor(quick: bool) -> Metrics:
+    """PythonExecutor latency for a trivial snippet, cold subprocess vs warm kernel."""
+    repeat = 3 if quick else 15
+    code = "print('OK')"
+    cold = PythonExecutor()
+    cold_ms = _median_ms(lambda: cold.execute(code, 10), repeat)
+
+    pool = KernelPool(size=2, preload=[]).start()
+    try:
+        warm = PythonExecutor(kernel_pool=pool)
+        # The pause lets the pool respawn between calls, as LLM think time would
+        warm_ms = _median_ms(lambda: warm.execute(code, 10), repeat, pause=0.2)
+    finally:
+        pool.close()
+    return {
+        "cold_ms": metric(cold_ms, "ms"),
+        "warm_ms": metric(warm_ms, "ms"),
+    }
+
+
+def bench_serialization(quick: bool) -> Metrics:
+    """Cost of building the Responses input from the context, by context length."""
+    llm = MockLLMInterface()
+    results: Metrics = {}
+    for rounds in (10, 50) if quick else (10, 50, 200):
+        # As the host holds them: Messages that cache their JSON after the first round
+        payload = {"sys": "system prompt", "ctx": [Message.of(m) for m in synthetic_context(rounds)]}
+        ms = _median_ms(lambda: llm._format_responses_input(payload), 3 if quick else 20)
+        results[f"rounds_{rounds}_ms"] = metric(ms, "ms")
+    return results
+
+
+def bench_agent_round(quick: bool) -> Metrics:
+    """Host-loop overhead per round with an instant mock LLM and no tools."""
+    rounds = 50 if quick else 500
+    llm = MockLLMInterface()
+    for i in range(rounds):
+        llm.add_response({"role": "llm", "say": f"thinking {i}"})
+
+    def run() -> None:
+        llm.current = 0
+        agent = TPAgent(llm_interface=llm, config=BENCH_CONFIG, system_prompt="sys")
+        agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}], max_rounds=rounds)
+
+    ms = _median_ms(run, 3 if quick else 5)
+    return {"per_round_us": metric(ms * 1000 / rounds, "us")}
+
+
+def bench_throughput(quick: bool) -> Metrics:
+    """Problems per second through the real HTTP client against the stand-in server."""
+    problems = 16 if quick else 64
+    latency = 0.02
+    results: Metrics = {}
+    with ResponsesServer(latency=latency) as server:
+        llm = LLMInterface(api_key="bench", model="bench-model", base_url=server.base_url)
+        for concurrency in (1, 4) if quick else (1, 4, 16):
+            def solve(_: int) -> None:
+                agent = TPAgent(llm_interface=llm, config=BENCH_CONFIG, system_prompt="sys")
+                agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}], max_rounds=3)
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(solve, range(problems)))
+            elapsed = time.perf_counter() - t0
+            results[f"concurrency_{concurrency}_per_sec"] = metric(problems / elapsed, "problems/s", "higher")
+    return results
+
+
+def bench_output_saving(quick: bool) -> Metrics:
+    """Writing a large run to disk: full JSON dump, streamed transcript and log rendering."""
+    examples = str(Path(__file__).resolve().parent.parent / "examples")
+    if examples not in sys.path:
+        sys.path.insert(0, examples)
+    from run_problem import save_context
+
+    context = synthetic_context(100 if quick else 500, out_chars=4000)
+    repeat = 2 if quick else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "bench")
+        json_ms = _median_ms(lambda: save_context(context, "bench.md", base, "ts"), repeat)
+
+        def stream() -> None:
+            path = os.path.join(tmp, "bench.jsonl")
+            if os.path.exists(path):
+                os.unlink(path)
+            with TranscriptWriter(path, metadata={"problem_file": "bench.md"}) as writer:
+                for msg in context:
+                    writer.write(msg)
+
+        transcript_ms = _median_ms(stream, repeat)
+        render_ms = _median_ms(lambda: render_log(os.path.join(tmp, "bench.jsonl")), repeat)
+    return {
+        "save_json_ms": metric(json_ms, "ms"),
+        "transcript_ms": metric(transcript_ms, "ms"),
+        "render_log_ms": metric(render_ms, "ms"),
+    }
+
+
+def bench_load(quick: bool) -> Metrics:
+    """Full stack (HTTP client, host loop, python_exec) under a lognormal latency model."""
+    script = [
+        {"role": "llm", "say": "compute", "tool": "python_exec", "code": "print(sum(range(1000)))"},
+        {"role": "llm", "say": "done", "done": True},
+    ]
+    with ResponsesServer(script, latency="lognormal:0.02,0.3", tokens_per_sec=2000, seed=0) as server:
+        stats = run_load(server.base_url, problems=8 if quick else 32, concurrency=4 if quick else 8)
+    return {
+        "problems_per_sec": metric(stats["problems_per_sec"], "problems/s", "higher"),
+        "problem_p50_ms": metric(stats["problem_ms"]["p50"], "ms"),
+        "problem_p99_ms": metric(stats["problem_ms"]["p99"], "ms"),
+        "llm_call_p50_ms": metric(stats["llm_call_ms"]["p50"], "ms"),
+    }
+
+
+BENCHMARKS: Dict[str, Callable[[bool], Metrics]] = {
+    "executor": bench_executor,
+    "serialization": bench_serialization,
+    "agent_round": bench_agent_round,
+    "throughput": bench_throughput,
+    "output_saving": bench_output_saving,
+    "load": bench_load,
+}
@@ -8,19 +8,29 @@ from datetime import datetime
 from pathlib import Path
 
 from tp_agent import TPAgent
+from tp_agent.core.hooks import ChromeTraceHook, ProfilerHook
 from tp_agent.core.llm_interface import LLMInterface
-from tp_agent.utils.config import load_config, get_agent_settings, get_output_settings
+from tp_agent.core.problem_io import load_problem
+from tp_agent.core.transcript import RunSummary, TranscriptWriter, render_log
+from tp_agent.core.run_store import RunStore
+from tp_agent.utils.blobs import BlobStore
+from tp_agent.utils.config import (
+    get_config_service, get_agent_settings, get_blob_settings, get_consensus_settings, get_output_settings,
+    get_run_store_settings,
+)
+
+
+def output_base(problem_file, output_dir="outputs", model_name="unknown", timestamp=None):
+    """Common path prefix (without extension) for all files of one run"""
+    problem_name = Path(problem_file).stem
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{output_dir}/{problem_name}_{model_name}_{timestamp}"
 
 
-def save_context(context, problem_file, output_dir="outputs", model_name="unknown", system_prompt=None):
+def save_context(context, problem_file, base, timestamp, system_prompt=None, summary=None):
     """Save the conversation context to a JSON file"""
-    # Create output directory if it doesn't exist
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-
-    # Generate filename based on problem, model, and timestamp
-    problem_name = Path(problem_file).stem
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"{output_dir}/{problem_name}_{model_name}_{timestamp}.json"
+    Path(base).parent.mkdir(parents=True, exist_ok=True)
+    output_file = f"{base}.json"
 
     # Save context with metadata
     output_data = {
@@ -28,12 +38,7 @@ def save_context(context, problem_file, output_dir="outputs", model_name="unknow
         "timestamp": timestamp,
         "system_prompt": system_prompt,
         "context": context,
-        "summary": {
-            "total_messages": len(context),
-            "llm_messages": sum(1 for msg in context if msg.get("role") == "llm"),
-            "tool_executions": sum(1 for msg in context if msg.get("role") == "tool"),
-            "successful_executions": sum(1 for msg in context if msg.get("role") == "tool" and msg.get("ok")),
-        }
+        "summary": summary if summary is not None else RunSummary.from_context(context).as_dict(),
     }
 
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -42,82 +47,98 @@ def save_context(context, problem_file, output_dir="outputs", model_name="unknow
     return output_file
 
 
-def save_readable_log(context, problem_file, output_dir="outputs", model_name="unknown", system_prompt=None):
-    """Save a human-readable log file"""
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-
-    problem_name = Path(problem_file).stem
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = f"{output_dir}/{problem_name}_{model_name}_{timestamp}.log"
-
-    with open(log_file, 'w', encoding='utf-8') as f:
-        f.write(f"=== TP-Agent Execution Log ===\n")
-        f.write(f"Problem: {problem_file}\n")
-        f.write(f"Timestamp: {timestamp}\n")
-        f.write("=" * 50 + "\n\n")
-
-        if system_prompt:
-            f.write("=== System Prompt ===\n")
-            f.write(system_prompt)
-            f.write("\n" + "=" * 50 + "\n\n")
-
-        for i, msg in enumerate(context, 1):
-            f.write(f"[{i}] Role: {msg.get('role')}\n")
-
-            if 'say' in msg:
-                f.write(f"    Say: {msg['say']}\n")
-
-            if 'tool' in msg:
-                f.write(f"    Tool: {msg['tool']}\n")
-                if 'code' in msg:
-                    f.write(f"    Code:\n")
-                    for line in msg['code'].split('\n'):
-                        f.write(f"        {line}\n")
-
-            if 'out' in msg:
-                f.write(f"    Output:\n")
-                for line in msg['out'].split('\n'):
-                    f.write(f"        {line}\n")
-
-            if 'err' in msg and msg['err']:
-                f.write(f"    Error:\n")
-                for line in msg['err'].split('\n'):
-                    f.write(f"        {line}\n")
-
-            f.write("\n")
-
-        f.write("=" * 50 + "\n")
-        f.write(f"Total messages: {len(context)}\n")
-        f.write(f"Completed: {'Yes' if any(msg.get('done') for msg in context) else 'No'}\n")
-
-    return log_file
+def save_readable_log(transcript_file, log_file=None, blob_store=None):
+    """Render the human-readable log from the streamed JSONL transcript"""
+    return render_log(transcript_file, log_file, blob_store)
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run TP-Agent with automatic save functionality")
-    parser.add_argument("--file", type=str, required=True, help="Path to problem file (.txt/.md)")
+    parser.add_argument("--file", type=str, default=None, help="Path to problem file (.txt/.md)")
     parser.add_argument("--no-save", action="store_true", help="Disable automatic saving to files (overrides config)")
     parser.add_argument("--output-dir", type=str, default=None, help="Directory for saved outputs (overrides config)")
     parser.add_argument("--quiet", action="store_true", help="Don't print to console (overrides config)")
+    parser.add_argument("--render-log", type=str, default=None, metavar="JSONL",
+                        help="Render the .log view of an existing transcript and exit")
+    parser.add_argument("--trace", type=str, default=None, metavar="JSON",
+                        help="Write a Chrome trace of the run's timing spans")
+    parser.add_argument("--profile", action="store_true", help="Profile the host with cProfile and print hotspots")
+    parser.add_argument("--trajectories", type=int, default=None, metavar="K",
+                        help="Solve with K parallel trajectories and keep the consensus answer (overrides config)")
+    parser.add_argument("--quorum", type=int, default=None, help="Agreeing trajectories needed to stop early")
     args = parser.parse_args()
 
-    # Load configuration
-    config = load_config()
+    if args.render_log:
+        print(f"Log: {save_readable_log(args.render_log)}")
+        return
+    if not args.file:
+        parser.error("--file is required")
+
+    # Load configuration (parsed once and shared with the agent and LLM interface)
+    config = get_config_service().config()
     agent_settings = get_agent_settings(config)
     output_settings = get_output_settings(config)
+    store_settings = get_run_store_settings(config)
+    blob_settings = get_blob_settings(config)
 
     # Get max_rounds from config
     max_rounds = agent_settings.get("max_rounds", 10)
+    trajectories = args.trajectories or get_consensus_settings(config)["trajectories"]
 
     # Apply output settings with command-line overrides
     save_files = not args.no_save and output_settings.get("save_json", True)
     output_dir = args.output_dir or output_settings.get("default_dir", "outputs")
     quiet_mode = args.quiet or output_settings.get("quiet_mode", False)
 
-    # Run the agent
+    # Run the agent, streaming every message to the JSONL transcript
     llm = LLMInterface()
-    agent = TPAgent(llm_interface=llm)
-    context = agent.run_with_problem(problem_path=args.file, max_rounds=max_rounds)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = output_base(args.file, output_dir, llm.model, timestamp)
+    transcript = None
+    blob_store = None
+    if blob_settings["enabled"] and save_files:
+        blob_store = BlobStore(blob_settings["dir"], blob_settings["compress_level"])
+    run_store = None
+    if store_settings["enabled"] and not args.no_save:
+        run_store = RunStore(store_settings["path"], blob_store=blob_store)
+    hooks = []
+    if args.trace:
+        hooks.append(ChromeTraceHook(args.trace))
+    profiler = ProfilerHook() if args.profile else None
+    if profiler is not None:
+        hooks.append(profiler)
+    agent = TPAgent(llm_interface=llm, config=config, run_store=run_store, blob_store=blob_store, hooks=hooks)
+    if save_files:
+        transcript = TranscriptWriter(f"{base}.jsonl", metadata={
+            "problem_file": args.file,
+            "timestamp": timestamp,
+            "model": llm.model,
+            "system_prompt": agent.system_prompt,
+            "blob_dir": blob_store.root if blob_store else None,
+        })
+        agent.listeners.append(transcript)
+
+    consensus = None
+    try:
+        if trajectories > 1:
+            agent.problem_id = Path(args.file).stem
+            consensus = agent.run_consensus(load_problem(args.file), k=trajectories, quorum=args.quorum,
+                                            max_rounds=max_rounds)
+            context = agent.context
+        else:
+            context = agent.run_with_problem(problem_path=args.file, max_rounds=max_rounds)
+    finally:
+        run_summary = {
+            "status": agent.status,
+            "wall_sec": agent.finished_at - agent.started_at if agent.finished_at else None,
+            "stall": agent.stall_detector.summary(),
+            "budget": agent.budget.summary() if agent.budget else None,
+            "rounds": agent.rounds,
+        }
+        if consensus is not None:
+            run_summary["consensus"] = consensus.votes()
+        if transcript is not None:
+            transcript.close(run_summary)
 
     # Print to console unless quiet mode
     if not quiet_mode:
@@ -133,38 +154,48 @@ def main():
                 print(f"  Error: {msg['err']}")
             print()
 
+    summary = dict(agent.summary.as_dict(), **run_summary)
+
     # Save outputs based on config and command-line overrides
     if save_files:
         json_file = None
         log_file = None
 
         if output_settings.get("save_json", True):
-            json_file = save_context(context, args.file, output_dir, llm.model, agent.system_prompt)
+            json_file = save_context(context, args.file, base, timestamp, agent.system_prompt, summary)
 
         if output_settings.get("save_log", True):
-            log_file = save_readable_log(context, args.file, output_dir, llm.model, agent.system_prompt)
+            log_file = save_readable_log(transcript.path, f"{base}.log", blob_store)
 
-        if json_file or log_file:
-            print(f"\n=== Files Saved ===")
-            if json_file:
-                print(f"JSON: {json_file}")
-            if log_file:
-                print(f"Log:  {log_file}")
+        print(f"\n=== Files Saved ===")
+        print(f"Transcript: {transcript.path}")
+        if json_file:
+            print(f"JSON: {json_file}")
+        if log_file:
+            print(f"Log:  {log_file}")
 
         # Print summary
-        summary = {
-            "total_messages": len(context),
-            "llm_messages": sum(1 for msg in context if msg.get("role") == "llm"),
-            "tool_executions": sum(1 for msg in context if msg.get("role") == "tool"),
-            "successful": sum(1 for msg in context if msg.get("role") == "tool" and msg.get("ok")),
-            "failed": sum(1 for msg in context if msg.get("role") == "tool" and not msg.get("ok")),
-            "completed": any(msg.get("done") for msg in context)
-        }
-
         print(f"\n=== Execution Summary ===")
         for key, value in summary.items():
-            print(f"{key}: {value}")
+            if key == "stall":
+                print(f"stalls: {value['stalls']}")
+                print(f"repeated_failures: {value['repeated_failures']}")
+            elif key == "budget":
+                if value and value.get("reason"):
+                    print(f"budget_exhausted: {value['reason']}")
+            elif key == "consensus":
+                agree = max((g["count"] for g in value["groups"]), default=0)
+                print(f"consensus: {value['answer']!r} ({agree}/{value['k']} agree, "
+                      f"quorum {'reached' if value['quorum_reached'] else 'not reached'})")
+            elif key != "rounds":
+                print(f"{key}: {value}")
+
+    if args.trace:
+        print(f"\nTrace: {args.trace}")
+    if profiler is not None:
+        print("\n=== Host Profile ===")
+        print(profiler.report())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Solve a problem bank overnight through the LLM batch API.
+
+    python scripts/tp_batch.py banks/ --output-dir outputs/batch_results
+    python scripts/tp_batch.py banks/physics.jsonl --tags qm --shard 0/4 --max-in-flight 2000
+    python scripts/tp_batch.py examples/ --local   # synchronous endpoint standing in for the batch API
+
+Every trajectory sends its round N in the same batch file, so the whole
+bank advances one round per batch (see tp_agent/core/llm_batch.py).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add tp_agent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tp_agent import TPAgent
+from tp_agent.core.llm_batch import BatchLLMInterface, LocalBatchBackend, run_batch
+from tp_agent.core.problem_sources import ProblemSource, parse_shard
+from tp_agent.core.run_store import RunStore
+from tp_agent.utils.blobs import BlobStore
+from tp_agent.utils.config import (
+    get_batch_settings, get_blob_settings, get_config_service, get_problem_source_settings, get_run_store_settings,
+)
+
+
+def _tag_list(text):
+    return [t.strip() for t in text.split(",") if t.strip()] if text else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TP-Agent offline batch runs")
+    parser.add_argument("sources", nargs="+", help="Problem files, JSONL banks or directories")
+    parser.add_argument("--output-dir", default="outputs/batch_results")
+    parser.add_argument("--tags", default=None, help="Only problems with any of these comma-separated tags")
+    parser.add_argument("--exclude-tags", default=None)
+    parser.add_argument("--shard", default=None, help="Only shard INDEX/COUNT of the problems, e.g. 0/4")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Trajectories run at once (overrides config)")
+    parser.add_argument("--local", action="store_true", help="Answer batch files through the synchronous endpoint")
+    args = parser.parse_args()
+
+    config = get_config_service().config()
+    settings = get_batch_settings(config)
+    source = ProblemSource.from_settings(
+        args.sources,
+        get_problem_source_settings(config),
+        shard=parse_shard(args.shard),
+        tags=_tag_list(args.tags),
+        exclude_tags=_tag_list(args.exclude_tags),
+    )
+    llm = BatchLLMInterface.from_settings(settings)
+    if args.local:
+        llm.backend = LocalBatchBackend.via(llm)
+    blob_settings = get_blob_settings(config)
+    blob_store = BlobStore(blob_settings["dir"], blob_settings["compress_level"]) if blob_settings["enabled"] else None
+    store_settings = get_run_store_settings(config)
+    run_store = RunStore(store_settings["path"], blob_store=blob_store) if store_settings["enabled"] else None
+
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(problem, result):
+        result = dict(problem_id=problem.id, problem_file=problem.source, reference=problem.reference, **result)
+        with open(out_dir / f"{problem.id.replace('/', '_')}.json", "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+    def save(problem, agent):
+        write(problem, {
+            "status": agent.status,
+            "context": agent.context,
+            "summary": dict(agent.summary.as_dict(), budget=agent.budget.summary() if agent.budget else None),
+        })
+
+    failed = []
+
+    def fail(problem, error):
+        failed.append(problem.id)
+        write(problem, {"status": "error", "error": f"{type(error).__name__}: {error}"})
+
+    finished = run_batch(
+        llm,
+        lambda: TPAgent(llm_interface=llm, run_store=run_store, blob_store=blob_store),
+        source,
+        max_in_flight=args.max_in_flight or settings["max_in_flight"],
+        on_result=save,
+        on_error=fail,
+    )
+    skipped = ", ".join(f"{n} {reason}" for reason, n in source.skipped.items() if n)
+    print(f"Finished {finished} problem(s) into {out_dir}" + (f" (skipped: {skipped})" if skipped else ""))
+    if failed:
+        print(f"{len(failed)} problem(s) failed: {', '.join(failed[:10])}" + (" ..." if len(failed) > 10 else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
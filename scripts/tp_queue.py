@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Drain one problem set from several hosts through a shared SQLite queue.
+
+    python scripts/tp_queue.py enqueue examples/*.md
+    python scripts/tp_queue.py enqueue banks/ --tags qm,em --shard 0/4
+    python scripts/tp_queue.py work [--max-tasks N] [--exit-when-empty] [--metrics-port 9100 | --metrics-file F]
+    python scripts/tp_queue.py status
+    python scripts/tp_queue.py export --output-dir outputs/queue_results
+
+Point --db at a file on a filesystem every worker can reach.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add tp_agent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tp_agent.core.problem_sources import ProblemSource, parse_shard
+from tp_agent.core.work_queue import SQLiteQueue, enqueue_problems, run_worker
+from tp_agent.utils.config import (
+    get_blob_settings, get_config_service, get_metrics_settings, get_problem_source_settings, get_queue_settings,
+    get_run_store_settings,
+)
+
+
+def _tag_list(text):
+    return [t.strip() for t in text.split(",") if t.strip()] if text else None
+
+
+def cmd_enqueue(queue, settings, args):
+    source = ProblemSource.from_settings(
+        args.files,
+        get_problem_source_settings(get_config_service().config()),
+        shard=parse_shard(args.shard),
+        tags=_tag_list(args.tags),
+        exclude_tags=_tag_list(args.exclude_tags),
+    )
+    added = enqueue_problems(queue, source, max_rounds=args.max_rounds)
+    skipped = ", ".join(f"{n} {reason}" for reason, n in source.skipped.items() if n)
+    print(f"Queued {added} new problem(s)" + (f" (skipped: {skipped})" if skipped else ""))
+    return 0
+
+
+def cmd_work(queue, settings, args):
+    from tp_agent import TPAgent
+    from tp_agent.core.llm_interface import LLMInterface
+    from tp_agent.core.run_store import RunStore
+    from tp_agent.utils.blobs import BlobStore
+    from tp_agent.utils.metrics import MetricsExporter
+
+    config = get_config_service().config()
+    metrics_settings = get_metrics_settings(config)
+    if args.metrics_port is not None:
+        metrics_settings["port"] = args.metrics_port
+    if args.metrics_file:
+        metrics_settings["path"] = args.metrics_file
+    exporter = MetricsExporter.from_settings(metrics_settings)
+    if exporter.enabled:
+        exporter.start()
+        if exporter.port is not None:
+            print(f"Metrics on http://{exporter.host}:{exporter.port}/metrics")
+    llm = LLMInterface()
+    blob_settings = get_blob_settings(config)
+    blob_store = BlobStore(blob_settings["dir"], blob_settings["compress_level"]) if blob_settings["enabled"] else None
+    store_settings = get_run_store_settings(config)
+    run_store = RunStore(store_settings["path"], blob_store=blob_store) if store_settings["enabled"] else None
+    try:
+        completed = run_worker(
+            queue,
+            # Agents built without a config follow the config service, so edits to
+            # max_rounds, timeouts or the model apply from the next problem on
+            agent_factory=lambda: TPAgent(llm_interface=llm, run_store=run_store, blob_store=blob_store),
+            worker_id=args.worker_id,
+            visibility_timeout=settings["visibility_timeout"],
+            heartbeat_interval=settings["heartbeat_interval"],
+            poll_interval=settings["poll_interval"],
+            max_tasks=args.max_tasks,
+            exit_when_empty=args.exit_when_empty,
+        )
+    finally:
+        if exporter.enabled:
+            exporter.close()
+    print(f"Worker finished after completing {completed} problem(s)")
+    return 0
+
+
+def cmd_status(queue, settings, args):
+    queue.requeue_expired()
+    stats = queue.stats()
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+
+    print("=== Queue ===")
+    for key in ("queued", "leased", "done", "failed"):
+        print(f"{key}: {stats[key]}")
+
+    print("\n=== Workers ===")
+    if not stats["workers"]:
+        print("(none)")
+    for w in stats["workers"]:
+        avg = f"{w['avg_sec']:.1f}s" if w["avg_sec"] is not None else "-"
+        print(
+            f"{w['worker_id']:<32} done={w['completed']:<5} failed={w['failed']:<4} "
+            f"per_hour={w['per_hour']:<8} avg={avg:<8} idle={w['idle_sec']}s"
+        )
+    return 0
+
+
+def cmd_export(queue, settings, args):
+    out_dir = Path(args.output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    count = 0
+    for row in queue.results():
+        with open(out_dir / f"{row['problem_id']}.json", "w", encoding="utf-8") as f:
+            json.dump(row, f, indent=2, ensure_ascii=False)
+        count += 1
+    print(f"Exported {count} result(s) to {out_dir}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TP-Agent distributed work queue")
+    parser.add_argument("--db", type=str, default=None, help="Queue database path (overrides config)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="Add problems (.md/.txt files, JSONL banks, directories) to the queue")
+    p_enqueue.add_argument("files", nargs="+")
+    p_enqueue.add_argument("--max-rounds", type=int, default=None)
+    p_enqueue.add_argument("--tags", default=None, help="Only problems with any of these comma-separated tags")
+    p_enqueue.add_argument("--exclude-tags", default=None)
+    p_enqueue.add_argument("--shard", default=None, help="Only shard INDEX/COUNT of the problems, e.g. 0/4")
+
+    p_work = sub.add_parser("work", help="Lease and solve problems")
+    p_work.add_argument("--worker-id", default=None)
+    p_work.add_argument("--max-tasks", type=int, default=None)
+    p_work.add_argument("--exit-when-empty", action="store_true")
+    p_work.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    p_work.add_argument("--metrics-file", default=None, help="Rewrite Prometheus metrics to this file periodically")
+
+    p_status = sub.add_parser("status", help="Show queue depth and per-worker throughput")
+    p_status.add_argument("--json", action="store_true")
+
+    p_export = sub.add_parser("export", help="Write finished results as JSON files")
+    p_export.add_argument("--output-dir", default="outputs/queue_results")
+
+    args = parser.parse_args()
+    settings = get_queue_settings(get_config_service().config())
+    queue = SQLiteQueue(
+        args.db or settings["db_path"],
+        max_attempts=settings["max_attempts"],
+        wal=settings["wal"],
+    )
+    commands = {"enqueue": cmd_enqueue, "work": cmd_work, "status": cmd_status, "export": cmd_export}
+    return commands[args.command](queue, settings, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Query the run store.
+
+    python scripts/tp_runs.py import outputs/
+    python scripts/tp_runs.py report tools --since 7d
+    python scripts/tp_runs.py report latency --model gpt-5
+    python scripts/tp_runs.py report rounds --json
+    python scripts/tp_runs.py grade references.json && python scripts/tp_runs.py report grades
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add tp_agent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tp_agent.core.grader import Grader, summarize_grades
+from tp_agent.core.problem_sources import ProblemSource
+from tp_agent.core.run_store import RunStore
+from tp_agent.utils.config import get_grader_settings, get_problem_source_settings, get_run_store_settings, load_config
+
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    if isinstance(value, dict):
+        return ",".join(f"{k}={v}" for k, v in sorted(value.items()))
+    return str(value)
+
+
+def print_table(rows):
+    if not rows:
+        print("(no runs)")
+        return
+    columns = list(rows[0].keys())
+    cells = [[_fmt(row.get(c)) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TP-Agent run store")
+    parser.add_argument("--db", type=str, default=None, help="Run store path (overrides config)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Import saved runs from output directories")
+    p_import.add_argument("dirs", nargs="*", default=["outputs"])
+
+    p_grade = sub.add_parser("grade", help="Grade stored final answers against references")
+    p_grade.add_argument("references", help="JSON file mapping problem id to reference answer, or a problem bank")
+    p_grade.add_argument("--since", default=None)
+    p_grade.add_argument("--model", default=None)
+    p_grade.add_argument("--workers", type=int, default=None, help="Grader processes (0: in-process)")
+
+    p_report = sub.add_parser("report", help="Print a canned report")
+    p_report.add_argument("name", choices=["latency", "rounds", "tools", "grades"])
+    p_report.add_argument("--since", default=None, help="Only runs newer than e.g. 24h or 7d")
+    p_report.add_argument("--model", default=None)
+    p_report.add_argument("--json", action="store_true")
+
+    args = parser.parse_args()
+    config = load_config()
+    store = RunStore(args.db or get_run_store_settings(config)["path"])
+
+    if args.command == "import":
+        for directory in args.dirs:
+            print(f"{directory}: imported {store.import_outputs(directory)} run(s)")
+        return 0
+
+    if args.command == "grade":
+        if args.references.endswith(".json"):
+            with open(args.references, "r", encoding="utf-8") as f:
+                references = json.load(f)
+        else:
+            source = ProblemSource.from_settings([args.references], get_problem_source_settings(config), dedupe=False)
+            references = {p.id: p.reference for p in source if p.reference is not None}
+        settings = get_grader_settings(config)
+        if args.workers is not None:
+            settings["workers"] = args.workers
+        t0 = time.perf_counter()
+        grader = Grader.from_settings(settings, run_store=store)
+        grades = grader.grade_runs(references, since=args.since, model=args.model)
+        summary = summarize_grades(grades)
+        print(json.dumps(summary, indent=2))
+        print(f"\n({time.perf_counter() - t0:.2f} s)")
+        return 0
+
+    t0 = time.perf_counter()
+    report = {
+        "latency": store.latency_report,
+        "rounds": store.rounds_report,
+        "tools": store.tool_report,
+        "grades": store.grade_report,
+    }[args.name](since=args.since, model=args.model)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report)
+        print(f"\n({elapsed_ms:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Run tp_agent as a long-lived daemon, or submit a problem to a running one.
+
+    python scripts/tp_server.py serve [--port 8765 | --unix-socket /tmp/tp_agent.sock]
+    curl http://127.0.0.1:8765/metrics
+    python scripts/tp_server.py submit --file examples/problem_sho.md [--stream]
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import sys
+from pathlib import Path
+
+# Add tp_agent to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tp_agent.utils.config import get_config_service, get_metrics_settings, get_server_settings, load_config
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket."""
+
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def serve(args):
+    from tp_agent.core.server import AgentServer
+
+    server = AgentServer(
+        host=args.host,
+        port=args.port,
+        unix_socket=args.unix_socket,
+        concurrency=args.concurrency,
+        warm_kernels=args.warm_kernels,
+    )
+    server.make_http_server()
+    where = server.settings["unix_socket"] or f"http://{server.settings['host']}:{server.settings['port']}"
+    print(f"TP-Agent server listening on {where} (concurrency={server.settings['concurrency']})")
+    # The daemon serves GET /metrics itself; a separate exporter only runs when configured
+    # (e.g. a TCP port next to a Unix socket, or a textfile for node_exporter)
+    from tp_agent.utils.metrics import MetricsExporter
+
+    exporter = MetricsExporter.from_settings(get_metrics_settings(get_config_service().config()))
+    if exporter.enabled:
+        exporter.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        if exporter.enabled:
+            exporter.close()
+    return 0
+
+
+def submit(args):
+    settings = get_server_settings(load_config())
+    unix_socket = args.unix_socket or settings["unix_socket"]
+    if unix_socket:
+        conn = UnixHTTPConnection(unix_socket)
+    else:
+        conn = http.client.HTTPConnection(args.host or settings["host"], args.port or settings["port"])
+
+    body = {"path": str(Path(args.file).resolve()), "stream": args.stream}
+    if args.max_rounds:
+        body["max_rounds"] = args.max_rounds
+    conn.request("POST", "/v1/problems", body=json.dumps(body), headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+
+    if args.stream and response.status == 200:
+        for line in response:
+            event = json.loads(line)
+            if event.get("event") == "message":
+                msg = event["message"]
+                print(f"Role: {msg.get('role')}")
+                for key in ("say", "tool", "out", "err"):
+                    if msg.get(key):
+                        print(f"  {key.capitalize()}: {msg[key]}")
+                print()
+            elif event.get("event") == "end":
+                print(json.dumps(event, indent=2))
+    else:
+        print(json.dumps(json.loads(response.read()), indent=2, ensure_ascii=False))
+    return 0 if response.status < 400 else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TP-Agent daemon")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_serve = sub.add_parser("serve", help="Start the daemon")
+    p_serve.add_argument("--host", default=None)
+    p_serve.add_argument("--port", type=int, default=None)
+    p_serve.add_argument("--unix-socket", default=None)
+    p_serve.add_argument("--concurrency", type=int, default=None)
+    p_serve.add_argument("--warm-kernels", type=int, default=None)
+
+    p_submit = sub.add_parser("submit", help="Submit a problem file to a running daemon")
+    p_submit.add_argument("--file", required=True)
+    p_submit.add_argument("--max-rounds", type=int, default=None)
+    p_submit.add_argument("--stream", action="store_true")
+    p_submit.add_argument("--host", default=None)
+    p_submit.add_argument("--port", type=int, default=None)
+    p_submit.add_argument("--unix-socket", default=None)
+
+    args = parser.parse_args()
+    return serve(args) if args.command == "serve" else submit(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
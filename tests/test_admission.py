@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+from tp_agent.executors.admission import MiB, AdmissionController, AdmissionError
+from tp_agent.executors.tools import PythonExecutor
+
+
+def test_execution_over_memory_limit_is_killed():
+    executor = PythonExecutor(admission=AdmissionController(limit_bytes=150 * MiB, poll_interval=0.05))
+    t0 = time.monotonic()
+    result = executor.execute("import time\nx = b'x' * (400 * 1024 * 1024)\ntime.sleep(20)\nprint('unreachable')", 30)
+
+    assert not result["ok"]
+    assert "MemoryError" in result["err"] and "150 MiB" in result["err"]
+    assert time.monotonic() - t0 < 20
+    assert executor.admission.in_use() == 0
+
+
+def test_numpy_runs_under_rss_limit():
+    pytest.importorskip("numpy")
+    # RLIMIT_AS at this size breaks OpenBLAS thread start-up; RSS polling does not
+    executor = PythonExecutor(admission=AdmissionController(limit_bytes=512 * MiB, poll_interval=0.05))
+    result = executor.execute("import numpy as np\nprint(np.linalg.eigvalsh(np.eye(300)).sum())", 60)
+
+    assert result["ok"], result["err"]
+    assert result["out"].strip() == "300.0"
+
+
+def test_new_executions_queue_when_budget_is_full():
+    controller = AdmissionController(limit_bytes=100 * MiB, budget_bytes=200 * MiB, reserve_bytes=100 * MiB)
+    first, second = controller.acquire(), controller.acquire()
+    assert controller.in_use() == 200 * MiB
+    with pytest.raises(AdmissionError):
+        controller.acquire(timeout=0.2)
+
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire(timeout=5)))
+    waiter.start()
+    time.sleep(0.1)
+    assert controller.waiting == 1 and not admitted
+    first.close()
+    waiter.join(timeout=5)
+    assert len(admitted) == 1
+
+    second.close()
+    admitted[0].close()
+    assert controller.in_use() == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
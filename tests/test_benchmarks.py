@@ -0,0 +1,40 @@
+import pytest
+from benchmarks.__main__ import main
+from benchmarks.report import compare, run_benchmarks, save_results
+
+
+def _doc(**metrics):
+    return {"results": {"bench": {name: {"value": v, "unit": u, "better": b} for name, (v, u, b) in metrics.items()}}}
+
+
+def test_quick_run_produces_json_results(tmp_path):
+    doc = run_benchmarks(["serialization", "agent_round"], quick=True)
+    assert doc["meta"]["quick"] is True
+    assert doc["results"]["agent_round"]["per_round_us"]["value"] > 0
+    assert set(doc["results"]["serialization"]) == {"rounds_10_ms", "rounds_50_ms"}
+
+    path = save_results(doc, str(tmp_path / "out" / "latest.json"))
+    assert main(["compare", path, path]) == 0
+
+
+def test_compare_flags_regressions_in_both_directions(tmp_path):
+    baseline = _doc(latency=(10.0, "ms", "lower"), rate=(100.0, "problems/s", "higher"), gone=(1.0, "ms", "lower"))
+    current = _doc(latency=(14.0, "ms", "lower"), rate=(60.0, "problems/s", "higher"), added=(1.0, "ms", "lower"))
+
+    status = {row["metric"]: row["status"] for row in compare(baseline, current, threshold=0.25)}
+    assert status == {
+        "bench.latency": "regression",
+        "bench.rate": "regression",
+        "bench.gone": "missing",
+        "bench.added": "new",
+    }
+    loose = {row["metric"]: row["status"] for row in compare(baseline, current, threshold=0.5)}
+    assert loose["bench.latency"] == "ok" and loose["bench.rate"] == "ok"
+
+    base_path = save_results(baseline, str(tmp_path / "base.json"))
+    cur_path = save_results(current, str(tmp_path / "cur.json"))
+    assert main(["compare", base_path, cur_path]) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
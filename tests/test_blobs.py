@@ -0,0 +1,47 @@
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.transcript import TranscriptWriter, render_log
+from tp_agent.utils.blobs import BlobStore, offload_message, resolve_message
+
+
+def test_blob_store_dedups_and_roundtrips(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs"))
+    text = "x" * 10000
+    msg = {"role": "tool", "ok": True, "out": text, "err": ""}
+
+    first = offload_message(msg, store, threshold=100, preview_chars=20)
+    second = offload_message(msg, store, threshold=100, preview_chars=20)
+
+    assert first["out_blob"] == second["out_blob"] == {"ref": first["out_blob"]["ref"], "size": 10000}
+    assert len(first["out"]) < 200
+    assert "err_blob" not in first
+    assert len(list((tmp_path / "blobs").rglob("*.z"))) == 1
+    assert resolve_message(first, store)["out"] == text
+    assert msg["out"] == text
+
+
+def test_agent_offloads_large_outputs(tmp_path):
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print('A' * 50000); print('OK_BIG')"})
+    llm.add_response({"role": "llm", "say": "done", "done": True})
+
+    store = BlobStore(str(tmp_path / "blobs"))
+    transcript = TranscriptWriter(str(tmp_path / "run.jsonl"), metadata={"blob_dir": store.root})
+    config = {"blobs": {"threshold": 1000, "preview_chars": 100}}
+    agent = TPAgent(llm_interface=llm, config=config, blob_store=store, transcript=transcript)
+    context = agent.run(max_rounds=3)
+    transcript.close()
+
+    result = context[1]
+    assert result["out_blob"]["size"] > 50000
+    assert len(result["out"]) < 300
+    # The tail of the output (where results are printed) survives in the preview
+    assert "OK_BIG" in result["out"]
+
+    log = open(render_log(transcript.path), encoding="utf-8").read()
+    assert "A" * 50000 in log
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
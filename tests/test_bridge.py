@@ -0,0 +1,85 @@
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.executors import bridge
+from tp_agent.executors.bridge import EXPORT_MARKER, SymbolSession, convert
+from tp_agent.executors.tools import BaseExecutor
+
+
+class FakeWolfram(BaseExecutor):
+    """Records the code it is given and prints canned output."""
+
+    tool_name = "mathematica_exec"
+    language = "wolfram"
+
+    def __init__(self, out=""):
+        self.out = out
+        self.codes = []
+
+    def _execute(self, code, timeout, **options):
+        self.codes.append(code)
+        return {"role": "tool", "tool": self.tool_name, "ok": True, "out": self.out, "err": ""}
+
+
+def test_conversions_round_trip_and_are_cached(monkeypatch):
+    text = "hbar*omega/2 + Sqrt[x] Exp[-a x^2]"
+    python = convert(text, "wolfram", "python")
+    assert convert(python, "python", "wolfram") == "(1/2)*hbar*omega + x^(1/2)*Exp[-a*x^2]"
+
+    monkeypatch.setattr(bridge, "_wolfram_to_sympy", lambda text: pytest.fail("converted twice"))
+    assert convert(text, "wolfram", "python") == python
+
+
+def test_python_export_is_usable_in_both_engines():
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec",
+                      "code": "import sympy as sp\nw, h = sp.symbols('omega hbar')\ntp_export('E0', h*w/2)\nprint('OK')"})
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print(2*E0)"})
+    llm.add_response({"role": "llm", "tool": "mathematica_exec", "code": "Print[E0/hbar]"})
+    llm.add_response({"role": "llm", "say": "done", "done": True})
+    wolfram = FakeWolfram()
+    agent = TPAgent(llm_interface=llm, config={"stall": {"enabled": False}})
+    agent.tools["mathematica_exec"] = wolfram
+    context = agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}], max_rounds=5)
+
+    exported, reused = [m for m in context if m.get("role") == "tool"][:2]
+    assert exported["ok"] and exported["out"].strip() == "OK" and exported["exported"] == ["E0"]
+    assert EXPORT_MARKER not in exported["out"]
+    assert reused["ok"] and reused["out"].strip() == "hbar*omega"
+    assert wolfram.codes == ["E0 = (1/2)*hbar*omega;\nPrint[E0/hbar]"]
+    assert agent.session.names() == ["E0"]
+
+
+def test_wolfram_exports_are_collected_and_checked():
+    session = SymbolSession(max_values=2)
+    code, errors = session.prepare("wolfram", 'TPExport["k", Sqrt[2 m e]/hbar]')
+    assert code.startswith("TPExport[name_String, value_] :=") and not errors
+    out = f"{EXPORT_MARKER}k Sqrt[2*e*m]/hbar\n{EXPORT_MARKER}bad_name 1\n3\n"
+    result = session.collect("wolfram", {"ok": True, "out": out, "err": ""})
+    assert result["out"] == "3\n" and result["exported"] == ["k"]
+    assert "bad_name" in result["err"]
+
+    code, errors = session.prepare("python", "print(k**2)")
+    assert code.splitlines()[0].endswith("k = _tp_sympy.sympify(%r)" % convert("Sqrt[2*e*m]/hbar", "wolfram", "python"))
+    # Values that fail to convert are reported, not silently dropped
+    session.values["bad"] = ("wolfram", "Sqrt[[")
+    code, errors = session.prepare("python", "print(bad)")
+    assert code == "print(bad)" and errors[0].startswith("bad could not be converted from wolfram")
+
+
+def test_several_names_make_valid_preludes():
+    session = SymbolSession()
+    session.collect("wolfram", {"ok": True, "out": f"{EXPORT_MARKER}A x\n{EXPORT_MARKER}B y^2\n", "err": ""})
+    code, errors = session.prepare("wolfram", 'TPExport["C", A + B]')
+    prelude = code.splitlines()[0]
+    assert not errors and ";;" not in prelude
+    assert prelude.endswith("; value); A = x; B = y^2;")
+
+    code, errors = session.prepare("python", "print(A + B)")
+    namespace = {}
+    exec(code.splitlines()[0], namespace)
+    assert str(namespace["A"] + namespace["B"]) == "x + y**2"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.budget import RunBudget
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.executors.tools import MathematicaExecutor
+from tp_agent.utils.cancel import CancelScope
+
+
+class UsageMockLLM(MockLLMInterface):
+    """Mock that reports 100 tokens of usage per call."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def query(self, input_data, **options):
+        self.calls.append(options)
+        self._local.usage = {"input_tokens": 60, "output_tokens": 40}
+        return super().query(input_data, **options)
+
+
+def test_token_ceiling_shrinks_output_and_ends_run():
+    llm = UsageMockLLM()
+    for _ in range(5):
+        llm.add_response({"role": "llm", "say": "thinking"})
+    agent = TPAgent(llm_interface=llm, config={"max_rounds": 10})
+    agent.run(max_rounds=10, budget=RunBudget(max_tokens=250, min_output_tokens=20))
+
+    assert agent.status == "budget_exhausted"
+    assert len(agent.rounds) == 3
+    assert [c["max_output_tokens"] for c in llm.calls] == [250, 150, 50]
+    assert agent.budget.summary()["reason"] == "tokens"
+
+
+def test_deadline_cuts_tool_timeout():
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "import time; time.sleep(30)", "timeout": 60})
+    llm.add_response({"role": "llm", "say": "never reached", "done": True})
+    agent = TPAgent(llm_interface=llm, config={"max_rounds": 10})
+    context = agent.run(budget=RunBudget(deadline_sec=2))
+
+    assert agent.rounds[0]["timeout"] <= 2
+    assert agent.rounds[0]["timeout_source"] == "budget"
+    assert context[-1]["role"] == "tool" and not context[-1]["ok"]
+    assert agent.status == "budget_exhausted"
+    assert agent.budget.reason == "deadline"
+
+
+def test_unlimited_budget_passes_no_overrides():
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "say": "done", "done": True})
+    agent = TPAgent(llm_interface=llm, config={"max_rounds": 3})
+    agent.run()
+
+    assert agent.status == "done"
+    assert llm.last_options == {}
+    assert agent.budget.summary()["reason"] is None
+
+
+def test_cancel_kills_a_running_wolframscript(tmp_path, monkeypatch):
+    script = tmp_path / "wolframscript"
+    script.write_text("#!/bin/sh\nexec sleep 30\n")
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    monkeypatch.setattr(MathematicaExecutor, "get_manager", classmethod(lambda cls: None))
+
+    scope = CancelScope()
+    previous = scope.activate()
+    threading.Timer(0.3, scope.cancel).start()
+    t0 = time.monotonic()
+    try:
+        result = MathematicaExecutor().execute("Pause[30]", timeout=20)
+    finally:
+        scope.deactivate(previous)
+    assert time.monotonic() - t0 < 5
+    assert not result["ok"] and result["err"] == "Cancelled"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,93 @@
+import gc
+import json
+import os
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import LLMInterface, MockLLMInterface
+from tp_agent.utils.config import ConfigService
+
+
+def _write(path, data, mtime):
+    path.write_text(json.dumps(data))
+    # Set mtimes explicitly; two writes within the filesystem's resolution would look identical
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_service_reloads_on_mtime_change(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"max_rounds": 3}, 1_000_000_000)
+    service = ConfigService(str(path), check_interval=0)
+
+    first = service.config()
+    assert first["max_rounds"] == 3
+    assert service.config() is first  # unchanged file -> same cached object
+
+    class Worker:
+        def __init__(self):
+            self.seen = []
+
+        def on_reload(self, cfg):
+            self.seen.append(cfg["max_rounds"])
+
+    worker, dropped = Worker(), Worker()
+    service.subscribe(worker.on_reload)
+    service.subscribe(dropped.on_reload)
+    del dropped
+    gc.collect()
+
+    _write(path, {"max_rounds": 7}, 2_000_000_000)
+    assert service.config()["max_rounds"] == 7
+    assert worker.seen == [7]
+    assert service.reloads == 1 and len(service._subscribers) == 1
+
+
+def test_check_interval_throttles_stats(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"max_rounds": 3}, 1_000_000_000)
+    service = ConfigService(str(path), check_interval=3600)
+    service.config()
+
+    _write(path, {"max_rounds": 9}, 2_000_000_000)
+    assert service.config()["max_rounds"] == 3
+    assert service.poll() is True
+    assert service.config()["max_rounds"] == 9
+
+
+def test_agent_picks_up_new_settings_between_runs(tmp_path):
+    path = tmp_path / "config.json"
+    _write(path, {"max_rounds": 1, "execution": {"default_timeout": 5}}, 1_000_000_000)
+    service = ConfigService(str(path), check_interval=0)
+
+    llm = MockLLMInterface()
+    for _ in range(4):
+        llm.add_response({"role": "llm", "say": "thinking"})
+    agent = TPAgent(llm_interface=llm, config_service=service, system_prompt="sys")
+    agent.run()
+    assert len(agent.rounds) == 1
+
+    _write(path, {"max_rounds": 3, "execution": {"default_timeout": 20}}, 2_000_000_000)
+    agent.reset()
+    agent.run()
+    assert len(agent.rounds) == 3
+    assert agent.default_timeout == 20
+
+    # An explicit config is never swapped out
+    fixed = TPAgent(llm_interface=llm, config={"max_rounds": 2}, config_service=service)
+    assert fixed.config_service is None
+    assert fixed.agent_settings["max_rounds"] == 2
+
+
+def test_llm_interface_explicit_arguments_win_over_reload():
+    reloaded = {"providers": {"openai": {"model": "model-b", "base_url": "http://b"}}}
+    pinned = LLMInterface(model="model-a")
+    following = LLMInterface()
+
+    pinned.apply_config(reloaded)
+    following.apply_config(reloaded)
+    assert pinned.model == "model-a" and pinned.base_url == "http://b"
+    assert following.model == "model-b"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
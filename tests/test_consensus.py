@@ -0,0 +1,72 @@
+import time
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.consensus import run_consensus
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.utils.answers import answers_equivalent, extract_answer
+
+PROBLEM = [{"role": "llm", "say": "Problem: find the ground-state energy"}]
+
+
+def scripted_agent(*replies):
+    llm = MockLLMInterface()
+    for reply in replies:
+        llm.add_response(reply)
+    return TPAgent(llm_interface=llm, config={"max_rounds": 5, "stall": {"enabled": False}})
+
+
+def test_extract_and_compare_answers():
+    assert extract_answer({"done": True, "say": r"Thus $E_0 = \boxed{\frac{\hbar\omega}{2}}$."}) == r"\frac{\hbar\omega}{2}"
+    assert extract_answer({"done": True, "say": "The final answer is T = 2 pi sqrt(L/g)."}) == "2 pi sqrt(L/g)"
+    assert extract_answer({"done": True, "say": "done", "answer": "42"}) == "42"
+    assert extract_answer({"done": True, "say": "I could not solve it"}) is None
+
+    assert answers_equivalent(r"\frac{\hbar\omega}{2}", "0.5*hbar*omega")
+    assert answers_equivalent("2 pi sqrt(L/g)", r"\sqrt{4\pi^2 L/g}")
+    assert answers_equivalent("0.3333333333", "1/3")
+    assert not answers_equivalent("hbar*omega", "hbar*omega/2")
+
+
+def test_quorum_stops_early_and_cancels_the_rest():
+    agents = iter([
+        scripted_agent({"role": "llm", "done": True, "say": "answer: 1/2"}),
+        scripted_agent(
+            {"role": "llm", "tool": "python_exec", "code": "import time; time.sleep(30)", "timeout": 60},
+            {"role": "llm", "done": True, "say": "answer: 7"},
+        ),
+        scripted_agent({"role": "llm", "done": True, "say": r"answer: \frac{1}{2}"}),
+    ])
+    t0 = time.monotonic()
+    result = run_consensus(lambda: next(agents), PROBLEM, k=3, quorum=2)
+    votes = result.votes()
+
+    assert time.monotonic() - t0 < 10
+    assert votes["quorum_reached"] and votes["groups"][0]["count"] == 2
+    assert result.winner.index in (0, 2)
+    slow = result.trajectories[1]
+    deadline = time.monotonic() + 10
+    while slow.status is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert slow.status == "cancelled"
+    assert slow.agent.rounds[0]["tool_sec"] < 10
+
+
+def test_agent_adopts_winning_trajectory():
+    class AnsweringLLM(MockLLMInterface):
+        def query(self, input_data, **options):
+            return {"role": "llm", "done": True, "say": "The result is 2*x + 2*x"}
+
+    messages = []
+    agent = TPAgent(llm_interface=AnsweringLLM(), config={"max_rounds": 3}, transcript=messages.append)
+    result = agent.run_consensus(PROBLEM, k=3, quorum=2)
+
+    assert result.votes()["quorum_reached"]
+    assert result.answer == "2*x + 2*x"
+    assert agent.status == "done"
+    assert agent.context[-1]["say"].endswith("2*x + 2*x")
+    assert messages[-1] is agent.context[-1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
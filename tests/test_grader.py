@@ -0,0 +1,56 @@
+import pytest
+from tp_agent.core import grader as grader_module
+from tp_agent.core.grader import Grader, grade_answer, summarize_grades
+from tp_agent.core.run_store import RunStore
+
+
+def test_staged_checks_decide_common_forms():
+    assert grade_answer("0.5", "1/2")["verdict"] == "correct"
+    assert grade_answer(r"\frac{\hbar\omega}{2}", "0.5*hbar*omega") == {
+        "verdict": "correct", "method": "numeric", "sec": pytest.approx(0, abs=5)}
+    # A decimal reference is compared to the precision it was written with
+    assert grade_answer("3.14", "pi")["verdict"] == "correct"
+    assert grade_answer("3.14", "3.1416")["verdict"] == "correct"
+    # ... but never to the answer's precision
+    for reference, answer in [("3.1416", "3.14"), ("1400", "1e3"), ("14", "1e1"), ("0.0123", "0.01")]:
+        assert grade_answer(reference, answer)["verdict"] == "incorrect"
+    assert grade_answer("x", "x/2")["method"] == "numeric"
+    assert grade_answer("x", "x/2")["verdict"] == "incorrect"
+    assert grade_answer(r"\frac{x^2-1}{x-1}", "x+1")["verdict"] == "correct"
+    assert grade_answer("E_0", None)["verdict"] == "no_answer"
+
+
+def test_ambiguous_samples_fall_back_to_symbolic():
+    # With real x, sqrt(x**2) and x agree only for positive samples
+    real = {"domains": {"x": "real"}}
+    assert grade_answer("sqrt(x**2)", "x", **real) == {"verdict": "incorrect", "method": "symbolic",
+                                                      "sec": pytest.approx(0, abs=5)}
+    assert grade_answer("sqrt(x**2)", "x")["verdict"] == "correct"
+    # log(x*y) = log(x) + log(y) off the branch cut only
+    cut = grade_answer("log(x*y)", "log(x) + log(y)", domains={"x": "complex", "y": "complex"})
+    assert cut["method"] == "symbolic" and cut["verdict"] == "incorrect"
+
+
+def test_grade_runs_memoizes_and_records(tmp_path, monkeypatch):
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    answers = ["hbar*omega/2", r"\frac{\hbar \omega}{2}", "hbar*omega", "hbar*omega/2", None]
+    for i, answer in enumerate(answers):
+        store.record_run({"run_id": f"r{i}", "problem": "sho", "model": "m", "started_at": float(i),
+                          "answer": answer}, [], [])
+    store.record_run({"run_id": "other", "problem": "unlisted", "model": "m", "answer": "1"}, [], [])
+
+    grader = Grader(workers=2, run_store=store)
+    grades = grader.grade_runs({"sho": r"\frac{1}{2}\hbar\omega"})
+    assert [g["verdict"] for g in grades] == ["correct", "correct", "incorrect", "correct", "no_answer"]
+    assert summarize_grades(grades)["accuracy"] == 0.6
+    (report,) = store.grade_report()
+    assert report["graded"] == 5 and report["accuracy"] == 0.6
+
+    # A fresh grader reuses the stored verdicts instead of grading again
+    monkeypatch.setattr(grader_module, "_grade_pair", lambda job: pytest.fail("graded twice"))
+    again = Grader(workers=0, run_store=store).grade_runs({"sho": r"\frac{1}{2}\hbar\omega"})
+    assert [g["verdict"] for g in again] == [g["verdict"] for g in grades]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from benchmarks.responses_server import ResponsesServer
+from tp_agent import TPAgent
+from tp_agent.core.hooks import AgentHooks, ChromeTraceHook, ProfilerHook
+from tp_agent.core.llm_interface import LLMInterface, MockLLMInterface
+from tp_agent.utils.spans import SpanRecorder, span
+
+SCRIPT = [
+    {"role": "llm", "tool": "python_exec", "code": "print('OK_SPAN')"},
+    {"role": "llm", "say": "done", "done": True},
+]
+
+
+class Collector(AgentHooks):
+    def __init__(self):
+        self.calls = []
+
+    def on_round_start(self, agent, record):
+        self.calls.append(("round_start", record["round"]))
+
+    def on_tool_end(self, agent, record, result):
+        self.calls.append(("tool_end", result["ok"]))
+
+    def on_span(self, agent, span, record):
+        self.calls.append(("span", span["name"]))
+
+    def on_run_end(self, agent):
+        self.calls.append(("run_end", agent.status))
+
+
+def test_rounds_carry_spans_without_hooks():
+    messages = []
+    with ResponsesServer(SCRIPT) as server:
+        llm = LLMInterface(api_key="test", model="stand-in", base_url=server.base_url)
+        agent = TPAgent(llm_interface=llm, config={"max_rounds": 5}, system_prompt="sys", transcript=messages.append)
+        agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}])
+
+    names = [s["name"] for s in agent.rounds[0]["spans"]]
+    for expected in ("format_input", "llm.query", "tool.execute", "save", "round"):
+        assert expected in names
+    # Spans nest: the round covers everything else recorded in it
+    spans = {s["name"]: s for s in agent.rounds[0]["spans"]}
+    assert spans["round"]["sec"] >= spans["llm.query"]["sec"] + spans["tool.execute"]["sec"]
+    assert spans["llm.query"]["sec"] >= spans["format_input"]["sec"]
+
+
+def test_hooks_receive_callbacks_and_export(tmp_path):
+    llm = MockLLMInterface()
+    for reply in SCRIPT:
+        llm.add_response(reply)
+    collector = Collector()
+    trace = ChromeTraceHook(str(tmp_path / "trace.json"))
+    profiler = ProfilerHook()
+    agent = TPAgent(llm_interface=llm, config={"max_rounds": 5}, hooks=[collector, trace, profiler])
+    agent.run()
+
+    assert collector.calls[0] == ("round_start", 0)
+    assert ("tool_end", True) in collector.calls
+    assert collector.calls[-1] == ("run_end", "done")
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {e["name"] for e in events} >= {"round", "llm.query", "tool.execute"}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert "_run_round" in profiler.report()
+
+    class BrokenLLM(MockLLMInterface):
+        def query(self, input_data, **options):
+            raise RuntimeError("connection reset")
+
+    collector.calls = []
+    agent = TPAgent(llm_interface=BrokenLLM(), config={"max_rounds": 5}, hooks=[collector, profiler])
+    with pytest.raises(RuntimeError):
+        agent.run()
+    assert collector.calls[-1] == ("run_end", "error")
+
+
+def test_span_is_a_no_op_without_recorder():
+    assert span("anything") is span("other")
+    recorder = SpanRecorder()
+    previous = recorder.activate()
+    try:
+        with span("inner"):
+            pass
+    finally:
+        SpanRecorder.deactivate(previous)
+    assert [s["name"] for s in recorder.spans] == ["inner"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,107 @@
+import json
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Set, Tuple
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+
+# Cold-start budget for `import tp_agent`, in milliseconds. Generous on
+# purpose (a warm import is well under 5 ms) so only a regression that
+# pulls heavy modules back into the package import trips it.
+IMPORT_BUDGET_MS = 50
+# Same for the import CLIs and fork-per-problem workers actually do, which
+# brings in the host loop, executors and config (about 30 ms warm)
+AGENT_IMPORT_BUDGET_MS = 150
+# Stdlib and third-party modules only opt-in features need
+HEAVY_MODULES = {"concurrent.futures", "cProfile", "pstats", "http.server", "sqlite3", "logging", "httpx", "sympy"}
+
+REPO_ROOT = Path(__file__).parent.parent
+
+
+def _import_time(statement: str) -> Tuple[float, Set[str]]:
+    """
+    Run `statement` in a fresh interpreter under -X importtime and return
+    (milliseconds spent importing after interpreter startup, module names).
+    Modules loaded through importlib.import_module (the lazy attributes)
+    are not timed by -X importtime, so only use this for plain imports.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            entries.append((int(cumulative), name[1:]))
+
+    # Everything imported after `site` comes from the statement itself
+    start = max(i for i, (_, name) in enumerate(entries) if name == "site") + 1
+    after = entries[start:]
+    total_us = sum(us for us, name in after if not name.startswith(" "))
+    return total_us / 1000, {name.strip() for _, name in after}
+
+
+def _loaded_modules(statement: str) -> Set[str]:
+    """sys.modules after running `statement` in a fresh interpreter."""
+    code = f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=REPO_ROOT)
+    return set(json.loads(proc.stdout.splitlines()[-1]))
+
+
+def test_package_import_is_cheap():
+    ms, modules = _import_time("import tp_agent")
+    assert ms < IMPORT_BUDGET_MS, f"import tp_agent took {ms:.1f} ms"
+    assert "httpx" not in modules
+
+    modules = _loaded_modules("from tp_agent import load_problem")
+    assert "tp_agent.core.host" not in modules
+    assert "tp_agent.executors.tools" not in modules
+
+
+def test_agent_import_defers_http_client():
+    modules = _loaded_modules("from tp_agent import TPAgent")
+    assert "tp_agent.core.host" in modules
+    assert "httpx" not in modules
+
+    ms, modules = _import_time("from tp_agent.core.host import TPAgent")
+    assert ms < AGENT_IMPORT_BUDGET_MS, f"from tp_agent.core.host import TPAgent took {ms:.1f} ms"
+    assert not modules & HEAVY_MODULES, f"agent import loads {sorted(modules & HEAVY_MODULES)}"
+
+
+def test_tools_are_constructed_on_first_use():
+    agent = TPAgent(llm_interface=MockLLMInterface(), config={})
+    assert "mathematica_exec" in agent.tools
+    assert not agent.tools.is_loaded("mathematica_exec")
+    assert not agent.tools.is_loaded("python_exec")
+
+    agent.tools["python_exec"]
+    assert agent.tools.is_loaded("python_exec")
+    assert not agent.tools.is_loaded("mathematica_exec")
+
+    # Concurrent first lookups build the executor once
+    built = []
+
+    def slow_factory():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    agent.tools.register("slow_exec", slow_factory)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        instances = list(pool.map(lambda _: agent.tools["slow_exec"], range(8)))
+    assert len(built) == 1 and all(instance is built[0] for instance in instances)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.executors.jobs import JobError, JobManager
+from tp_agent.executors.tools import PythonExecutor
+
+PROBLEM = [{"role": "llm", "say": "Problem: scan the parameter space"}]
+
+
+def test_job_runs_past_foreground_limit_and_can_be_cancelled():
+    jobs = JobManager(max_jobs=1, max_wait=10)
+    executor = PythonExecutor()
+    slow = jobs.submit(executor, "python_exec", "import time; time.sleep(30)", deadline=120)
+    assert slow.status == "running" and slow.deadline == 120
+    with pytest.raises(JobError):
+        jobs.submit(executor, "python_exec", "print(1)")
+
+    t0 = time.monotonic()
+    assert jobs.cancel(slow.id).status == "cancelled"
+    assert jobs.wait(slow.id).finished.is_set() and time.monotonic() - t0 < 5
+
+    quick = jobs.submit(executor, "python_exec", "print(6 * 7)")
+    assert jobs.wait(quick.id).status == "done"
+    assert quick.message("job_wait")["out"].strip() == "42"
+    assert [job.id for job in jobs.updates()] == [slow.id, quick.id]
+    assert jobs.updates() == []
+    jobs.close()
+
+
+def test_agent_reports_finished_job_before_next_round():
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print('scan done')", "background": True})
+    llm.add_response({"role": "llm", "tool": "job_wait", "job": "job-1", "timeout": 30})
+    llm.add_response({"role": "llm", "done": True, "say": "answer: 1"})
+    agent = TPAgent(llm_interface=llm, config={"max_rounds": 5, "stall": {"enabled": False}})
+    context = agent.run(initial_context=list(PROBLEM))
+
+    submitted, waited = context[2], context[4]
+    assert submitted["job"] == "job-1" and submitted["status"] == "running"
+    assert waited["tool"] == "job_wait" and waited["status"] == "done"
+    assert waited["out"].strip() == "scan done"
+    # Delivered by job_wait, so not repeated as an unsolicited update
+    assert sum(1 for m in context if m["role"] == "tool" and m.get("job") == "job-1") == 2
+    assert agent.status == "done"
+
+
+def test_unasked_results_and_unknown_jobs():
+    class SlowLLM(MockLLMInterface):
+        def query(self, input_data, **options):
+            # Think for as long as the background jobs take
+            for job in agent.jobs.running():
+                job.finished.wait(10)
+            return super().query(input_data, **options)
+
+    llm = SlowLLM()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print('bg')", "background": True})
+    llm.add_response({"role": "llm", "tool": "job_cancel", "job": "job-9"})
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print(2)", "background": True, "timeout": "soon"})
+    llm.add_response({"role": "llm", "tool": "job_wait", "job": "job-1", "timeout": -5})
+    llm.add_response({"role": "llm", "done": True, "say": "answer: 1"})
+    agent = TPAgent(llm_interface=llm, config={"max_rounds": 8, "stall": {"enabled": False}})
+    context = agent.run(initial_context=list(PROBLEM))
+
+    update = next(m for m in context if m.get("job") == "job-1" and m.get("status") != "running")
+    assert update["job"] == "job-1" and update["tool"] == "python_exec"
+    assert update["status"] == "done" and update["out"].strip() == "bg"
+    unknown = next(m for m in context if m["role"] == "tool" and m.get("tool") == "job_cancel")
+    assert not unknown["ok"] and "Unknown job" in unknown["err"]
+    bad_deadline, bad_wait = [m for m in context if m["role"] == "tool" and "Invalid timeout" in m.get("err", "")]
+    assert bad_deadline["tool"] == "python_exec" and "'soon'" in bad_deadline["err"]
+    assert bad_wait["tool"] == "job_wait" and not bad_wait["ok"]
+    assert agent.budget.tool_sec_used > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
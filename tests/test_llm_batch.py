@@ -0,0 +1,126 @@
+import json
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_batch import BatchLLMInterface, LocalBatchBackend, OpenAIBatchBackend, run_batch
+from tp_agent.core.problem_sources import Problem
+
+
+def _respond(body):
+    text = body["input"][0]["content"][0]["text"]
+    if '"role":"tool"' in text:
+        reply = {"role": "llm", "say": "answer: 2", "done": True}
+    else:
+        reply = {"role": "llm", "tool": "python_exec", "code": "print(1 + 1)"}
+    return {"output_text": json.dumps(reply), "usage": {"input_tokens": 100, "output_tokens": 5}}
+
+
+def test_trajectories_advance_in_lockstep(tmp_path):
+    backend = LocalBatchBackend(_respond, delay=0.05)
+    sizes = []
+    submit = backend.submit
+    backend.submit = lambda path: sizes.append(sum(1 for _ in open(path))) or submit(path)
+    llm = BatchLLMInterface(backend=backend, dir=str(tmp_path), poll_interval=0.01, settle=0.1)
+
+    agents = {}
+    problems = [Problem(f"p{i}", f"Problem {i}: what is 1 + 1?") for i in range(12)]
+    done = run_batch(
+        llm, lambda: TPAgent(llm_interface=llm, config={"max_rounds": 4}), problems,
+        max_in_flight=12, on_result=lambda problem, agent: agents.update({problem.id: agent}),
+    )
+
+    assert done == 12 and sizes == [12, 12]
+    for agent in agents.values():
+        assert agent.status == "done"
+        tool = [m for m in agent.context if m.get("role") == "tool"]
+        assert len(tool) == 1 and tool[0]["out"].strip() == "2"
+        assert agent.rounds[0]["usage"] == {"input_tokens": 100, "output_tokens": 5}
+    first = json.loads(open(sorted(tmp_path.iterdir())[0]).readline())
+    assert first["url"] == "/v1/responses" and first["body"]["model"] == llm.model
+
+
+
+def test_a_raising_trajectory_is_reported_and_the_rest_finish(tmp_path):
+    llm = BatchLLMInterface(backend=LocalBatchBackend(_respond), dir=str(tmp_path), poll_interval=0.01, settle=0.05)
+
+    def factory():
+        agent = TPAgent(llm_interface=llm, config={"max_rounds": 4})
+        run = agent.run
+        agent.run = lambda initial_context: 1 / 0 if "Problem 1:" in initial_context[0]["say"] else run(initial_context)
+        return agent
+
+    agents, errors = {}, {}
+    problems = [Problem(f"p{i}", f"Problem {i}: what is 1 + 1?") for i in range(3)]
+    done = run_batch(
+        llm, factory, problems, max_in_flight=3,
+        on_result=lambda problem, agent: agents.update({problem.id: agent}),
+        on_error=lambda problem, error: errors.update({problem.id: error}),
+    )
+    assert done == 2 and sorted(agents) == ["p0", "p2"]
+    assert list(errors) == ["p1"] and isinstance(errors["p1"], ZeroDivisionError)
+
+
+def test_failed_lines_and_batches_end_the_trajectory(tmp_path):
+    def respond(body):
+        if "bad" in body["input"][0]["content"][0]["text"]:
+            raise RuntimeError("rate limited")
+        return _respond(body)
+
+    llm = BatchLLMInterface(backend=LocalBatchBackend(respond), dir=str(tmp_path), poll_interval=0.01, settle=0.05)
+    reply = llm.query({"sys": "", "ctx": [{"role": "llm", "say": "Problem: bad"}]})
+    assert reply["done"] and reply["say"] == "Error communicating with LLM: rate limited"
+    assert llm.query({"sys": "", "ctx": []})["tool"] == "python_exec"
+
+    class Broken(LocalBatchBackend):
+        def submit(self, path):
+            raise OSError("upload failed")
+
+    llm.backend = Broken(respond)
+    assert "batch failed: upload failed" in llm.query({"sys": "", "ctx": []})["say"]
+    llm.close()
+
+
+def test_openai_backend_protocol(tmp_path):
+    class Response:
+        def __init__(self, data=None, text=""):
+            self.data, self.text = data, text
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self.data
+
+    class Client:
+        def __init__(self):
+            self.calls = []
+            self.status = "in_progress"
+
+        def request(self, method, url, **kwargs):
+            self.calls.append((method, url.rsplit("/v1", 1)[1]))
+            if url.endswith("/files"):
+                return Response({"id": "file-in"})
+            if url.endswith("/batches"):
+                assert kwargs["json"]["input_file_id"] == "file-in"
+                return Response({"id": "batch-1"})
+            if url.endswith("/batches/batch-1"):
+                return Response({"status": self.status, "output_file_id": "file-out", "error_file_id": "file-err"})
+            if url.endswith("/file-out/content"):
+                return Response(text=json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": {}}}))
+            return Response(text=json.dumps({"custom_id": "b", "response": {"status_code": 500, "body": "boom"}}))
+
+    llm = BatchLLMInterface(dir=str(tmp_path), base_url="https://api.example/v1")
+    llm.client = client = Client()
+    backend = OpenAIBatchBackend(llm)
+    path = tmp_path / "in.jsonl"
+    path.write_text("{}\n")
+
+    assert backend.submit(str(path)) == "batch-1"
+    assert backend.poll("batch-1") is None
+    client.status = "expired"
+    assert [line["custom_id"] for line in backend.poll("batch-1")] == ["a", "b"]
+    assert client.calls[:2] == [("POST", "/files"), ("POST", "/batches")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
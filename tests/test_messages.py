@@ -0,0 +1,60 @@
+import copy
+import json
+import pickle
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core import messages
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.messages import Message, context_json
+from tp_agent.core.transcript import RunSummary
+
+
+def test_message_is_a_dict_with_cached_json():
+    msg = Message({"role": "tool", "ok": True, "out": "π = 3.14"})
+    text = msg.json()
+    assert msg.json() is text
+    assert json.loads(text) == msg == {"role": "tool", "ok": True, "out": "π = 3.14"}
+    assert isinstance(msg, dict) and json.dumps(msg) == json.dumps(dict(msg))
+
+    msg["out"] = "changed"
+    assert json.loads(msg.json())["out"] == "changed"
+    msg.update(err="boom")
+    assert json.loads(msg.json())["err"] == "boom"
+    for clone in (copy.deepcopy(msg), pickle.loads(pickle.dumps(msg)), msg.copy()):
+        assert type(clone) is Message and clone == msg and clone.json() == msg.json()
+    assert Message.of(msg) is msg
+
+
+def test_context_json_joins_fragments():
+    context = [Message({"role": "llm", "say": "x"}), {"role": "tool", "ok": False, "err": "e\n"}]
+    assert json.loads(context_json(context)) == context
+    assert context_json(context) == json.dumps(context, ensure_ascii=False, separators=(",", ":"))
+    assert context_json([]) == "[]"
+
+
+def test_agent_encodes_each_message_once(monkeypatch):
+    encoded = []
+    original = messages._dumps
+    monkeypatch.setattr(messages, "_dumps", lambda obj: encoded.append(obj) or original(obj))
+
+    class FormattingLLM(MockLLMInterface):
+        def query(self, input_data, **options):
+            self.last_input = self._format_responses_input(input_data)[1][0]["content"][0]["text"]
+            return super().query(input_data, **options)
+
+    llm = FormattingLLM()
+    for i in range(4):
+        llm.add_response({"role": "llm", "say": f"step {i}"})
+    agent = TPAgent(llm_interface=llm, config={"max_rounds": 5, "stall": {"enabled": False}})
+    context = agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}])
+
+    assert all(type(msg) is Message for msg in context)
+    # Every message is encoded once, although the context is sent five times
+    assert len(encoded) == len(context) - 1
+    assert llm.last_input.endswith(context_json(context[:-1]))
+    assert agent.summary.as_dict() == RunSummary.from_context(context).as_dict()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
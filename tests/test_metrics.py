@@ -0,0 +1,70 @@
+import urllib.request
+
+import pytest
+from benchmarks.responses_server import ResponsesServer
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import LLMInterface, MockLLMInterface
+from tp_agent.utils.metrics import MetricsExporter, MetricsRegistry, get_metrics
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs", ("kind",)).inc(2, kind='a"b')
+    registry.gauge("idle", "Idle").set_function(lambda: 3)
+    hist = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        hist.observe(value)
+
+    text = registry.render()
+    assert '# TYPE jobs_total counter\njobs_total{kind="a\\"b"} 2' in text
+    assert "idle 3" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+    assert registry.counter("jobs_total") is registry.get("jobs_total")
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total")
+
+
+def test_agent_and_executor_report_into_registry():
+    metrics = get_metrics()
+    runs = metrics.counter("tp_agent_runs_total")
+    tools = metrics.counter("tp_tool_executions_total")
+    rounds = metrics.histogram("tp_agent_rounds_per_run")
+    before = (runs.value(status="done"), tools.value(tool="python_exec", outcome="ok"), rounds.snapshot()["count"])
+
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print('OK')"})
+    llm.add_response({"role": "llm", "say": "done", "done": True})
+    TPAgent(llm_interface=llm, config={"max_rounds": 5}).run()
+
+    assert runs.value(status="done") == before[0] + 1
+    assert tools.value(tool="python_exec", outcome="ok") == before[1] + 1
+    assert rounds.snapshot()["count"] == before[2] + 1
+    assert metrics.gauge("tp_agent_active_runs").value() == 0
+
+
+def test_llm_metrics_exported_over_http_and_file(tmp_path):
+    metrics = get_metrics()
+    requests = metrics.counter("tp_llm_requests_total")
+    tokens = metrics.counter("tp_llm_tokens_total")
+    before = (requests.value(model="metrics-model", outcome="ok"), tokens.value(model="metrics-model", kind="output"))
+
+    with ResponsesServer() as server:
+        llm = LLMInterface(api_key="test", model="metrics-model", base_url=server.base_url)
+        assert llm.query({"sys": "s", "ctx": []})["done"]
+
+    assert requests.value(model="metrics-model", outcome="ok") == before[0] + 1
+    assert tokens.value(model="metrics-model", kind="output") > before[1]
+
+    path = tmp_path / "tp_agent.prom"
+    with MetricsExporter(port=0, path=str(path), interval=60) as exporter:
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+            body = response.read().decode("utf-8")
+    assert 'tp_llm_request_seconds_count{model="metrics-model"}' in body
+    assert 'tp_llm_requests_total{model="metrics-model",outcome="ok"}' in path.read_text()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
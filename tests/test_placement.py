@@ -0,0 +1,65 @@
+import os
+
+import pytest
+from tp_agent.executors.admission import AdmissionController
+from tp_agent.executors.placement import CpuPlacer
+from tp_agent.executors.tools import PythonExecutor
+
+
+def test_allocation_grants_idle_cpus_up_to_request():
+    placer = CpuPlacer(cpus=[0, 1, 2, 3], default_cores=1, max_cores=4)
+    small = placer.allocate()
+    assert small.cores == 1
+
+    big = placer.allocate(3)
+    assert big.cores == 3 and not set(big.cpus) & set(small.cpus)
+
+    # Nothing idle left: a heavy request falls back to the default instead of waiting
+    squeezed = placer.allocate(4)
+    assert squeezed.cores == 1
+
+    for allocation in (small, big, squeezed):
+        allocation.release()
+    assert set(placer.load().values()) == {0}
+    assert placer.allocate(10).cores == 4
+
+
+def test_wolfram_cores_are_kept_out_of_the_pool():
+    placer = CpuPlacer(cpus=[0, 1, 2, 3], wolfram_cores=1)
+    assert placer.wolfram_cpus == [3]
+    assert placer.cpus == [0, 1, 2]
+    assert 3 not in placer.allocate(8).cpus
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="needs sched_setaffinity")
+def test_execution_is_pinned_with_matching_blas_threads():
+    cpu = min(os.sched_getaffinity(0))
+    executor = PythonExecutor(placer=CpuPlacer(cpus=[cpu]))
+    result = executor.execute(
+        "import os\nprint(sorted(os.sched_getaffinity(0)), os.environ.get('OPENBLAS_NUM_THREADS'))", 30, cores=4
+    )
+
+    assert result["ok"], result["err"]
+    assert result["out"].strip() == f"[{cpu}] 1"
+    assert result["cores"] == 1
+    assert executor.placer.load() == {cpu: 0}
+
+
+def test_bad_cores_value_is_a_tool_error_and_frees_the_slot(monkeypatch):
+    admission = AdmissionController()
+    executor = PythonExecutor(admission=admission, placer=CpuPlacer(cpus=[0, 1]))
+    result = executor.execute("print(1)", 5, cores="four")
+    assert not result["ok"] and result["err"].startswith("Invalid cores 'four'")
+    assert executor.execute("print(1)", 5, cores="2")["cores"] == 2
+
+    def broken(cores=None):
+        raise RuntimeError("placement failed")
+
+    monkeypatch.setattr(executor.placer, "allocate", broken)
+    with pytest.raises(RuntimeError):
+        executor.execute("print(1)", 5)
+    assert admission.in_use() == 0 and executor.placer.load() == {0: 0, 1: 0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
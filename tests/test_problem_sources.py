@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from tp_agent.core.problem_sources import JsonlBank, ProblemSource, parse_shard
+from tp_agent.core.work_queue import SQLiteQueue, enqueue_problems
+
+
+def _bank(tmp_path):
+    records = [
+        {"id": "sho", "problem": "Ground state energy of the  oscillator?", "answer": "hbar*omega/2", "tags": ["qm"]},
+        {"problem": "ground state energy of the oscillator?", "tags": "qm"},
+        {"id": "lc", "question": "Resonant frequency of an LC circuit?", "tags": ["em"], "level": 2},
+    ]
+    path = tmp_path / "bank" / "part-0.jsonl"
+    path.parent.mkdir()
+    path.write_text("\n".join(json.dumps(r) for r in records[:2]) + "\n\n" + json.dumps(records[2]) + "\n")
+    (tmp_path / "bank" / "extra.md").write_text("Hydrogen ionization energy?")
+    return path
+
+
+def test_directory_source_streams_dedupes_and_filters(tmp_path):
+    _bank(tmp_path)
+    source = ProblemSource([str(tmp_path / "bank")])
+    problems = list(source)
+    assert [p.id for p in problems] == ["extra", "sho", "lc"]
+    assert source.skipped["duplicate"] == 1
+    sho, lc = problems[1], problems[2]
+    assert sho.reference == "hbar*omega/2" and sho.tags == ("qm",)
+    assert lc.meta == {"level": 2} and lc.context() == [{"role": "llm", "say": f"Problem: {lc.text}"}]
+
+    assert [p.id for p in ProblemSource([str(tmp_path / "bank")], tags=["em"])] == ["lc"]
+    assert [p.id for p in ProblemSource([str(tmp_path / "bank")], exclude_tags=["qm", "em"])] == ["extra"]
+    assert len(list(ProblemSource([str(tmp_path / "bank")], dedupe=False))) == 4
+
+
+def test_shards_partition_the_bank(tmp_path):
+    path = tmp_path / "big.jsonl"
+    path.write_text("".join(json.dumps({"id": f"p{i}", "text": f"Problem number {i}"}) + "\n" for i in range(200)))
+    shards = [[p.id for p in ProblemSource([str(path)], shard=(i, 4))] for i in range(4)]
+    assert sorted(sum(shards, [])) == sorted(f"p{i}" for i in range(200))
+    assert all(20 < len(s) < 80 for s in shards)
+    # Deterministic across workers
+    assert shards[1] == [p.id for p in ProblemSource([str(path)], shard=parse_shard("1/4"))]
+    with pytest.raises(ValueError):
+        ProblemSource([str(path)], shard=(4, 4))
+
+
+def test_jsonl_bank_random_access_and_queue(tmp_path):
+    path = _bank(tmp_path)
+    with JsonlBank(str(path)) as bank:
+        assert len(bank) == 3
+        assert bank[2].id == "lc" and bank[-1].id == "lc"
+        assert bank[1].id == "part-0:2" and bank[1].tags == ("qm",)
+    assert (tmp_path / "bank" / "part-0.jsonl.idx").exists()
+    with JsonlBank(str(path)) as bank:
+        # Served from the sidecar index
+        assert [p.id for p in bank] == [bank[i].id for i in range(len(bank))]
+
+    queue = SQLiteQueue(str(tmp_path / "q.sqlite"))
+    assert enqueue_problems(queue, ProblemSource([str(tmp_path / "bank")]), max_rounds=3) == 3
+    lease = queue.lease("w1", visibility_timeout=10)
+    assert lease["problem_id"] == "extra" and lease["payload"]["max_rounds"] == 3
+    assert enqueue_problems(queue, ProblemSource([str(path)])) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,55 @@
+import os
+import pstats
+import time
+
+import pytest
+from tp_agent.executors.profiling import Profiling
+from tp_agent.executors.tools import PythonExecutor
+
+SLOW = """
+def slow_part(n):
+    return sum(i * i for i in range(n))
+
+def fast_part():
+    return 1
+
+print(slow_part(300000), fast_part())
+"""
+
+
+def test_profile_reports_hotspots_and_saves_artifact(tmp_path):
+    executor = PythonExecutor(profiling=Profiling(store_dir=str(tmp_path), top=5))
+    result = executor.execute(SLOW, 30, profile=True)
+
+    assert result["ok"], result["err"]
+    assert result["out"].split() == [str(sum(i * i for i in range(300000))), "1"]
+    profile = result["profile"]
+    assert profile["wall_sec"] > 0 and profile["cpu_sec"] > 0 and not profile["timed_out"]
+    table = profile["hotspots"].splitlines()
+    assert len(table) <= 6 and "(slow_part)" in table[1]
+    assert "slow_part" in str(pstats.Stats(profile["artifact"]).stats)
+
+
+def test_slow_code_is_profiled_before_the_timeout(tmp_path):
+    executor = PythonExecutor(profiling=Profiling(store_dir=str(tmp_path)))
+    t0 = time.monotonic()
+    result = executor.execute("def spin():\n    while True:\n        pass\n\nspin()", 3, profile=True)
+
+    assert time.monotonic() - t0 < 3.5
+    assert not result["ok"] and result["err"].startswith("Timeout after 3 seconds")
+    assert result["profile"]["timed_out"]
+    assert "(spin)" in result["profile"]["hotspots"].splitlines()[1]
+
+
+def test_errors_keep_a_clean_traceback(tmp_path):
+    executor = PythonExecutor(profiling=Profiling(store_dir=str(tmp_path)))
+    result = executor.execute("x = 1\nraise ValueError('bad input')", 30, profile=True)
+
+    assert not result["ok"]
+    assert "ValueError: bad input" in result["err"] and "_profiler" not in result["err"]
+    assert os.path.exists(result["profile"]["artifact"])
+    assert not os.path.exists(result["profile"]["artifact"] + ".json")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
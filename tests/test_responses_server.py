@@ -0,0 +1,61 @@
+import json
+
+import httpx
+import pytest
+from benchmarks.loadgen import run_load
+from benchmarks.responses_server import LatencyModel, ResponsesServer, replies_from_file
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import LLMInterface
+
+SCRIPT = [
+    {"role": "llm", "say": "compute", "tool": "python_exec", "code": "print('OK_SCRIPT')"},
+    {"role": "llm", "say": "done", "done": True},
+]
+
+
+def test_scripted_conversation_through_real_client():
+    with ResponsesServer(SCRIPT) as server:
+        llm = LLMInterface(api_key="test", model="stand-in", base_url=server.base_url)
+        agent = TPAgent(llm_interface=llm, config={"stall": {"enabled": False}}, system_prompt="sys")
+        context = agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}], max_rounds=5)
+
+    assert agent.status == "done"
+    assert "OK_SCRIPT" in context[2]["out"]
+    assert all(r["usage"]["output_tokens"] > 0 for r in agent.rounds)
+    assert server.stats()["status_counts"] == {200: 2}
+
+
+def test_injected_rate_limit():
+    with ResponsesServer(errors={429: 1.0}, retry_after=3) as server:
+        resp = httpx.post(f"{server.base_url}/responses", json={"input": []})
+        assert resp.status_code == 429 and resp.headers["Retry-After"] == "3"
+
+        llm = LLMInterface(api_key="test", model="stand-in", base_url=server.base_url)
+        reply = llm.query({"sys": "", "ctx": []})
+    assert reply["done"] and "429" in reply["say"]
+
+
+def test_latency_specs_and_replay(tmp_path):
+    assert LatencyModel.parse("0.25").sample() == 0.25
+    uniform = LatencyModel.parse("uniform:0.1,0.2", seed=1)
+    assert all(0.1 <= uniform.sample() <= 0.2 for _ in range(20))
+    with pytest.raises(ValueError):
+        LatencyModel.parse("gamma:1,2")
+
+    saved = tmp_path / "run.json"
+    saved.write_text(json.dumps({"context": [{"role": "llm", "say": "Problem: x"}, {"role": "tool", "ok": True}] + SCRIPT}))
+    assert replies_from_file(str(saved)) == SCRIPT
+
+
+def test_load_generator_reports_percentiles():
+    with ResponsesServer(SCRIPT, latency=0.01) as server:
+        stats = run_load(server.base_url, problems=6, concurrency=3)
+
+    assert stats["statuses"] == {"done": 6} and stats["llm_errors"] == 0
+    assert stats["mean_rounds"] == 2
+    assert stats["llm_call_ms"]["p50"] >= 10
+    assert stats["problems_per_sec"] > 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.run_store import RunStore
+
+
+def _agent(store):
+    llm = MockLLMInterface()
+    llm.model = "mock-model"
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print('OK_A')"})
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "1/0"})
+    llm.add_response({"role": "llm", "say": "done", "done": True})
+    return TPAgent(llm_interface=llm, config={}, run_store=store)
+
+
+def test_agent_run_is_recorded(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    agent = _agent(store)
+    agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}], max_rounds=5)
+
+    (tools,) = store.tool_report()
+    assert tools["model"] == "mock-model"
+    assert (tools["executions"], tools["ok"], tools["failed"]) == (2, 1, 1)
+
+    (rounds,) = store.rounds_report()
+    assert rounds["runs"] == 1 and rounds["completion_rate"] == 1.0
+    assert rounds["rounds_to_done_p50"] == 3
+
+    latency = {row["metric"]: row for row in store.latency_report()}
+    assert latency["tool.python_exec"]["n"] == 2
+    assert latency["round.llm_sec"]["n"] == 3
+
+
+def test_timings_follow_their_round_message(tmp_path):
+    class CancellingLLM(MockLLMInterface):
+        def query(self, input_data, **options):
+            self._local.usage = {"input_tokens": 10 * (self.current + 1), "output_tokens": 1}
+            if self.current == 1:
+                agent.cancel()
+            return super().query(input_data, **options)
+
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    llm = CancellingLLM()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print(1)"})
+    llm.add_response({"role": "llm", "say": "never seen", "done": True})
+    agent = TPAgent(llm_interface=llm, config={}, run_store=store)
+    agent.run(initial_context=[{"role": "llm", "say": "Problem: x"}], max_rounds=5)
+
+    # The cancelled round appended no message; the problem statement must not take round 0's timing
+    rows = store._conn().execute("SELECT round, tool, input_tokens FROM rounds ORDER BY round").fetchall()
+    assert [tuple(row) for row in rows] == [(0, "python_exec", 10), (1, None, 20)]
+
+
+def test_import_saved_outputs(tmp_path):
+    data = {
+        "problem_file": "examples/problem_sho.md",
+        "timestamp": "20250923_174016",
+        "context": [
+            {"role": "llm", "say": "Problem: oscillator"},
+            {"role": "llm", "tool": "python_exec", "code": "x", "timeout": 5},
+            {"role": "tool", "tool": "python_exec", "ok": False, "out": "", "err": "Timeout after 5 seconds"},
+            {"role": "llm", "say": "final", "done": True},
+        ],
+        "summary": {"total_messages": 4},
+    }
+    (tmp_path / "problem_sho_gpt-5_20250923_174016.json").write_text(json.dumps(data))
+
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    assert store.import_outputs(str(tmp_path)) == 1
+    # Importing again replaces rather than duplicates
+    assert store.import_outputs(str(tmp_path)) == 1
+
+    (tools,) = store.tool_report(model="gpt-5")
+    assert tools["timeouts"] == 1 and tools["executions"] == 1
+    assert store.rounds_report()[0]["rounds_to_done_p50"] == 2
+    assert store.tool_report(since="1d") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,83 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.server import AgentServer
+from tp_agent.executors.kernel_pool import KernelPool
+from tp_agent.executors.tools import PythonExecutor
+
+
+def test_warm_kernel_executor():
+    pool = KernelPool(size=1, preload=[]).start()
+    try:
+        executor = PythonExecutor(kernel_pool=pool)
+        ok = executor.execute("print('OK_WARM')")
+        err = executor.execute("1/0")
+        timeout = executor.execute("while True: pass", timeout=1)
+    finally:
+        pool.close()
+
+    assert ok["ok"] is True and "OK_WARM" in ok["out"]
+    assert err["ok"] is False and "ZeroDivisionError" in err["err"]
+    assert timeout["ok"] is False and "Timeout" in timeout["err"]
+    assert pool.hits >= 1
+
+
+def test_server_runs_problem_over_http(tmp_path):
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print('OK_SERVER')"})
+    llm.add_response({"role": "llm", "say": "finished", "done": True})
+
+    server = AgentServer(config={}, llm_interface=llm, port=0, warm_kernels=1, preload_modules=[])
+    httpd = server.make_http_server()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    try:
+        request = urllib.request.Request(
+            f"{base}/v1/problems",
+            data=json.dumps({"problem": "Compute something", "max_rounds": 3}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        result = json.loads(urllib.request.urlopen(request).read())
+        health = json.loads(urllib.request.urlopen(f"{base}/v1/health").read())
+        request = urllib.request.Request(
+            f"{base}/v1/problems", data=json.dumps({"path": str(tmp_path)}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with pytest.raises(urllib.error.HTTPError) as rejected:
+            urllib.request.urlopen(request)
+        assert rejected.value.code == 400
+        for bad in ("3", -1, 2.5, True):
+            request = urllib.request.Request(
+                f"{base}/v1/problems",
+                data=json.dumps({"problem": "Compute something", "max_rounds": bad}).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            with pytest.raises(urllib.error.HTTPError) as rejected:
+                urllib.request.urlopen(request)
+            assert rejected.value.code == 400 and b"max_rounds" in rejected.value.read()
+    finally:
+        httpd.shutdown()
+        server.close()
+
+    assert result["status"] == "done"
+    assert result["agent_status"] == "done"
+    assert "OK_SERVER" in result["context"][2]["out"]
+    assert health["completed"] == 1
+
+    # Reloads keep the learned runtimes; unrelated changes keep the policy itself
+    policy = server.timeout_policy
+    assert policy._samples
+    server._apply_config(dict(server.config, server={"port": 1}))
+    assert server.timeout_policy is policy
+    server._apply_config(dict(server.config, timeouts={"multiplier": 3}))
+    assert server.timeout_policy is not policy and server.timeout_policy.multiplier == 3
+    assert server.timeout_policy._samples == policy._samples
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
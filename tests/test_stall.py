@@ -0,0 +1,57 @@
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.stall import StallDetector, normalize_code, normalize_error
+
+
+def _failing_call(code="1/0"):
+    return {"role": "llm", "tool": "python_exec", "code": code, "timeout": 5}
+
+
+def test_normalization_ignores_cosmetic_changes():
+    assert normalize_code("x = 1  # first\nprint(x)") == normalize_code("x=1\n\nprint( x )")
+    assert normalize_error('File "/tmp/a.py", line 3\nValueError: bad 12') == \
+        normalize_error('File "/tmp/b.py", line 9\nValueError: bad 7')
+
+
+def test_repeated_failure_triggers_stall():
+    detector = StallDetector(max_repeats=3)
+    err = {"role": "tool", "tool": "python_exec", "ok": False, "out": "", "err": "ZeroDivisionError: division by zero"}
+    assert detector.observe(_failing_call(), err) is None
+    assert detector.observe(_failing_call("1 / 0  # retry"), err) is None
+    assert detector.observe(_failing_call(), err) is not None
+    assert detector.summary()["repeated_failures"] == 2
+
+
+def test_agent_stops_with_stalled_status():
+    llm = MockLLMInterface()
+    for _ in range(5):
+        llm.add_response(_failing_call())
+
+    config = {"stall": {"policy": "stop", "max_repeats": 2}}
+    agent = TPAgent(llm_interface=llm, config=config)
+    context = agent.run(max_rounds=5)
+
+    assert agent.status == "stalled"
+    assert len(context) == 4
+    assert agent.stall_detector.summary()["stalled"] is True
+
+
+def test_switch_tool_policy_blocks_failing_tool():
+    llm = MockLLMInterface()
+    for _ in range(3):
+        llm.add_response(_failing_call())
+    llm.add_response({"role": "llm", "say": "done", "done": True})
+
+    config = {"stall": {"policy": "switch_tool", "max_repeats": 2}}
+    agent = TPAgent(llm_interface=llm, config=config)
+    context = agent.run(max_rounds=5)
+
+    assert agent.status == "done"
+    assert any(msg.get("role") == "host" for msg in context)
+    assert "Blocked by host" in context[-2]["err"]
+    assert agent.stall_detector.summary()["blocked_calls"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
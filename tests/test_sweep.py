@@ -0,0 +1,63 @@
+import os
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.executors.sweep import SweepExecutor, expand_grid
+from tp_agent.executors.tools import PythonExecutor
+
+
+def test_grid_points_and_per_point_errors(tmp_path):
+    assert expand_grid({"g": [1, 2], "B": [0, 1]}) == [{"g": 1, "B": 0}, {"g": 1, "B": 1}, {"g": 2, "B": 0}, {"g": 2, "B": 1}]
+    assert expand_grid([{"g": 1}, {"g": 3}]) == [{"g": 1}, {"g": 3}]
+
+    sweep = SweepExecutor(python_executor=PythonExecutor(), workers=2, chunk_size=1, store_dir=str(tmp_path))
+    result = sweep.execute("def kernel(g):\n    print('noise')\n    return 1 / g", 30, grid={"g": [0, 1, 2, 4]})
+
+    assert not result["ok"]
+    assert result["sweep"]["failed"] == 1 and result["sweep"]["computed"] == 4
+    assert "ZeroDivisionError" in result["err"] and '{"g":0}' in result["err"]
+    assert result["out"].splitlines() == ["g\tvalue", "0\tERROR", "1\t1.0", "2\t0.5", "4\t0.25"]
+
+
+def test_rerun_skips_points_already_computed(tmp_path):
+    calls = tmp_path / "calls"
+    code = f"def kernel(x):\n    open({str(calls)!r}, 'a').write('.')\n    return x * x"
+    sweep = SweepExecutor(python_executor=PythonExecutor(), workers=1, store_dir=str(tmp_path / "sweeps"))
+
+    first = sweep.execute(code, 30, grid={"x": [1, 2, 3]})
+    assert first["ok"] and first["sweep"]["cached"] == 0
+    second = sweep.execute(code, 30, grid={"x": [1, 2, 3, 4, 5]})
+
+    assert second["ok"]
+    assert second["sweep"]["cached"] == 3 and second["sweep"]["computed"] == 2
+    assert calls.read_text() == "....."
+    assert second["out"].splitlines()[-1] == "5\t25"
+
+
+def test_agent_sweep_tool_stores_large_tables(tmp_path):
+    llm = MockLLMInterface()
+    llm.add_response({
+        "role": "llm",
+        "tool": "python_sweep",
+        "code": "def kernel(n):\n    return [n, n ** 2]",
+        "grid": {"n": list(range(10))},
+    })
+    llm.add_response({"role": "llm", "done": True, "say": "answer: 81"})
+    config = {"max_rounds": 3, "stall": {"enabled": False}, "sweep": {"dir": str(tmp_path), "workers": 2, "table_rows": 4}}
+    agent = TPAgent(llm_interface=llm, config=config)
+    context = agent.run(initial_context=[{"role": "llm", "say": "Problem: tabulate n^2"}])
+
+    result = context[2]
+    assert result["tool"] == "python_sweep" and result["ok"]
+    assert "more rows" in result["out"] and result["out"].splitlines()[-1] == "9\t[9,81]"
+    with open(result["artifact"]) as f:
+        assert len(f.read().splitlines()) == 11
+    assert os.path.dirname(result["artifact"]) == str(tmp_path)
+    # Agents share one kernel pool per worker count instead of starting their own
+    again = TPAgent(llm_interface=llm, config=config)
+    assert again.tools["python_sweep"].python is agent.tools["python_sweep"].python
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,91 @@
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.run_store import RunStore
+from tp_agent.core.timeout_policy import TimeoutPolicy
+
+
+def test_configured_and_requested_without_history():
+    policy = TimeoutPolicy(tool_timeouts={"mathematica_exec": 30}, default_timeout=10, max_sec=120)
+
+    assert policy.choose("mathematica_exec") == (30, "configured")
+    assert policy.choose("python_exec") == (10, "configured")
+    assert policy.choose("python_exec", "x = 1", requested=5) == (5, "requested")
+    assert policy.choose("python_exec", "x = 1", requested=1000) == (120, "requested")
+
+
+def test_history_raises_short_requests_and_lowers_known_code():
+    policy = TimeoutPolicy(min_samples=3, quantile=0.9, multiplier=1.5)
+    for sec in (18, 19, 20):
+        policy.observe("mathematica_exec", "Integrate[f[x], x]", sec)
+
+    # Any mathematica call: the tool-wide history says ~30 s, so 10 s is raised
+    timeout, source = policy.choose("mathematica_exec", "NIntegrate[g[x], {x, 0, 1}]", requested=10)
+    assert source == "adaptive" and 29 <= timeout <= 31
+    # A different request above the estimate is left alone unless the code is known
+    assert policy.choose("mathematica_exec", "Other[]", requested=100) == (100, "requested")
+    timeout, source = policy.choose("mathematica_exec", "Integrate[f[x], x]", requested=100)
+    assert source == "adaptive" and timeout < 100
+
+    policy.adaptive = False
+    assert policy.choose("mathematica_exec", "Integrate[f[x], x]", requested=100) == (100, "requested")
+
+
+def test_agent_uses_run_store_history(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    config = {
+        "execution": {"python_timeout": 7},
+        "timeouts": {"adaptive": True, "min_samples": 2},
+    }
+
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print(1)"})
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print(2)"})
+    llm.add_response({"role": "llm", "say": "done", "done": True})
+    agent = TPAgent(llm_interface=llm, config=config, run_store=store)
+    context = agent.run(max_rounds=3)
+
+    assert agent.rounds[0]["timeout"] == 7 and agent.rounds[0]["timeout_source"] == "configured"
+    assert context[1]["timeout_source"] == "configured"
+    assert len(store.tool_durations("python_exec")) == 2
+
+    # A fresh agent (new policy) learns from the stored runtimes, but they are
+    # tool-wide, so unseen code keeps the configured limit
+    fresh = TPAgent(llm_interface=MockLLMInterface(), config=config, run_store=store)
+    assert fresh.timeout_policy.choose("python_exec", "print(3)") == (7, "configured")
+
+
+def test_timed_out_runs_do_not_keep_the_estimate_short(tmp_path):
+    policy = TimeoutPolicy(min_samples=3, quantile=0.5, multiplier=2, max_sec=600)
+    for _ in range(3):
+        policy.observe("mathematica_exec", "Integrate[f[x], x]", 10, timed_out=True)
+    # Each run hit a 10 s limit: the estimate grows instead of settling at 10 * 2
+    assert policy.choose("mathematica_exec", "Integrate[f[x], x]") == (40, "adaptive")
+
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    store.record_run(
+        {"run_id": "r", "problem": "p", "status": "done"},
+        [],
+        [{"round": i, "tool": "python_exec", "ok": False, "duration_sec": 5.0,
+          "error": "Timeout after 5 seconds" if i else "NameError: x"} for i in range(2)],
+    )
+    assert store.tool_durations("python_exec", timeout_factor=3) == [5.0, 15.0]
+
+
+def test_unseen_code_keeps_the_configured_timeout():
+    policy = TimeoutPolicy(tool_timeouts={"python_exec": 30}, min_samples=5)
+    for _ in range(10):
+        policy.observe("python_exec", "print(1)", 0.05)
+
+    assert policy.choose("python_exec", "heavy_integral()") == (30, "configured")
+    # Only the code that actually ran that fast gets a shorter limit
+    assert policy.choose("python_exec", "print(1)") == (1, "adaptive")
+    # Slow tool-wide history still raises the limit for new code
+    for i in range(10):
+        policy.observe("python_exec", f"slow_{i}()", 40)
+    timeout, source = policy.choose("python_exec", "heavy_integral()")
+    assert source == "adaptive" and timeout > 30
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
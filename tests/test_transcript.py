@@ -0,0 +1,45 @@
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.transcript import TranscriptWriter, read_transcript, render_log
+
+
+def test_agent_streams_transcript(tmp_path):
+    llm = MockLLMInterface()
+    llm.add_response({"role": "llm", "tool": "python_exec", "code": "print('OK_T')"})
+    llm.add_response({"role": "llm", "say": "finished", "done": True})
+
+    path = str(tmp_path / "run.jsonl")
+    transcript = TranscriptWriter(path, metadata={"problem_file": "p.md", "timestamp": "t"})
+    agent = TPAgent(llm_interface=llm, config={}, transcript=transcript)
+    agent.run(initial_context=[{"role": "llm", "say": "Problem: 2+2"}], max_rounds=3)
+
+    # Messages are on disk before the transcript is closed
+    assert len(read_transcript(path)["context"]) == 4
+    transcript.close({"status": agent.status})
+
+    data = read_transcript(path)
+    assert data["meta"]["problem_file"] == "p.md"
+    assert data["summary"] == dict(agent.summary.as_dict(), status="done")
+    assert data["summary"]["successful_executions"] == 1
+
+    log = open(render_log(path), encoding="utf-8").read()
+    assert "Problem: p.md" in log
+    assert "OK_T" in log
+    assert "Status: done" in log
+
+
+def test_truncated_transcript_is_readable(tmp_path):
+    path = tmp_path / "crash.jsonl"
+    writer = TranscriptWriter(str(path))
+    writer.write({"role": "llm", "say": "hello"})
+    writer._file.write('{"role": "tool", "ok": tr')
+    writer._file.flush()
+
+    data = read_transcript(str(path))
+    assert [m["say"] for m in data["context"]] == ["hello"]
+    assert data["summary"]["total_messages"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+from tp_agent import TPAgent
+from tp_agent.core.llm_interface import MockLLMInterface
+from tp_agent.core.work_queue import SQLiteQueue, run_worker
+
+
+def test_lease_complete_and_expiry(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / "q.sqlite"), max_attempts=2)
+    assert queue.enqueue("p1", {"text": "Problem one"})
+    assert not queue.enqueue("p1", {"text": "duplicate"})
+
+    lease = queue.lease("w1", visibility_timeout=0.05)
+    assert lease["problem_id"] == "p1"
+    assert queue.lease("w2", visibility_timeout=10) is None
+
+    time.sleep(0.1)
+    second = queue.lease("w2", visibility_timeout=10)
+    assert second is not None and second["attempts"] == 2
+    # The expired lease can no longer write results
+    assert queue.complete(lease, {"status": "done"}) is False
+    assert queue.complete(second, {"status": "done"}) is True
+
+    stats = queue.stats()
+    assert stats["done"] == 1 and stats["queued"] == 0
+    assert {w["worker_id"]: w["completed"] for w in stats["workers"]} == {"w1": 0, "w2": 1}
+
+
+def test_worker_writes_agent_result(tmp_path):
+    queue = SQLiteQueue(str(tmp_path / "q.sqlite"))
+    queue.enqueue("p1", {"text": "What is 2+2?", "max_rounds": 2})
+
+    def factory():
+        llm = MockLLMInterface()
+        llm.add_response({"role": "llm", "say": "4", "done": True})
+        return TPAgent(llm_interface=llm, config={})
+
+    assert run_worker(queue, factory, worker_id="w1", exit_when_empty=True) == 1
+    (row,) = list(queue.results())
+    assert row["status"] == "done"
+    assert row["result"]["status"] == "done"
+    assert row["result"]["context"][-1]["say"] == "4"
+
+
+def test_lost_lease_cancels_the_agent(tmp_path):
+    class LosingQueue(SQLiteQueue):
+        def heartbeat(self, lease, visibility_timeout):
+            return False
+
+    queue = LosingQueue(str(tmp_path / "q.sqlite"))
+    queue.enqueue("p1", {"text": "Scan forever", "max_rounds": 50})
+    agents = []
+
+    def factory():
+        llm = MockLLMInterface()
+        for _ in range(50):
+            llm.add_response({"role": "llm", "tool": "python_exec", "code": "import time; time.sleep(0.2)"})
+        agents.append(TPAgent(llm_interface=llm, config={"stall": {"enabled": False}}))
+        return agents[-1]
+
+    t0 = time.monotonic()
+    assert run_worker(queue, factory, worker_id="w1", heartbeat_interval=0.1, exit_when_empty=True, max_tasks=1) == 0
+    assert time.monotonic() - t0 < 5
+    assert agents[0].status == "cancelled" and len(agents[0].rounds) < 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,6 +1,39 @@
-from .core.host import TPAgent, AgentHost
-from .executors.tools import PythonExecutor, MathematicaExecutor
-from .core.problem_io import load_problem
+"""
+TP-Agent package.
+
+Public names are loaded on first attribute access (PEP 562), so importing
+the package, or a light submodule such as core.problem_io, does not pull
+in the host loop, the LLM client or httpx.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .core.host import TPAgent, AgentHost
+    from .executors.tools import PythonExecutor, MathematicaExecutor
+    from .core.problem_io import load_problem
 
 __version__ = "0.1.0"
 __all__ = ["TPAgent", "PythonExecutor", "MathematicaExecutor", "load_problem"]
+
+_LAZY_ATTRS = {
+    "TPAgent": ".core.host",
+    "AgentHost": ".core.host",
+    "PythonExecutor": ".executors.tools",
+    "MathematicaExecutor": ".executors.tools",
+    "load_problem": ".core.problem_io",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
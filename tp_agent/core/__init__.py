@@ -1,7 +1,34 @@
 """Core modules for TP-Agent."""
 
-from .host import AgentHost
-from .llm_interface import LLMInterface
-from .problem_io import load_problem
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ['AgentHost', 'LLMInterface', 'load_problem']
\ No newline at end of file
+if TYPE_CHECKING:  # pragma: no cover
+    from .host import AgentHost
+    from .llm_interface import LLMInterface
+    from .problem_io import load_problem
+    from .problem_sources import Problem, ProblemSource
+
+__all__ = ['AgentHost', 'LLMInterface', 'load_problem', 'Problem', 'ProblemSource']
+
+# Attributes resolved on first access (PEP 562) to keep `import tp_agent.core` cheap
+_LAZY_ATTRS = {
+    'AgentHost': '.host',
+    'LLMInterface': '.llm_interface',
+    'load_problem': '.problem_io',
+    'Problem': '.problem_sources',
+    'ProblemSource': '.problem_sources',
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
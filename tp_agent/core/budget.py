@@ -0,0 +1,123 @@
+"""
+Per-run budget: wall-clock deadline, token ceiling and tool-seconds ceiling.
+
+The host charges LLM usage and tool runtime to the budget as it goes and
+asks it to shrink each tool timeout and LLM call (max_output_tokens and
+request timeout) to what is left, so in-flight work is cut off at the
+deadline. When any limit is spent the run ends with status
+"budget_exhausted"; `reason` says which limit ran out.
+"""
+
+import math
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class RunBudget:
+    def __init__(
+        self,
+        deadline_sec: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        max_tool_sec: Optional[float] = None,
+        min_output_tokens: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.deadline_sec = deadline_sec
+        self.max_tokens = max_tokens
+        self.max_tool_sec = max_tool_sec
+        # Never ask the model for fewer output tokens than this (a truncated
+        # JSON reply is worse than a slightly overspent budget)
+        self.min_output_tokens = min_output_tokens
+        self._clock = clock
+        self.start()
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "RunBudget":
+        """Build from get_budget_settings() output."""
+        return cls(
+            deadline_sec=settings["deadline_sec"],
+            max_tokens=settings["max_tokens"],
+            max_tool_sec=settings["max_tool_sec"],
+            min_output_tokens=settings["min_output_tokens"],
+        )
+
+    def start(self) -> None:
+        self.started = self._clock()
+        self.tokens_used = 0
+        self.tool_sec_used = 0.0
+        self.reason: Optional[str] = None
+
+    def elapsed(self) -> float:
+        return self._clock() - self.started
+
+    def remaining_sec(self) -> Optional[float]:
+        if self.deadline_sec is None:
+            return None
+        return self.deadline_sec - self.elapsed()
+
+    def remaining_tokens(self) -> Optional[int]:
+        if self.max_tokens is None:
+            return None
+        return self.max_tokens - self.tokens_used
+
+    def remaining_tool_sec(self) -> Optional[float]:
+        if self.max_tool_sec is None:
+            return None
+        return self.max_tool_sec - self.tool_sec_used
+
+    def charge_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Charge a Responses API usage block (input plus output tokens)."""
+        if isinstance(usage, dict):
+            self.tokens_used += (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
+
+    def charge_tool(self, seconds: float) -> None:
+        self.tool_sec_used += seconds
+
+    def exhausted(self) -> Optional[str]:
+        """Name of the first spent limit ("deadline", "tokens", "tool_sec"), or None."""
+        if self.reason is None:
+            for reason, left in (
+                ("deadline", self.remaining_sec()),
+                ("tokens", self.remaining_tokens()),
+                ("tool_sec", self.remaining_tool_sec()),
+            ):
+                if left is not None and left <= 0:
+                    self.reason = reason
+                    break
+        return self.reason
+
+    def deadline_passed(self) -> bool:
+        left = self.remaining_sec()
+        return left is not None and left <= 0
+
+    def tool_timeout(self, timeout: int) -> int:
+        """
+        Shrink a tool timeout to the time left on the deadline and tool
+        ceiling, rounded up to whole seconds as the executors expect.
+        """
+        limits = [left for left in (self.remaining_sec(), self.remaining_tool_sec()) if left is not None]
+        if not limits:
+            return timeout
+        return max(1, min(timeout, math.ceil(min(limits))))
+
+    def llm_options(self) -> Dict[str, Any]:
+        """Per-call overrides for LLMInterface.query: output token cap and request timeout."""
+        options: Dict[str, Any] = {}
+        tokens = self.remaining_tokens()
+        if tokens is not None:
+            options["max_output_tokens"] = max(tokens, self.min_output_tokens)
+        seconds = self.remaining_sec()
+        if seconds is not None:
+            options["timeout"] = max(seconds, 1.0)
+        return options
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "reason": self.reason,
+            "elapsed_sec": round(self.elapsed(), 3),
+            "tokens_used": self.tokens_used,
+            "tool_sec_used": round(self.tool_sec_used, 3),
+            "deadline_sec": self.deadline_sec,
+            "max_tokens": self.max_tokens,
+            "max_tool_sec": self.max_tool_sec,
+        }
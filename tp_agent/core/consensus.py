@@ -0,0 +1,137 @@
+"""
+Parallel self-consistency.
+
+run_consensus() runs K independent trajectories of one problem on a
+thread pool. The agents come from a factory that shares the LLM interface
+(and its connection pool), the executors and the timeout policy.
+As each trajectory finishes, the answer extracted from its `done` message
+(see utils/answers.py) joins the first group of equivalent answers. Once
+a group reaches the quorum the other trajectories are cancelled (their
+tool processes are killed; in-flight LLM replies are dropped) and the
+first trajectory of the winning group is returned with the vote counts.
+Without a quorum the largest group wins once every trajectory is done.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils.answers import answers_equivalent, final_answer
+
+
+class Trajectory:
+    def __init__(self, index: int, agent: Any):
+        self.index = index
+        self.agent = agent
+        self.context: List[Dict[str, Any]] = []
+        self.status: Optional[str] = None
+        self.answer: Optional[str] = None
+        self.error: Optional[str] = None
+        self.finished_sec: Optional[float] = None
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "status": self.status,
+            "answer": self.answer,
+            "rounds": len(self.agent.rounds),
+            "error": self.error,
+            "finished_sec": self.finished_sec,
+        }
+
+
+class ConsensusResult:
+    def __init__(self, winner: Trajectory, trajectories: List[Trajectory], groups: List[List[Trajectory]],
+                 quorum: int, reached: bool, elapsed: float):
+        self.winner = winner
+        self.trajectories = trajectories
+        self.groups = groups
+        self.quorum = quorum
+        self.reached = reached
+        self.elapsed = elapsed
+
+    @property
+    def answer(self) -> Optional[str]:
+        return self.winner.answer
+
+    def votes(self) -> Dict[str, Any]:
+        voters = sum(len(g) for g in self.groups)
+        top = max((len(g) for g in self.groups), default=0)
+        return {
+            "k": len(self.trajectories),
+            "quorum": self.quorum,
+            "quorum_reached": self.reached,
+            "winner": self.winner.index,
+            "answer": self.winner.answer,
+            "agreement": round(top / voters, 3) if voters else None,
+            "groups": [{"answer": g[0].answer, "count": len(g), "trajectories": [t.index for t in g]} for g in self.groups],
+            "finished": sum(1 for t in self.trajectories if t.status is not None and t.status != "cancelled"),
+            "cancelled": sum(1 for t in self.trajectories if t.status in (None, "cancelled")),
+            "elapsed_sec": round(self.elapsed, 3),
+            "trajectories": [t.describe() for t in self.trajectories],
+        }
+
+
+def run_consensus(
+    agent_factory: Callable[[], Any],
+    initial_context: List[Dict[str, Any]],
+    k: int = 3,
+    quorum: int = 2,
+    max_rounds: Optional[int] = None,
+    rel_tol: float = 1e-6,
+) -> ConsensusResult:
+    """Run k trajectories concurrently and stop once `quorum` of them agree."""
+    k = max(1, int(k))
+    quorum = max(1, min(int(quorum), k))
+    trajectories = [Trajectory(i, agent_factory()) for i in range(k)]
+    groups: List[List[Trajectory]] = []
+    order: List[Trajectory] = []
+    t0 = time.monotonic()
+
+    def solve(trajectory: Trajectory) -> Trajectory:
+        try:
+            # Each trajectory appends to its own copy of the problem context
+            trajectory.context = trajectory.agent.run(initial_context=list(initial_context), max_rounds=max_rounds)
+            trajectory.status = trajectory.agent.status
+        except Exception as e:
+            trajectory.status = "error"
+            trajectory.error = str(e)
+        trajectory.finished_sec = round(time.monotonic() - t0, 3)
+        return trajectory
+
+    pool = ThreadPoolExecutor(max_workers=k, thread_name_prefix="tp-consensus")
+    pending = {pool.submit(solve, t) for t in trajectories}
+    winner_group: Optional[List[Trajectory]] = None
+    try:
+        while pending and winner_group is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                trajectory = future.result()
+                order.append(trajectory)
+                if trajectory.status != "done":
+                    continue
+                trajectory.answer = final_answer(trajectory.context)
+                if trajectory.answer is None:
+                    continue
+                group = next((g for g in groups if answers_equivalent(g[0].answer, trajectory.answer, rel_tol)), None)
+                if group is None:
+                    group = [trajectory]
+                    groups.append(group)
+                else:
+                    group.append(trajectory)
+                if len(group) >= quorum and winner_group is None:
+                    winner_group = group
+    finally:
+        if pending:
+            for trajectory in trajectories:
+                if trajectory.status is None:
+                    trajectory.agent.cancel()
+        # Cancelled agents wind down on their own; an in-flight LLM call is not waited for
+        pool.shutdown(wait=False)
+
+    reached = winner_group is not None
+    if winner_group is None and groups:
+        # No quorum: the largest group, ties going to the one that finished first
+        winner_group = max(groups, key=len)
+    winner = winner_group[0] if winner_group else (order[0] if order else trajectories[0])
+    return ConsensusResult(winner, trajectories, groups, quorum, reached, time.monotonic() - t0)
@@ -0,0 +1,285 @@
+"""
+Batch grading of final answers against references.
+
+grade_answer() compares one extracted answer with a reference in stages,
+cheapest first:
+
+1. normalized text or plain numbers (a decimal literal is compared to the
+   precision it was written with, so "3.14" matches pi);
+2. NumPy evaluation of both expressions, vectorized over random sample
+   points drawn from each symbol's domain ("positive" by default, since
+   most symbols are physical quantities; "real", "negative", "integer" or
+   "complex" per symbol via `domains`). The evaluation is in complex
+   arithmetic, so intermediate square roots of negatives do not turn
+   into NaN. Agreement at every point is correct and disagreement at
+   every point is incorrect. Anything in between (branch cuts, too few
+   finite values, undefined functions) is ambiguous;
+3. only for ambiguous pairs, a time-boxed sympy.simplify(a - b) == 0.
+
+Grader runs batches on a process pool (time boxes use SIGALRM, which
+needs a worker's main thread). It memoizes verdicts by a hash of the
+normalized pair, in memory and in the run store's grades table, so
+identical answers across trajectories and batches are graded once.
+"""
+
+import hashlib
+import math
+import os
+import random
+import re
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.answers import _to_sympy, normalize_answer
+
+DOMAINS = ("positive", "real", "negative", "integer", "complex")
+
+_DECIMAL_RE = re.compile(r"^[+-]?(\d+)(?:\.(\d*))?(?:[eE][+-]?\d+)?$")
+
+
+class _SymbolicTimeout(BaseException):
+    pass
+
+
+def _literal_tol(text: str) -> Optional[float]:
+    """Relative precision of a decimal literal ("3.14" -> 5e-3), None for exact or non-literal text."""
+    match = _DECIMAL_RE.match(text)
+    if match is None or (match.group(2) is None and "e" not in text.lower()):
+        return None
+    digits = (match.group(1) + (match.group(2) or "")).lstrip("0") or "0"
+    return 0.5 * 10.0 ** (1 - len(digits))
+
+
+def _sample(domain: str, n: int, rng: random.Random) -> List[complex]:
+    if domain == "integer":
+        return [complex(rng.randint(1, 6)) for _ in range(n)]
+    if domain == "negative":
+        return [complex(-rng.uniform(0.5, 2.0)) for _ in range(n)]
+    if domain == "real":
+        return [complex(rng.choice((-1, 1)) * rng.uniform(0.5, 2.0)) for _ in range(n)]
+    if domain == "complex":
+        return [complex(rng.uniform(0.5, 2.0)) * complex(math.cos(t), math.sin(t))
+                for t in (rng.uniform(-3.0, 3.0) for _ in range(n))]
+    return [complex(rng.uniform(0.5, 2.0)) for _ in range(n)]
+
+
+def numeric_equivalence(
+    expr_a: Any,
+    expr_b: Any,
+    rel_tol: float = 1e-6,
+    samples: int = 16,
+    domains: Optional[Dict[str, str]] = None,
+    default_domain: str = "positive",
+    seed: int = 0,
+) -> Optional[bool]:
+    """True/False when sampling is conclusive, None when it is ambiguous."""
+    import numpy as np
+    import sympy
+
+    symbols = sorted(expr_a.free_symbols | expr_b.free_symbols, key=str)
+    rng = random.Random(seed)
+    domains = domains or {}
+    columns = [np.array(_sample(domains.get(str(s), default_domain), samples, rng)) for s in symbols]
+    try:
+        with np.errstate(all="ignore"):
+            values = []
+            for expr in (expr_a, expr_b):
+                f = sympy.lambdify(symbols, expr, modules="numpy")
+                values.append(np.broadcast_to(np.asarray(f(*columns), dtype=complex), (samples,)))
+    except Exception:
+        # Undefined functions, unsupported constructs, shape errors
+        return None
+    va, vb = values
+    finite = np.isfinite(va) & np.isfinite(vb)
+    if finite.sum() < max(3, samples // 2):
+        return None
+    va, vb = va[finite], vb[finite]
+    gap = np.abs(va - vb)
+    scale = np.maximum(np.abs(va), np.abs(vb))
+    close = gap <= rel_tol * scale + 1e-12
+    if close.all():
+        return True
+    # Clearly apart everywhere, not just beyond the tolerance
+    if (gap > 1e-3 * scale + 1e-9).all():
+        return False
+    return None
+
+
+def _time_boxed(seconds: float, fn: Any) -> Any:
+    """fn() interrupted after `seconds` (None then); only enforced on the main thread."""
+    if seconds <= 0 or threading.current_thread() is not threading.main_thread() or not hasattr(signal, "setitimer"):
+        return fn()
+
+    def on_alarm(signum: int, frame: Any) -> None:
+        raise _SymbolicTimeout()
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return fn()
+    except _SymbolicTimeout:
+        return None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def symbolic_equivalence(expr_a: Any, expr_b: Any, time_limit: float = 5.0) -> Optional[bool]:
+    """sympy.simplify(a - b) == 0 under a time limit; None if it timed out or failed."""
+    import sympy
+
+    def check() -> Optional[bool]:
+        diff = sympy.expand(expr_a - expr_b)
+        if diff == 0:
+            return True
+        return bool(sympy.simplify(diff) == 0)
+
+    try:
+        return _time_boxed(time_limit, check)
+    except Exception:
+        return None
+
+
+def grade_answer(
+    reference: Optional[str],
+    answer: Optional[str],
+    rel_tol: float = 1e-6,
+    samples: int = 16,
+    symbolic_timeout: float = 5.0,
+    domains: Optional[Dict[str, str]] = None,
+    default_domain: str = "positive",
+) -> Dict[str, Any]:
+    """Verdict ("correct", "incorrect", "unknown", "no_answer") and the stage that decided it."""
+    t0 = time.perf_counter()
+
+    def verdict(value: str, method: str) -> Dict[str, Any]:
+        return {"verdict": value, "method": method, "sec": round(time.perf_counter() - t0, 4)}
+
+    if answer is None or reference is None:
+        return verdict("no_answer", "none")
+    ref_text, ans_text = normalize_answer(reference), normalize_answer(answer)
+    if ref_text == ans_text:
+        return verdict("correct", "text")
+    # Only the reference's precision loosens the check: a coarse answer ("1e3") must not pass itself
+    tol = max(rel_tol, _literal_tol(ref_text) or 0.0)
+    try:
+        ref_num, ans_num = float(ref_text), float(ans_text)
+    except ValueError:
+        pass
+    else:
+        return verdict("correct" if math.isclose(ref_num, ans_num, rel_tol=tol) else "incorrect", "number")
+
+    try:
+        import sympy  # noqa: F401
+    except ImportError:
+        return verdict("unknown", "none")
+    try:
+        expr_ref = _to_sympy(reference.strip().strip("$").rstrip("."))
+        expr_ans = _to_sympy(answer.strip().strip("$").rstrip("."))
+    except Exception:
+        return verdict("unknown", "parse")
+    same = numeric_equivalence(expr_ref, expr_ans, tol, samples, domains, default_domain)
+    if same is not None:
+        return verdict("correct" if same else "incorrect", "numeric")
+    same = symbolic_equivalence(expr_ref, expr_ans, symbolic_timeout)
+    if same is None:
+        return verdict("unknown", "symbolic_timeout")
+    return verdict("correct" if same else "incorrect", "symbolic")
+
+
+def _grade_pair(job: Tuple[str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    reference, answer, options = job
+    return grade_answer(reference, answer, **options)
+
+
+class Grader:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        rel_tol: float = 1e-6,
+        samples: int = 16,
+        symbolic_timeout: float = 5.0,
+        default_domain: str = "positive",
+        domains: Optional[Dict[str, str]] = None,
+        run_store: Optional[Any] = None,
+    ):
+        # 0: grade in this process (time boxes only hold on the main thread)
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, int(workers))
+        self.options = {
+            "rel_tol": rel_tol,
+            "samples": samples,
+            "symbolic_timeout": symbolic_timeout,
+            "default_domain": default_domain,
+            "domains": dict(domains or {}),
+        }
+        self.run_store = run_store
+        self._memo: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any], run_store: Optional[Any] = None) -> "Grader":
+        """Build from get_grader_settings() output."""
+        return cls(
+            workers=settings["workers"],
+            rel_tol=settings["rel_tol"],
+            samples=settings["samples"],
+            symbolic_timeout=settings["symbolic_timeout"],
+            default_domain=settings["default_domain"],
+            domains=settings["domains"],
+            run_store=run_store,
+        )
+
+    def key(self, reference: Optional[str], answer: Optional[str]) -> str:
+        """Memo key: the normalized pair plus the options that can change a verdict."""
+        parts = [normalize_answer(reference or ""), normalize_answer(answer or ""), repr(sorted(self.options.items()))]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:24]
+
+    def grade_many(self, pairs: Iterable[Tuple[Optional[str], Optional[str]]]) -> List[Dict[str, Any]]:
+        """Grade (reference, answer) pairs; each distinct pair is computed once."""
+        pairs = list(pairs)
+        keys = [self.key(ref, ans) for ref, ans in pairs]
+        todo: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for key, pair in zip(keys, pairs):
+            if key not in self._memo and key not in todo:
+                todo[key] = pair
+        if todo and self.run_store is not None:
+            self._memo.update(self.run_store.cached_grades(list(todo)))
+            todo = {k: p for k, p in todo.items() if k not in self._memo}
+        if todo:
+            jobs = [(ref, ans, self.options) for ref, ans in todo.values()]
+            if self.workers and len(jobs) > 1:
+                chunk = max(1, math.ceil(len(jobs) / (self.workers * 4)))
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                    results = list(pool.map(_grade_pair, jobs, chunksize=chunk))
+            else:
+                results = [_grade_pair(job) for job in jobs]
+            self._memo.update(zip(todo, results))
+        return [dict(self._memo[key], key=key, reference=ref, answer=ans) for key, (ref, ans) in zip(keys, pairs)]
+
+    def grade_runs(self, references: Dict[str, str], since: Optional[str] = None,
+                   model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Grade every stored run of a problem in `references` and record the grades in the run store."""
+        runs = [r for r in self.run_store.answers(since=since, model=model) if r["problem"] in references]
+        grades = self.grade_many((references[r["problem"]], r["answer"]) for r in runs)
+        for run, grade in zip(runs, grades):
+            grade["run_id"] = run["run_id"]
+        self.run_store.record_grades(grades)
+        return grades
+
+
+def summarize_grades(grades: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Verdict and method counts plus accuracy over the graded (non-unknown) answers."""
+    verdicts: Dict[str, int] = {}
+    methods: Dict[str, int] = {}
+    for grade in grades:
+        verdicts[grade["verdict"]] = verdicts.get(grade["verdict"], 0) + 1
+        methods[grade["method"]] = methods.get(grade["method"], 0) + 1
+    decided = verdicts.get("correct", 0) + verdicts.get("incorrect", 0) + verdicts.get("no_answer", 0)
+    return {
+        "graded": len(grades),
+        "verdicts": verdicts,
+        "methods": methods,
+        "accuracy": round(verdicts.get("correct", 0) / decided, 4) if decided else None,
+    }
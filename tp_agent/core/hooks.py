@@ -0,0 +1,125 @@
+"""
+Hook interface for observing TPAgent runs.
+
+Subclass AgentHooks and override the callbacks you need, then pass
+instances as TPAgent(hooks=[...]). Every round record in agent.rounds
+carries its timing spans ("round", "llm.query", "format_input",
+"tool.execute", "wolfram.ensure_ready", "save", "save.blob") whether or
+not hooks are installed; hooks are only called when present.
+
+Two hooks ship with the package: ProfilerHook runs cProfile over each run
+and ChromeTraceHook exports spans in Chrome trace format (open the file in
+chrome://tracing or https://ui.perfetto.dev).
+"""
+
+import io
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class AgentHooks:
+    """No-op base class; all callbacks receive the agent first."""
+
+    def on_run_start(self, agent: Any) -> None:
+        pass
+
+    def on_round_start(self, agent: Any, record: Dict[str, Any]) -> None:
+        pass
+
+    def on_llm_start(self, agent: Any, record: Dict[str, Any]) -> None:
+        pass
+
+    def on_llm_end(self, agent: Any, record: Dict[str, Any], response: Any) -> None:
+        pass
+
+    def on_tool_start(self, agent: Any, record: Dict[str, Any], tool: str, code: str) -> None:
+        pass
+
+    def on_tool_end(self, agent: Any, record: Dict[str, Any], result: Dict[str, Any]) -> None:
+        pass
+
+    def on_span(self, agent: Any, span: Dict[str, Any], record: Optional[Dict[str, Any]]) -> None:
+        pass
+
+    def on_round_end(self, agent: Any, record: Dict[str, Any]) -> None:
+        pass
+
+    def on_run_end(self, agent: Any) -> None:
+        pass
+
+
+class ProfilerHook(AgentHooks):
+    """cProfile over the host thread of every run; accumulates across runs."""
+
+    def __init__(self):
+        # Imported here so that agents without this hook do not load the profiler
+        import cProfile
+
+        self.profile = cProfile.Profile()
+
+    def on_run_start(self, agent: Any) -> None:
+        self.profile.enable()
+
+    def on_run_end(self, agent: Any) -> None:
+        self.profile.disable()
+
+    def report(self, limit: int = 25, sort: str = "cumulative") -> str:
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def dump(self, path: str) -> str:
+        """Write binary stats readable by pstats / snakeviz."""
+        self.profile.dump_stats(path)
+        return path
+
+
+class ChromeTraceHook(AgentHooks):
+    """
+    Collect spans as Chrome trace "complete" events. If `path` is given the
+    trace is rewritten at the end of every run.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._offsets: Dict[int, float] = {}
+
+    def on_run_start(self, agent: Any) -> None:
+        # Spans are relative to the run; anchor each thread's runs at wall-clock time
+        self._offsets[threading.get_ident()] = time.time() * 1e6
+
+    def on_span(self, agent: Any, span: Dict[str, Any], record: Optional[Dict[str, Any]]) -> None:
+        tid = threading.get_ident()
+        event = {
+            "name": span["name"],
+            "cat": "tp_agent",
+            "ph": "X",
+            "ts": round(self._offsets.get(tid, 0.0) + span["start"] * 1e6, 1),
+            "dur": round(span["sec"] * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {"round": record["round"] if record else None, "problem": agent.problem_id},
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def on_run_end(self, agent: Any) -> None:
+        if self.path:
+            self.write(self.path)
+
+    def write(self, path: str) -> str:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with self._lock:
+            data = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
@@ -1,75 +1,498 @@
 import json
-from typing import Dict, List, Any, Optional
-from ..executors.tools import PythonExecutor, MathematicaExecutor
-from .llm_interface import LLMInterface
+import math
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Optional
+from ..executors.bridge import SymbolSession
+from ..executors.jobs import JOB_VERBS, JobError, JobManager
+from ..executors.registry import ToolRegistry
+from ..executors.tools import BaseExecutor, PythonExecutor, MathematicaExecutor
+from .budget import RunBudget
 from .problem_io import load_problem
-from ..utils.prompts import get_system_prompt
-from ..utils.config import load_config, get_agent_settings
+from .stall import StallDetector
+from .hooks import AgentHooks
+from .messages import Message
+from .timeout_policy import TimeoutPolicy
+from .transcript import RunSummary
+from ..utils.blobs import BlobStore, offload_message, resolve_context
+from ..utils.cancel import CancelScope
+from ..utils.metrics import get_metrics
+from ..utils.spans import SpanRecorder, span
+from ..utils.config import (
+    ConfigService, get_agent_settings, get_blob_settings, get_bridge_settings, get_budget_settings, get_config_service,
+    get_consensus_settings, get_jobs_settings, get_stall_settings, get_sweep_settings, get_timeout_settings,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .consensus import ConsensusResult
+    from .llm_interface import LLMInterface
+
+_metrics = get_metrics()
+# The _count series of the round histogram doubles as the round counter
+ROUND_SECONDS = _metrics.histogram("tp_agent_round_seconds", "Wall time of one agent round (LLM call plus tool)")
+RUNS = _metrics.counter("tp_agent_runs_total", "Finished agent runs by status", ("status",))
+ROUNDS_PER_RUN = _metrics.histogram(
+    "tp_agent_rounds_per_run", "Rounds taken per problem", buckets=(1, 2, 3, 5, 8, 10, 15, 20, 30, 50, 100)
+)
+ACTIVE_RUNS = _metrics.gauge("tp_agent_active_runs", "Agent runs in progress")
+
+# Tool-call fields passed through to the executor as keyword options
+TOOL_OPTIONS = ("cores", "grid", "profile")
 
 
 class TPAgent:
-    def __init__(self, llm_interface: Optional[LLMInterface] = None, config: Optional[Dict[str, Any]] = None):
-        self.config = config or load_config()
-        self.agent_settings = get_agent_settings(self.config)
+    def __init__(
+        self,
+        llm_interface: Optional["LLMInterface"] = None,
+        config: Optional[Dict[str, Any]] = None,
+        tools: Optional[Mapping[str, BaseExecutor]] = None,
+        system_prompt: Optional[str] = None,
+        transcript: Optional[Callable[[Dict[str, Any]], None]] = None,
+        run_store: Optional[Any] = None,
+        blob_store: Optional[BlobStore] = None,
+        config_service: Optional[ConfigService] = None,
+        timeout_policy: Optional[TimeoutPolicy] = None,
+        hooks: Optional[Iterable[AgentHooks]] = None,
+    ):
+        # Observers of the run loop (see hooks.py)
+        self.hooks: List[AgentHooks] = list(hooks or [])
+        # Optional RunStore (see run_store.py) that records every finished run
+        # and feeds execution history to the timeout policy
+        self.run_store = run_store
+        # A policy passed in is shared across agents and kept on config reload
+        self._shared_timeout_policy = timeout_policy is not None
+        self.timeout_policy = timeout_policy
+        # Without an explicit config the agent follows the config service and
+        # re-reads its settings at the start of every run (see _refresh_config)
+        self.config_service = None
+        if not config:
+            self.config_service = config_service or get_config_service()
+            config = self.config_service.config()
+        self.apply_config(config)
 
-        self.llm = llm_interface or LLMInterface(config_path=None)
+        if llm_interface is None:
+            # Imported here so that importing the host does not pull in httpx
+            from .llm_interface import LLMInterface
+            llm_interface = LLMInterface(config_path=None)
+        self.llm = llm_interface
 
-        # Initialize tools with configured timeouts
-        python_timeout = self.agent_settings.get('python_timeout', 10)
-        mathematica_timeout = self.agent_settings.get('mathematica_timeout', 10)
+        # Shared executors may be passed in by long-lived callers (see core/server.py);
+        # otherwise each tool is constructed the first time the model calls it
+        self.tools = tools if tools is not None else ToolRegistry({
+            "python_exec": PythonExecutor,
+            "mathematica_exec": MathematicaExecutor,
+            "python_sweep": self._sweep_executor,
+        })
+        self.context: List[Dict[str, Any]] = []
+        self._explicit_prompt = system_prompt is not None
+        if system_prompt is None:
+            system_prompt = (self.config_service or get_config_service()).system_prompt()
+        self.system_prompt = system_prompt
+        # Callables invoked with every message appended to the context
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        if transcript is not None:
+            self.listeners.append(transcript)
+        self.summary = RunSummary()
+        # One of "done", "max_rounds", "stalled", "budget_exhausted" or "cancelled" after run()
+        self.status: Optional[str] = None
+        # cancel() from any thread stops the run and kills its in-flight tool processes
+        self.cancel_scope = CancelScope()
+        # Budget of the current or last run (see budget.py)
+        self.budget: Optional[RunBudget] = None
+        self.problem_id: Optional[str] = None
+        self.run_id: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Per-round timing, token and span records
+        self.rounds: List[Dict[str, Any]] = []
+        # Large tool outputs go to the blob store; the context keeps a preview
+        self.blob_store = blob_store
+        # Background tool jobs of the current run (see executors/jobs.py); built on first use
+        self._jobs: Optional[JobManager] = None
+        # Values exported by tool calls of the current run (see executors/bridge.py)
+        self.session = self._new_session()
 
-        self.tools = {
-            "python_exec": PythonExecutor(),
-            "mathematica_exec": MathematicaExecutor()
-        }
+    def apply_config(self, config: Dict[str, Any]) -> None:
+        """Take agent, timeout, stall and blob settings from config."""
+        self.config = config
+        self.agent_settings = get_agent_settings(config)
         self.default_timeout = self.agent_settings.get('default_timeout', 10)
-        self.context: List[Dict[str, Any]] = []
-        self.system_prompt = get_system_prompt()
+        if not self._shared_timeout_policy:
+            self.timeout_policy = TimeoutPolicy.from_settings(
+                get_timeout_settings(config), self.agent_settings, self.run_store
+            )
+        self.stall_detector = StallDetector.from_settings(get_stall_settings(config))
+        self.blob_settings = get_blob_settings(config)
 
-    def run(self, initial_context: Optional[List[Dict]] = None, max_rounds: int = 10) -> List[Dict]:
+    def _refresh_config(self) -> None:
+        """Pick up config and system prompt changes between runs."""
+        if self.config_service is None:
+            return
+        config = self.config_service.config()
+        if config is not self.config:
+            self.apply_config(config)
+        if not self._explicit_prompt:
+            self.system_prompt = self.config_service.system_prompt()
+
+    def run(
+        self,
+        initial_context: Optional[List[Dict]] = None,
+        max_rounds: Optional[int] = None,
+        budget: Optional[RunBudget] = None,
+    ) -> List[Dict]:
+        self._refresh_config()
+        if max_rounds is None:
+            max_rounds = self.agent_settings.get("max_rounds", 10)
+        self.budget = budget or RunBudget.from_settings(get_budget_settings(self.config))
+        self.budget.start()
         if initial_context:
             self.context = initial_context
+            self.context[:] = [Message.of(msg) for msg in self.context]
+            self.summary = RunSummary()
+            for msg in self.context:
+                self._notify(msg)
+        else:
+            self.summary = RunSummary.from_context(self.context)
+        self.stall_detector.reset()
+        self.status = "max_rounds"
+        self.run_id = uuid.uuid4().hex
+        self.rounds = []
+        self.started_at = time.time()
+        self._jobs = None
+        self.session = self._new_session()
+
+        # Spans cost a few perf_counter() calls per round; hooks only run when installed
+        recorder = SpanRecorder(self._on_span if self.hooks else None)
+        previous = recorder.activate()
+        previous_scope = self.cancel_scope.activate()
+        ACTIVE_RUNS.inc()
+        try:
+            self._hook("on_run_start", self)
+            for round_num in range(max_rounds):
+                if self.cancel_scope.cancelled:
+                    self.status = "cancelled"
+                    break
+                if self.budget.exhausted():
+                    self.status = "budget_exhausted"
+                    break
+                record: Dict[str, Any] = {"round": round_num}
+                self.rounds.append(record)
+                recorder.begin_round(record)
+                self._hook("on_round_start", self, record)
+                t0 = time.perf_counter()
+                with recorder.span("round"):
+                    stop = self._run_round(record)
+                ROUND_SECONDS.observe(time.perf_counter() - t0)
+                self._hook("on_round_end", self, record)
+                if stop:
+                    break
+        except BaseException:
+            self.status = "error"
+            raise
+        finally:
+            # Background jobs do not outlive the run that started them
+            if self._jobs is not None:
+                self._jobs.close()
+            ACTIVE_RUNS.dec()
+            CancelScope.deactivate(previous_scope)
+            SpanRecorder.deactivate(previous)
+            self.finished_at = time.time()
+            RUNS.inc(status=self.status)
+            ROUNDS_PER_RUN.observe(len(self.rounds))
+            try:
+                if self.run_store is not None and self.status != "error":
+                    self.run_store.record_agent(self)
+            finally:
+                # Also when the run raised, so profilers stop and traces are written
+                self._hook("on_run_end", self)
+        return self.context
 
-        for round_num in range(max_rounds):
-            input_json = {
-                "sys": self.system_prompt,
-                "ctx": self.context
-            }
+    def _run_round(self, record: Dict[str, Any]) -> bool:
+        """One LLM call plus the tool call it asks for. Returns True when the run should stop."""
+        self._report_jobs()
+        input_json = {
+            "sys": self.system_prompt,
+            "ctx": self._llm_context()
+        }
 
-            llm_response = self.llm.query(input_json)
+        # Only pass overrides when a budget applies, so plain LLM objects keep working
+        options = self.budget.llm_options()
+        self._hook("on_llm_start", self, record)
+        t0 = time.perf_counter()
+        with span("llm.query"):
+            llm_response = self.llm.query(input_json, **options) if options else self.llm.query(input_json)
+        record["llm_sec"] = time.perf_counter() - t0
+        record["usage"] = getattr(self.llm, "last_usage", None)
+        self._hook("on_llm_end", self, record, llm_response)
+        self.budget.charge_usage(record["usage"])
+        if self.cancel_scope.cancelled:
+            # Drop whatever arrived after cancellation
+            self.status = "cancelled"
+            return True
+        if self.budget.deadline_passed():
+            # The reply (or the timeout error) arrived after the deadline
+            self.budget.exhausted()
+            self.status = "budget_exhausted"
+            return True
 
-            if not isinstance(llm_response, dict) or "role" not in llm_response:
-                raise ValueError(f"Invalid LLM response: {llm_response}")
+        if not isinstance(llm_response, dict) or "role" not in llm_response:
+            raise ValueError(f"Invalid LLM response: {llm_response}")
 
-            self.context.append(llm_response)
+        # Where this round's message sits in the context, so stored timings match it exactly
+        record["context_index"] = len(self.context)
+        self._append(llm_response)
 
-            if "tool" in llm_response:
-                tool_name = llm_response["tool"]
-                if tool_name in self.tools:
+        tool_result = None
+        if "tool" in llm_response:
+            tool_name = llm_response["tool"]
+            if tool_name in JOB_VERBS:
+                with span("tool.job"):
+                    tool_result = self._job_verb(tool_name, llm_response)
+                if self.cancel_scope.cancelled:
+                    self.status = "cancelled"
+                    return True
+            elif tool_name in self.tools:
+                if self.stall_detector.is_blocked(tool_name):
+                    tool_result = self.stall_detector.blocked_result(tool_name)
+                elif llm_response.get("background"):
+                    tool_result = self._submit_job(tool_name, llm_response)
+                else:
                     code = llm_response.get("code", "")
-                    timeout = llm_response.get("timeout", self.default_timeout)
+                    timeout, source = self.timeout_policy.choose(tool_name, code, llm_response.get("timeout"))
+                    budget_timeout = self.budget.tool_timeout(timeout)
+                    if budget_timeout < timeout:
+                        timeout, source = budget_timeout, "budget"
+                    self._hook("on_tool_start", self, record, tool_name, code)
+                    t0 = time.perf_counter()
+                    with span("tool.execute"):
+                        options = self._tool_options(tool_name, llm_response)
+                        tool_result = self.tools[tool_name].execute(code, timeout, **options)
+                    record["tool_sec"] = time.perf_counter() - t0
+                    if self.cancel_scope.cancelled:
+                        self.status = "cancelled"
+                        return True
+                    self.budget.charge_tool(record["tool_sec"])
+                    record["timeout"] = timeout
+                    record["timeout_source"] = source
+                    err = "" if tool_result.get("ok") else str(tool_result.get("err") or "")
+                    # A cancelled call says nothing about the runtime; a timed-out one only bounds it
+                    if err != "Cancelled":
+                        self.timeout_policy.observe(
+                            tool_name, code, record["tool_sec"], timed_out=err.startswith("Timeout after")
+                        )
+                    if source != "requested":
+                        # Tell the model (and the transcript) the limit it actually ran under
+                        tool_result = dict(tool_result, timeout=timeout, timeout_source=source)
+                    self._hook("on_tool_end", self, record, tool_result)
+            if tool_result is not None:
+                record["tool"] = tool_name
+                record["ok"] = bool(tool_result.get("ok"))
+                tool_result = self._append_tool_result(tool_result)
+
+        if llm_response.get("done", False):
+            self.status = "done"
+            return True
+
+        if self.stall_detector.observe(llm_response, tool_result):
+            action = self.stall_detector.intervene()
+            if action == "stop":
+                self.status = "stalled"
+                return True
+            self._append(self.stall_detector.hint_message(action))
+        return False
+
+    def run_consensus(
+        self,
+        initial_context: List[Dict],
+        k: Optional[int] = None,
+        quorum: Optional[int] = None,
+        max_rounds: Optional[int] = None,
+    ) -> "ConsensusResult":
+        """
+        Run k trajectories of the problem concurrently (see consensus.py) and
+        adopt the winning one: afterwards context, status, rounds and summary
+        are those of the winner. Defaults come from the "consensus" config section.
+        """
+        from .consensus import run_consensus
+
+        self._refresh_config()
+        settings = get_consensus_settings(self.config)
+        result = run_consensus(
+            self._sibling,
+            initial_context,
+            k=k or settings["trajectories"],
+            quorum=quorum or settings["quorum"],
+            max_rounds=max_rounds,
+            rel_tol=settings["rel_tol"],
+        )
+        winner = result.winner.agent
+        self.summary = RunSummary()
+        for msg in winner.context:
+            self._notify(msg)
+        self.context = winner.context
+        self.status = winner.status
+        self.rounds = winner.rounds
+        self.budget = winner.budget
+        self.run_id = winner.run_id
+        self.started_at, self.finished_at = winner.started_at, winner.finished_at
+        self.stall_detector = winner.stall_detector
+        return result
+
+    def _sibling(self) -> "TPAgent":
+        """An agent sharing this one's LLM interface, executors, stores and timeout policy."""
+        sibling = TPAgent(
+            llm_interface=self.llm,
+            config=None if self.config_service is not None else self.config,
+            tools=self.tools,
+            system_prompt=self.system_prompt,
+            run_store=self.run_store,
+            blob_store=self.blob_store,
+            config_service=self.config_service,
+            timeout_policy=self.timeout_policy,
+        )
+        sibling.problem_id = self.problem_id
+        return sibling
+
+    def cancel(self) -> None:
+        """Stop the current run (safe to call from another thread)."""
+        self.cancel_scope.cancel()
+        if self._jobs is not None:
+            self._jobs.cancel_all()
+
+    @property
+    def jobs(self) -> JobManager:
+        """The current run's JobManager, built the first time a job verb or background call needs it."""
+        if self._jobs is None:
+            self._jobs = JobManager.from_settings(get_jobs_settings(self.config))
+        return self._jobs
+
+    def _sweep_executor(self) -> BaseExecutor:
+        # Imported here: sweeps (and their thread pool) are for a minority of runs
+        from ..executors.sweep import SweepExecutor
+
+        return SweepExecutor.from_settings(get_sweep_settings(self.config))
+
+    def _new_session(self) -> Optional[SymbolSession]:
+        settings = get_bridge_settings(self.config)
+        return SymbolSession.from_settings(settings) if settings["enabled"] else None
 
-                    tool_result = self.tools[tool_name].execute(code, timeout)
-                    self.context.append(tool_result)
+    def _tool_options(self, tool_name: str, llm_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-call executor options in a tool call (cores, grid) plus the run's symbol session."""
+        # Only forwarded when present, so executors without per-call options still work
+        options = {name: llm_response[name] for name in TOOL_OPTIONS if llm_response.get(name) is not None}
+        if self.session is not None and getattr(self.tools[tool_name], "language", None):
+            options["session"] = self.session
+        return options
 
-            if llm_response.get("done", False):
-                break
+    def _job_seconds(self, llm_response: Dict[str, Any], default: float) -> int:
+        """A job deadline or wait from the call's "timeout", cut to what is left of the budget."""
+        requested = llm_response.get("timeout")
+        if requested is None:
+            return self.budget.tool_timeout(default)
+        try:
+            seconds = float(requested)
+        except (TypeError, ValueError):
+            raise JobError(f"Invalid timeout {requested!r}: expected a number of seconds") from None
+        if not seconds > 0:
+            raise JobError(f"Invalid timeout {requested!r}: expected a positive number of seconds")
+        return self.budget.tool_timeout(math.ceil(seconds))
 
+    def _submit_job(self, tool_name: str, llm_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Start a "background": true tool call as a job and answer with its id."""
+        options = self._tool_options(tool_name, llm_response)
+        try:
+            # "timeout" is the job's own deadline here
+            deadline = self._job_seconds(llm_response, self.jobs.default_deadline)
+            job = self.jobs.submit(self.tools[tool_name], tool_name, llm_response.get("code", ""), deadline, **options)
+        except JobError as e:
+            return {"role": "tool", "tool": tool_name, "ok": False, "out": "", "err": str(e)}
+        return job.message()
+
+    def _job_verb(self, verb: str, llm_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer job_status, job_wait or job_cancel."""
+        if verb == "job_status" and not llm_response.get("job"):
+            jobs = [job.message() for job in self.jobs.running()]
+            return {"role": "tool", "tool": verb, "ok": True, "out": json.dumps(jobs), "err": ""}
+        try:
+            if verb == "job_wait":
+                wait = self._job_seconds(llm_response, self.jobs.max_wait)
+                job = self.jobs.wait(llm_response.get("job"), wait)
+            elif verb == "job_cancel":
+                job = self.jobs.cancel(llm_response.get("job"))
+            else:
+                job = self.jobs.get(llm_response.get("job"))
+        except JobError as e:
+            return {"role": "tool", "tool": verb, "ok": False, "out": "", "err": str(e)}
+        if self.jobs.report(job):
+            self.budget.charge_tool(job.elapsed or 0.0)
+        return job.message(verb)
+
+    def _report_jobs(self) -> None:
+        """Put the results of jobs that finished since the last round into the context."""
+        if self._jobs is None:
+            return
+        for job in self._jobs.updates():
+            self.budget.charge_tool(job.elapsed or 0.0)
+            self._append_tool_result(job.message())
+
+    def _append_tool_result(self, tool_result: Dict[str, Any]) -> Dict[str, Any]:
+        if self.blob_store is not None:
+            with span("save.blob"):
+                tool_result = offload_message(
+                    tool_result,
+                    self.blob_store,
+                    self.blob_settings["threshold"],
+                    self.blob_settings["preview_chars"],
+                )
+        self._append(tool_result)
+        return tool_result
+
+    def _hook(self, name: str, *args: Any) -> None:
+        for hook in self.hooks:
+            getattr(hook, name)(*args)
+
+    def _on_span(self, finished: Dict[str, Any], record: Optional[Dict[str, Any]]) -> None:
+        for hook in self.hooks:
+            hook.on_span(self, finished, record)
+
+    def _llm_context(self) -> List[Dict[str, Any]]:
+        if self.blob_store is not None and self.blob_settings["send_full_to_llm"]:
+            return resolve_context(self.context, self.blob_store)
         return self.context
 
+    def _append(self, msg: Dict[str, Any]) -> None:
+        # Messages cache their JSON, so each is encoded once rather than every round
+        msg = Message.of(msg)
+        self.context.append(msg)
+        self._notify(msg)
+
+    def _notify(self, msg: Dict[str, Any]) -> None:
+        self.summary.update(msg)
+        if self.listeners:
+            with span("save"):
+                for listener in self.listeners:
+                    listener(msg)
+
     def reset(self):
         self.context = []
+        self.summary = RunSummary()
+        self.status = None
+        self.cancel_scope = CancelScope()
+        self.stall_detector.reset()
 
     def run_with_problem(
         self,
         problem_path: str,
-        max_rounds: int = 10,
+        max_rounds: Optional[int] = None,
     ) -> List[Dict]:
         """
         Convenience wrapper to load a problem from file or raw text,
         convert it into initial context, and execute the agent loop.
         """
         initial_ctx = load_problem(problem_path)
+        if self.problem_id is None:
+            self.problem_id = Path(problem_path).stem
         return self.run(initial_context=initial_ctx, max_rounds=max_rounds)
 
 
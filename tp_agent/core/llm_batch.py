@@ -0,0 +1,393 @@
+"""
+Offline batch mode for LLM calls.
+
+For overnight evals latency does not matter, but throughput and cost do.
+BatchLLMInterface is an LLMInterface for many agents running at once on
+threads (see run_batch()). Its query() does not send the request. It adds
+the request to the next batch and blocks until the reply arrives. A batch
+is flushed when every active trajectory is waiting on the LLM, so
+trajectories advance in lockstep, one round per batch. It is also
+flushed when it reaches max_requests, or when its oldest request has
+waited max_wait seconds, so a trajectory stuck in a long tool call does
+not hold up the others.
+
+A flushed batch is written to a JSONL file in the Batch API input format
+and submitted through a backend. It is polled until it ends, and each
+reply goes back to the agent that asked for it. That agent runs its tool
+and queues its next round.
+
+OpenAIBatchBackend uses the /files and /batches endpoints.
+LocalBatchBackend is a stand-in that answers every line of the file with a
+callable: a fake in tests, or, via LocalBatchBackend.via(llm), the
+synchronous /responses endpoint of OpenAI-compatible servers that have
+no batch API.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .llm_interface import LLM_REQUESTS, LLM_SECONDS, LLMInterface
+from ..utils.cancel import current_scope
+from ..utils.metrics import get_metrics
+
+_metrics = get_metrics()
+BATCHES = _metrics.counter("tp_llm_batches_total", "LLM batches by outcome (completed, failed)", ("outcome",))
+BATCH_REQUESTS = _metrics.histogram(
+    "tp_llm_batch_requests", "Requests per LLM batch", buckets=(1, 10, 100, 500, 1000, 5000, 10000, 50000)
+)
+BATCH_SECONDS = _metrics.histogram(
+    "tp_llm_batch_seconds", "Submission to results of one LLM batch", buckets=(10, 60, 300, 900, 3600, 14400, 86400)
+)
+
+# Batch statuses that may still produce results
+_RUNNING = ("validating", "in_progress", "finalizing", "cancelling")
+
+
+class BatchError(Exception):
+    pass
+
+
+class OpenAIBatchBackend:
+    """Upload the file, create a batch, and read its output and error files."""
+
+    def __init__(self, llm: LLMInterface, endpoint: str = "/v1/responses", completion_window: str = "24h"):
+        self.llm = llm
+        self.endpoint = endpoint
+        self.completion_window = completion_window
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> Any:
+        if self.llm.client is None:
+            raise BatchError("HTTP client not available. Install httpx to use the batch API.")
+        headers = {"Authorization": f"Bearer {self.llm.api_key}"}
+        response = self.llm.client.request(method, f"{self.llm.base_url}{path}", headers=headers, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            uploaded = self._request(
+                "POST", "/files", files={"file": (os.path.basename(path), f, "application/jsonl")},
+                data={"purpose": "batch"},
+            ).json()
+        batch = self._request("POST", "/batches", json={
+            "input_file_id": uploaded["id"],
+            "endpoint": self.endpoint,
+            "completion_window": self.completion_window,
+        }).json()
+        return batch["id"]
+
+    def poll(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Output lines once the batch has ended, None while it is running."""
+        info = self._request("GET", f"/batches/{batch_id}").json()
+        status = info.get("status")
+        if status in _RUNNING:
+            return None
+        lines: List[Dict[str, Any]] = []
+        # Expired and cancelled batches still return what they finished
+        for key in ("output_file_id", "error_file_id"):
+            if info.get(key):
+                text = self._request("GET", f"/files/{info[key]}/content").text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        if status != "completed" and not lines:
+            raise BatchError(f"batch {batch_id} {status}: {info.get('errors')}")
+        return lines
+
+
+class LocalBatchBackend:
+    """Answers each line with respond(body) -> Responses API result, after an optional delay."""
+
+    def __init__(self, respond: Callable[[Dict[str, Any]], Dict[str, Any]], delay: float = 0.0):
+        self.respond = respond
+        self.delay = delay
+        self._batches: Dict[str, Any] = {}
+
+    @classmethod
+    def via(cls, llm: LLMInterface) -> "LocalBatchBackend":
+        """Stand-in that sends every line to llm's synchronous /responses endpoint."""
+
+        def respond(body: Dict[str, Any]) -> Dict[str, Any]:
+            if llm.client is None:
+                raise BatchError("HTTP client not available. Install httpx to use real LLM.")
+            response = llm.client.post(
+                f"{llm.base_url}/responses", headers={"Authorization": f"Bearer {llm.api_key}"}, json=body,
+            )
+            response.raise_for_status()
+            return response.json()
+
+        return cls(respond)
+
+    def submit(self, path: str) -> str:
+        batch_id = f"local-{uuid.uuid4().hex[:12]}"
+        self._batches[batch_id] = (time.monotonic() + self.delay, path)
+        return batch_id
+
+    def poll(self, batch_id: str) -> Optional[List[Dict[str, Any]]]:
+        ready_at, path = self._batches[batch_id]
+        if time.monotonic() < ready_at:
+            return None
+        del self._batches[batch_id]
+        lines = []
+        with open(path, "r", encoding="utf-8") as f:
+            for text in f:
+                request = json.loads(text)
+                try:
+                    body = self.respond(request["body"])
+                    lines.append({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}})
+                except Exception as e:
+                    lines.append({"custom_id": request["custom_id"], "response": None, "error": {"message": str(e)}})
+        return lines
+
+
+def _line_error(line: Dict[str, Any]) -> Optional[str]:
+    if line.get("error"):
+        error = line["error"]
+        return error.get("message", str(error)) if isinstance(error, dict) else str(error)
+    response = line.get("response") or {}
+    if response.get("status_code") != 200:
+        return f"HTTP {response.get('status_code')}: {json.dumps(response.get('body'))[:500]}"
+    return None
+
+
+class BatchLLMInterface(LLMInterface):
+    def __init__(
+        self,
+        backend: Optional[Any] = None,
+        dir: str = os.path.join("outputs", "batches"),
+        poll_interval: float = 30.0,
+        max_requests: int = 50000,
+        max_wait: float = 60.0,
+        settle: float = 1.0,
+        endpoint: str = "/v1/responses",
+        completion_window: str = "24h",
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.backend = backend or OpenAIBatchBackend(self, endpoint, completion_window)
+        self.dir = dir
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+        self.max_wait = max_wait
+        # Quiet time before a lockstep flush, so trajectories that are just starting join the round
+        self.settle = settle
+        self.endpoint = endpoint
+        self._cond = threading.Condition()
+        self._pending: List[Dict[str, Any]] = []
+        # Trajectories in progress (enter/leave) and requests of batches in flight
+        self._active = 0
+        self._in_flight = 0
+        self._last_change = time.monotonic()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+
+    @classmethod
+    def from_settings(
+        cls, settings: Dict[str, Any], backend: Optional[Any] = None, **kwargs: Any
+    ) -> "BatchLLMInterface":
+        """Build from get_batch_settings() output."""
+        return cls(
+            backend=backend,
+            dir=settings["dir"],
+            poll_interval=settings["poll_interval"],
+            max_requests=settings["max_requests"],
+            max_wait=settings["max_wait"],
+            settle=settings["settle"],
+            endpoint=settings["endpoint"],
+            completion_window=settings["completion_window"],
+            **kwargs,
+        )
+
+    def enter(self) -> None:
+        """A trajectory starts; batches wait for its requests too."""
+        with self._cond:
+            self._active += 1
+            self._last_change = time.monotonic()
+
+    def leave(self) -> None:
+        """A trajectory finished."""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Flush what is pending and stop the flusher once it is sent."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def query(
+        self,
+        input_data: Dict[str, Any],
+        max_output_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Queue one round for the next batch and wait for its reply (timeout does not apply)."""
+        self._local.usage = None
+        entry = {
+            "custom_id": uuid.uuid4().hex,
+            "body": self._build_request(input_data, max_output_tokens),
+            "done": threading.Event(),
+            "result": None,
+            "error": None,
+        }
+        t0 = time.perf_counter()
+        with self._cond:
+            entry["queued_at"] = self._last_change = time.monotonic()
+            self._pending.append(entry)
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name="llm-batch-flusher", daemon=True)
+                self._flusher.start()
+            self._cond.notify_all()
+
+        scope = current_scope()
+        while not entry["done"].wait(0.5):
+            if scope is not None and scope.cancelled:
+                with self._cond:
+                    if entry in self._pending:
+                        self._pending.remove(entry)
+                return {"role": "llm", "say": "Cancelled while waiting for a batch", "done": True}
+
+        model = entry["body"]["model"]
+        outcome = "error"
+        try:
+            if entry["error"] is not None:
+                raise BatchError(entry["error"])
+            content_text = self._read_result(entry["result"], model)
+            outcome = "parse_error"
+            reply = json.loads(content_text)
+            outcome = "ok"
+            return reply
+        except json.JSONDecodeError as e:
+            return {"role": "llm", "say": f"Error parsing LLM response: {str(e)}", "done": True}
+        except Exception as e:
+            return {"role": "llm", "say": f"Error communicating with LLM: {str(e)}", "done": True}
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - t0, model=model)
+            LLM_REQUESTS.inc(model=model, outcome=outcome)
+
+    def _next_flush(self) -> Optional[float]:
+        """Seconds until the pending requests are due (0: now), None when nothing is pending."""
+        if not self._pending:
+            return None
+        if self._closed or len(self._pending) >= self.max_requests:
+            return 0.0
+        now = time.monotonic()
+        left = self.max_wait - (now - self._pending[0]["queued_at"])
+        # Every trajectory is waiting on a reply: nothing more will join this round
+        if len(self._pending) + self._in_flight >= self._active:
+            left = min(left, self.settle - (now - self._last_change))
+        return max(left, 0.0)
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    wait = self._next_flush()
+                    if wait is None and self._closed:
+                        return
+                    if wait == 0.0:
+                        break
+                    self._cond.wait(wait)
+                batch = self._pending[:self.max_requests]
+                del self._pending[:len(batch)]
+                self._in_flight += len(batch)
+            threading.Thread(target=self._run_batch, args=(batch,), name="llm-batch", daemon=True).start()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> str:
+        os.makedirs(self.dir, exist_ok=True)
+        path = os.path.join(self.dir, f"batch-{time.strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for entry in batch:
+                line = {"custom_id": entry["custom_id"], "method": "POST", "url": self.endpoint, "body": entry["body"]}
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return path
+
+    def _run_batch(self, batch: List[Dict[str, Any]]) -> None:
+        t0 = time.perf_counter()
+        try:
+            BATCH_REQUESTS.observe(len(batch))
+            batch_id = self.backend.submit(self._write(batch))
+            lines = self.backend.poll(batch_id)
+            while lines is None:
+                time.sleep(self.poll_interval)
+                lines = self.backend.poll(batch_id)
+            by_id = {line.get("custom_id"): line for line in lines}
+            for entry in batch:
+                line = by_id.get(entry["custom_id"])
+                if line is None:
+                    entry["error"] = f"no result for this request in batch {batch_id}"
+                    continue
+                entry["error"] = _line_error(line)
+                if entry["error"] is None:
+                    entry["result"] = line["response"]["body"]
+            BATCHES.inc(outcome="completed")
+            BATCH_SECONDS.observe(time.perf_counter() - t0)
+        except Exception as e:
+            BATCHES.inc(outcome="failed")
+            for entry in batch:
+                entry["error"] = f"batch failed: {e}"
+        finally:
+            # Drop these from the count before waking the agents, whose next requests start the next round
+            with self._cond:
+                self._in_flight -= len(batch)
+            for entry in batch:
+                entry["done"].set()
+
+
+def run_batch(
+    llm: BatchLLMInterface,
+    agent_factory: Callable[[], Any],
+    problems: Iterable[Any],
+    max_in_flight: int = 1000,
+    on_result: Optional[Callable[[Any, Any], None]] = None,
+    on_error: Optional[Callable[[Any, BaseException], None]] = None,
+) -> int:
+    """
+    Run every problem (see problem_sources.Problem) with an agent from
+    agent_factory, up to max_in_flight at a time, all sharing llm's batches.
+    on_result(problem, agent) is called as each finishes; returns the count.
+    A problem whose agent (or on_result) raises goes to on_error(problem,
+    error), or is reported on stderr, and the others go on.
+    """
+    slots = threading.Semaphore(max_in_flight)
+    finished = 0
+    lock = threading.Lock()
+
+    def solve(problem: Any) -> None:
+        nonlocal finished
+        try:
+            agent = agent_factory()
+            agent.problem_id = problem.id
+            agent.run(initial_context=problem.context())
+            if on_result is not None:
+                on_result(problem, agent)
+            with lock:
+                finished += 1
+        except Exception as e:
+            if on_error is not None:
+                on_error(problem, e)
+            else:
+                print(f"Problem {problem.id} failed: {type(e).__name__}: {e}", file=sys.stderr)
+        finally:
+            llm.leave()
+            slots.release()
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="batch-agent") as pool:
+        # Problems are read as slots free up, so memory does not grow with the bank
+        for problem in problems:
+            slots.acquire()
+            # Counted before its thread starts, so the first round waits for it
+            llm.enter()
+            futures.append(pool.submit(solve, problem))
+            futures = [f for f in futures if not f.done() or f.exception() is not None]
+    llm.close()
+    # Only an on_error callback that raised itself is left to surface here
+    for future in futures:
+        future.result()
+    return finished
@@ -1,14 +1,37 @@
 import json
 import os
+import threading
+import time
 from typing import Dict, Any, Optional, List, Tuple
 
-try:  # Lazy/optional import to allow tests without httpx installed
-    import httpx  # type: ignore
-except Exception:  # pragma: no cover - handled at runtime
-    httpx = None  # type: ignore
+from .messages import context_json
+from ..utils.config import get_config_service, get_openai_settings, load_config
+from ..utils.metrics import get_metrics
+from ..utils.spans import span
 
+_metrics = get_metrics()
+LLM_REQUESTS = _metrics.counter(
+    "tp_llm_requests_total", "LLM requests by model and outcome (ok, parse_error, error)", ("model", "outcome")
+)
+LLM_SECONDS = _metrics.histogram("tp_llm_request_seconds", "LLM request latency in seconds", ("model",))
+LLM_TOKENS = _metrics.counter("tp_llm_tokens_total", "LLM tokens by model and kind (input, output)", ("model", "kind"))
 
-from ..utils.config import load_config, get_openai_settings
+# httpx is optional and imported on first client construction (see _get_httpx),
+# so importing this module stays cheap.
+httpx: Any = None
+_httpx_checked = False
+
+
+def _get_httpx() -> Any:
+    global httpx, _httpx_checked
+    if not _httpx_checked:
+        try:
+            import httpx as _httpx  # type: ignore
+            httpx = _httpx
+        except Exception:  # pragma: no cover - handled at runtime
+            httpx = None
+        _httpx_checked = True
+    return httpx
 
 
 class LLMInterface:
@@ -19,6 +42,7 @@ class LLMInterface:
         base_url: Optional[str] = None,
         timeout_sec: int = 30,
         config_path: Optional[str] = None,
+        max_connections: Optional[int] = None,
     ):
         """
         A minimal OpenAI-compatible interface that returns a single JSON object.
@@ -27,12 +51,45 @@ class LLMInterface:
         - httpx is optional; without it, the interface returns a graceful error.
         - Defaults to a modern, JSON-capable model name.
     """
-        cfg = load_config(config_path)
-        defaults = get_openai_settings(cfg)
+        self._explicit = {"api_key": api_key, "model": model, "base_url": base_url}
+        # Without an explicit config file, follow the process-wide config
+        # service so a running worker picks up a new model without a restart
+        if config_path is None:
+            service = get_config_service()
+            cfg = service.config()
+            service.subscribe(self.apply_config)
+        else:
+            cfg = load_config(config_path)
+        self.apply_config(cfg)
 
-        self.api_key = api_key or defaults.get("api_key", "")
-        self.model = model or defaults.get("model", "gpt-4o-mini")
-        self.base_url = base_url or defaults.get("base_url", "https://api.openai.com/v1")
+        # Get timeout_sec from config if not explicitly provided
+        if timeout_sec == 30 and self._openai_cfg.get("timeout_sec"):  # 30 is the default
+            self.timeout_sec = self._openai_cfg.get("timeout_sec", 30)
+        else:
+            self.timeout_sec = timeout_sec
+
+        # Per-thread token usage of the most recent query (one interface may serve many agents)
+        self._local = threading.local()
+
+        self.client = None
+        httpx = _get_httpx()
+        if httpx is not None:
+            # Keep-alive pool shared by every agent that uses this interface
+            max_connections = max_connections or self._openai_cfg.get("max_connections", 10)
+            self.client = httpx.Client(
+                timeout=self.timeout_sec,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+            )
+
+    def apply_config(self, cfg: Dict[str, Any]) -> None:
+        """Take provider settings from cfg; constructor arguments still take precedence."""
+        defaults = get_openai_settings(cfg)
+        self.api_key = self._explicit["api_key"] or defaults.get("api_key", "")
+        self.model = self._explicit["model"] or defaults.get("model", "gpt-4o-mini")
+        self.base_url = self._explicit["base_url"] or defaults.get("base_url", "https://api.openai.com/v1")
 
         # Keep a reference to provider-specific raw config for optional parameters
         try:
@@ -41,17 +98,24 @@ class LLMInterface:
         except Exception:
             self._openai_cfg = {}
 
-        # Get timeout_sec from config if not explicitly provided
-        if timeout_sec == 30 and self._openai_cfg.get("timeout_sec"):  # 30 is the default
-            self.timeout_sec = self._openai_cfg.get("timeout_sec", 30)
-        else:
-            self.timeout_sec = timeout_sec
-
-        self.client = httpx.Client(timeout=self.timeout_sec) if httpx is not None else None
+    @property
+    def last_usage(self) -> Optional[Dict[str, Any]]:
+        """`usage` block of the last response received on this thread, if any."""
+        return getattr(self._local, "usage", None)
 
-    def query(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        # Build inputs for Responses API
-        instructions, input_items = self._format_responses_input(input_data)
+    def query(
+        self,
+        input_data: Dict[str, Any],
+        max_output_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send one round to the model. max_output_tokens caps the configured
+        value for this call and timeout overrides the client timeout (both
+        used by the host to fit a run budget).
+        """
+        self._local.usage = None
+        resp_payload = self._build_request(input_data, max_output_tokens)
 
         if self.client is None:
             return {
@@ -65,6 +129,53 @@ class LLMInterface:
             "Content-Type": "application/json",
         }
 
+        model = self.model
+        outcome = "error"
+        t0 = time.perf_counter()
+        try:
+            response = self.client.post(
+                f"{self.base_url}/responses",
+                headers=headers,
+                json=resp_payload,
+                timeout=timeout if timeout is not None else self.timeout_sec,
+            )
+            response.raise_for_status()
+
+            content_text = self._read_result(response.json(), model)
+            outcome = "parse_error"
+            reply = json.loads(content_text)
+            outcome = "ok"
+            return reply
+
+        except json.JSONDecodeError as e:
+            return {
+                "role": "llm",
+                "say": f"Error parsing LLM response: {str(e)}",
+                "done": True
+            }
+        except Exception as e:
+            # Include server response body when available for easier debugging
+            body = ""
+            try:
+                if hasattr(e, "response") and e.response is not None:
+                    body = f"\nResponse body: {e.response.text}"
+            except Exception:
+                pass
+            return {
+                "role": "llm",
+                "say": f"Error communicating with LLM: {str(e)}{body}",
+                "done": True
+            }
+        finally:
+            LLM_SECONDS.observe(time.perf_counter() - t0, model=model)
+            LLM_REQUESTS.inc(model=model, outcome=outcome)
+
+    def _build_request(self, input_data: Dict[str, Any], max_output_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Responses API request body for one round (also the body of a batch line, see llm_batch.py)."""
+        # Build inputs for Responses API
+        with span("format_input"):
+            instructions, input_items = self._format_responses_input(input_data)
+
         # Always use Responses API
         resp_payload: Dict[str, Any] = {
             "model": self.model,
@@ -96,6 +207,8 @@ class LLMInterface:
         # Optional: max_output_tokens from config
         try:
             mot = self._openai_cfg.get("max_output_tokens")
+            if max_output_tokens is not None:
+                mot = min(mot, max_output_tokens) if isinstance(mot, int) and mot > 0 else max_output_tokens
             if isinstance(mot, int) and mot > 0:
                 resp_payload["max_output_tokens"] = mot
         except Exception:
@@ -109,38 +222,15 @@ class LLMInterface:
                     resp_payload["reasoning"] = reasoning_cfg
         except Exception:
             pass
+        return resp_payload
 
-        try:
-            response = self.client.post(
-                f"{self.base_url}/responses",
-                headers=headers,
-                json=resp_payload,
-            )
-            response.raise_for_status()
-
-            result = response.json()
-            content_text = self._extract_output_text_from_responses(result)
-            return json.loads(content_text)
-
-        except json.JSONDecodeError as e:
-            return {
-                "role": "llm",
-                "say": f"Error parsing LLM response: {str(e)}",
-                "done": True
-            }
-        except Exception as e:
-            # Include server response body when available for easier debugging
-            body = ""
-            try:
-                if hasattr(e, "response") and e.response is not None:
-                    body = f"\nResponse body: {e.response.text}"
-            except Exception:
-                pass
-            return {
-                "role": "llm",
-                "say": f"Error communicating with LLM: {str(e)}{body}",
-                "done": True
-            }
+    def _read_result(self, result: Any, model: str) -> str:
+        """Output text of a Responses API result; records its token usage for this thread."""
+        if isinstance(result, dict) and isinstance(result.get("usage"), dict):
+            self._local.usage = usage = result["usage"]
+            LLM_TOKENS.inc(usage.get("input_tokens") or 0, model=model, kind="input")
+            LLM_TOKENS.inc(usage.get("output_tokens") or 0, model=model, kind="output")
+        return self._extract_output_text_from_responses(result)
 
     def _format_responses_input(self, input_data: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
         sys_prompt = input_data.get("sys", "")
@@ -148,8 +238,8 @@ class LLMInterface:
 
         user_text = (
             "Context as JSON follows. Reply with a single JSON object "
-            "using only fields: role, say, tool, code, timeout, done.\n\n"
-            + json.dumps(context, ensure_ascii=False, indent=2)
+            "using only fields: role, say, tool, code, timeout, cores, grid, profile, background, job, done.\n\n"
+            + context_json(context)
         )
 
         input_items: List[Dict[str, Any]] = [
@@ -224,11 +314,14 @@ class MockLLMInterface(LLMInterface):
         super().__init__()
         self.responses = []
         self.current = 0
+        # Per-call overrides passed to the last query()
+        self.last_options: Dict[str, Any] = {}
 
     def add_response(self, response: Dict[str, Any]):
         self.responses.append(response)
 
-    def query(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    def query(self, input_data: Dict[str, Any], **options: Any) -> Dict[str, Any]:
+        self.last_options = options
         if self.current < len(self.responses):
             response = self.responses[self.current]
             self.current += 1
@@ -0,0 +1,86 @@
+"""
+Context messages with cached serialization.
+
+Every entry the host appends to a context is a Message: a plain dict
+(so existing callers, json.dump and equality tests keep working) that
+remembers its compact JSON text after the first time it is serialized.
+Messages are not edited after they are appended, so each one is encoded
+once per run instead of once per round, and context_json() builds the
+LLM request by joining the cached fragments. Top-level changes drop the
+cache; changes to nested values are not tracked.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Mapping
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class Message(dict):
+    __slots__ = ("_json",)
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._json = None
+
+    @classmethod
+    def of(cls, msg: Mapping[str, Any]) -> "Message":
+        """msg itself if it is already a Message, else a Message copy of it."""
+        return msg if type(msg) is cls else cls(msg)
+
+    def json(self) -> str:
+        """Compact JSON text of the message, computed once."""
+        if self._json is None:
+            self._json = _dumps(self)
+        return self._json
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._json = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._json = None
+        super().__delitem__(key)
+
+    def __ior__(self, other: Any) -> "Message":
+        self._json = None
+        return super().__ior__(other)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        self._json = None
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self._json = None
+        return super().setdefault(key, default)
+
+    def pop(self, *args: Any) -> Any:
+        self._json = None
+        return super().pop(*args)
+
+    def popitem(self) -> Any:
+        self._json = None
+        return super().popitem()
+
+    def clear(self) -> None:
+        self._json = None
+        super().clear()
+
+    def copy(self) -> "Message":
+        return Message(self)
+
+    def __reduce__(self) -> Any:
+        # Pickle and deepcopy as a fresh Message; the cache is rebuilt on demand
+        return (Message, (dict(self),))
+
+
+def message_json(msg: Dict[str, Any]) -> str:
+    """Compact JSON of one context entry, cached for Messages."""
+    return msg.json() if isinstance(msg, Message) else _dumps(msg)
+
+
+def context_json(context: Iterable[Dict[str, Any]]) -> str:
+    """Compact JSON array of a context, joined from the per-message fragments."""
+    return "[" + ",".join(message_json(msg) for msg in context) + "]"
@@ -29,3 +29,13 @@ def load_problem(path: str) -> List[Dict[str, Any]]:
 
     with open(path, "r", encoding="utf-8") as f:
         return _wrap_text_as_context(f.read())
+
+
+def problem_from_text(text: str) -> List[Dict[str, Any]]:
+    """
+    Convert raw problem text (e.g. received over the server API)
+    into the agent's initial context.
+    """
+    if not text or not text.strip():
+        raise ValueError("Problem text is empty.")
+    return _wrap_text_as_context(text)
@@ -0,0 +1,329 @@
+"""
+Lazy problem banks for batch runs.
+
+ProblemSource iterates over problems from any mix of .txt/.md files,
+JSONL banks (one JSON object per line with the problem text and optional
+id, reference answer and tags), Parquet files (needs pyarrow) and
+directories of these, without loading a bank into memory. Files are
+visited in sorted order, so every worker sees the same sequence.
+
+- shard=(i, n) keeps the problems whose normalized-text hash falls in
+  shard i of n. Hashing the text rather than the position keeps
+  duplicates on one shard and shards stable when a bank grows.
+- dedupe skips problems whose normalized text was already seen (a set of
+  8-byte digests: about 70 bytes per distinct problem).
+- tags / exclude_tags keep problems with any of / none of the tags.
+
+JsonlBank memory-maps a JSONL file and indexes line offsets on first
+random access; the index is cached in a .idx sidecar next to the file.
+"""
+
+import array
+import hashlib
+import json
+import mmap
+import os
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .problem_io import problem_from_text
+
+TEXT_SUFFIXES = (".txt", ".md")
+BANK_SUFFIXES = (".jsonl", ".parquet")
+
+_SPACE_RE = re.compile(r"\s+")
+_INDEX_HEADER = 16
+
+
+def text_hash(text: str) -> bytes:
+    """8-byte digest of the problem text up to case and whitespace."""
+    normalized = _SPACE_RE.sub(" ", text).strip().lower()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+
+
+class Problem:
+    """One problem of a bank: text plus id, reference answer, tags and other fields."""
+
+    __slots__ = ("id", "text", "reference", "tags", "meta", "source")
+
+    def __init__(
+        self,
+        id: str,
+        text: str,
+        reference: Optional[str] = None,
+        tags: Sequence[str] = (),
+        meta: Optional[Dict[str, Any]] = None,
+        source: Optional[str] = None,
+    ):
+        self.id = id
+        self.text = text
+        self.reference = reference
+        self.tags = tuple(tags)
+        self.meta = meta or {}
+        self.source = source
+
+    def context(self) -> List[Dict[str, Any]]:
+        """The agent's initial context for this problem."""
+        return problem_from_text(self.text)
+
+    def payload(self) -> Dict[str, Any]:
+        """Work queue payload (see work_queue.enqueue_problems)."""
+        payload: Dict[str, Any] = {"problem_file": self.source, "text": self.text}
+        if self.reference is not None:
+            payload["reference"] = self.reference
+        if self.tags:
+            payload["tags"] = list(self.tags)
+        return payload
+
+    def __repr__(self) -> str:
+        return f"Problem({self.id!r}, tags={list(self.tags)})"
+
+
+def _first(record: Dict[str, Any], keys: Sequence[str]) -> Any:
+    return next((record[k] for k in keys if record.get(k) not in (None, "")), None)
+
+
+class _Fields:
+    """Which record keys hold the problem text, id, reference and tags."""
+
+    def __init__(
+        self,
+        text: Sequence[str] = ("problem", "text", "question"),
+        id: Sequence[str] = ("id", "problem_id"),
+        reference: Sequence[str] = ("reference", "answer"),
+        tags: str = "tags",
+    ):
+        self.text, self.id, self.reference, self.tags = tuple(text), tuple(id), tuple(reference), tags
+
+    def problem(self, record: Any, default_id: str, source: str) -> Problem:
+        if not isinstance(record, dict):
+            raise ValueError(f"{source}: expected a JSON object, got {type(record).__name__}")
+        text = _first(record, self.text)
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError(f"{source}: no problem text (looked for {', '.join(self.text)})")
+        tags = record.get(self.tags) or ()
+        if isinstance(tags, str):
+            tags = [t.strip() for t in tags.split(",") if t.strip()]
+        problem_id = _first(record, self.id)
+        reference = _first(record, self.reference)
+        used = set(self.text) | set(self.id) | set(self.reference) | {self.tags}
+        return Problem(
+            id=str(problem_id) if problem_id is not None else default_id,
+            text=text.strip(),
+            reference=str(reference) if reference is not None else None,
+            tags=[str(t) for t in tags],
+            meta={k: v for k, v in record.items() if k not in used},
+            source=source,
+        )
+
+
+class JsonlBank:
+    """A memory-mapped JSONL bank: streaming iteration plus indexed random access."""
+
+    def __init__(self, path: str, fields: Optional[_Fields] = None, cache_index: bool = True):
+        self.path = path
+        self.fields = fields or _Fields()
+        self.cache_index = cache_index
+        self._stem = os.path.splitext(os.path.basename(path))[0]
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._offsets: Optional[array.array] = None
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "JsonlBank":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _problem(self, line: bytes, ordinal: int) -> Problem:
+        # Records are numbered from 1, skipping blank lines; the number is the default id
+        where = f"{self.path} record {ordinal + 1}"
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"{where}: invalid JSON ({e})") from None
+        problem = self.fields.problem(record, f"{self._stem}:{ordinal + 1}", where)
+        problem.source = self.path
+        return problem
+
+    def __iter__(self) -> Iterator[Problem]:
+        if self._mm is None:
+            return
+        self._mm.seek(0)
+        ordinal = 0
+        for line in iter(self._mm.readline, b""):
+            if line.strip():
+                yield self._problem(line, ordinal)
+                ordinal += 1
+
+    def _index(self) -> array.array:
+        """Byte offsets of the non-blank lines, from the sidecar when it is current."""
+        if self._offsets is not None:
+            return self._offsets
+        stat = os.stat(self.path)
+        stamp = array.array("Q", [stat.st_size, stat.st_mtime_ns]).tobytes()
+        sidecar = self.path + ".idx"
+        try:
+            with open(sidecar, "rb") as f:
+                if f.read(_INDEX_HEADER) == stamp:
+                    offsets = array.array("Q")
+                    offsets.frombytes(f.read())
+                    self._offsets = offsets
+                    return offsets
+        except (OSError, ValueError):
+            pass
+        offsets = array.array("Q")
+        mm, start, size = self._mm, 0, stat.st_size
+        while mm is not None and start < size:
+            end = mm.find(b"\n", start)
+            end = size if end < 0 else end
+            if mm[start:end].strip():
+                offsets.append(start)
+            start = end + 1
+        self._offsets = offsets
+        if self.cache_index:
+            try:
+                with open(sidecar, "wb") as f:
+                    f.write(stamp + offsets.tobytes())
+            except OSError:
+                # Read-only bank directory: keep the index in memory only
+                pass
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __getitem__(self, i: int) -> Problem:
+        offsets = self._index()
+        i = range(len(offsets))[i]
+        start = offsets[i]
+        end = self._mm.find(b"\n", start)
+        return self._problem(self._mm[start:end if end >= 0 else len(self._mm)], i)
+
+
+def _parquet_problems(path: str, fields: _Fields) -> Iterator[Problem]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(f"Reading {path} needs pyarrow (pip install pyarrow)") from None
+    stem = os.path.splitext(os.path.basename(path))[0]
+    row = 0
+    for batch in pq.ParquetFile(path).iter_batches():
+        for record in batch.to_pylist():
+            row += 1
+            problem = fields.problem(record, f"{stem}:{row}", f"{path}:{row}")
+            problem.source = path
+            yield problem
+
+
+def _file_problems(path: str, fields: _Fields, cache_index: bool) -> Iterator[Problem]:
+    suffix = os.path.splitext(path.lower())[1]
+    if suffix in TEXT_SUFFIXES:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read().strip()
+        if text:
+            yield Problem(os.path.splitext(os.path.basename(path))[0], text, source=path)
+    elif suffix == ".jsonl":
+        with JsonlBank(path, fields, cache_index) as bank:
+            yield from bank
+    elif suffix == ".parquet":
+        yield from _parquet_problems(path, fields)
+    else:
+        raise ValueError(f"Unsupported problem source: {path}")
+
+
+def _walk(path: str) -> Iterator[str]:
+    """Problem files under path (itself if it is a file), in sorted order."""
+    if not os.path.isdir(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Problem source not found: {path}")
+        yield path
+        return
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(TEXT_SUFFIXES + BANK_SUFFIXES):
+                yield os.path.join(root, name)
+
+
+class ProblemSource:
+    def __init__(
+        self,
+        paths: Iterable[str],
+        shard: Optional[Tuple[int, int]] = None,
+        dedupe: bool = True,
+        tags: Optional[Iterable[str]] = None,
+        exclude_tags: Optional[Iterable[str]] = None,
+        fields: Optional[Dict[str, Any]] = None,
+        cache_index: bool = True,
+    ):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        if shard is not None and not 0 <= shard[0] < shard[1]:
+            raise ValueError(f"Invalid shard {shard[0]}/{shard[1]}")
+        self.shard = shard
+        self.dedupe = dedupe
+        self.tags = set(tags or ())
+        self.exclude_tags = set(exclude_tags or ())
+        self.fields = _Fields(**(fields or {}))
+        self.cache_index = cache_index
+        # Problems skipped by the last iteration, by reason
+        self.skipped: Dict[str, int] = {}
+
+    @classmethod
+    def from_settings(cls, paths: Iterable[str], settings: Dict[str, Any], **overrides: Any) -> "ProblemSource":
+        """Build from get_problem_source_settings() output; keyword overrides win."""
+        options: Dict[str, Any] = {
+            "dedupe": settings["dedupe"],
+            "cache_index": settings["cache_index"],
+            "fields": {
+                "text": settings["text_fields"],
+                "id": settings["id_fields"],
+                "reference": settings["reference_fields"],
+                "tags": settings["tags_field"],
+            },
+        }
+        options.update(overrides)
+        return cls(paths, **options)
+
+    def _tags_match(self, tags: Tuple[str, ...]) -> bool:
+        if self.tags and self.tags.isdisjoint(tags):
+            return False
+        return self.exclude_tags.isdisjoint(tags)
+
+    def __iter__(self) -> Iterator[Problem]:
+        seen = set()
+        self.skipped = {"shard": 0, "duplicate": 0, "tags": 0}
+        for path in self.paths:
+            for file_path in _walk(path):
+                for problem in _file_problems(file_path, self.fields, self.cache_index):
+                    if not self._tags_match(problem.tags):
+                        self.skipped["tags"] += 1
+                        continue
+                    digest = text_hash(problem.text)
+                    if self.shard is not None and int.from_bytes(digest, "big") % self.shard[1] != self.shard[0]:
+                        self.skipped["shard"] += 1
+                        continue
+                    if self.dedupe:
+                        if digest in seen:
+                            self.skipped["duplicate"] += 1
+                            continue
+                        seen.add(digest)
+                    yield problem
+
+
+def parse_shard(text: Optional[str]) -> Optional[Tuple[int, int]]:
+    """"2/8" -> (2, 8); None stays None."""
+    if not text:
+        return None
+    index, _, count = text.partition("/")
+    try:
+        return int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Shard must look like INDEX/COUNT, e.g. 0/4 (got {text!r})") from None
@@ -0,0 +1,489 @@
+"""
+Embedded SQLite store of finished runs.
+
+Three tables: runs (one row per trajectory), rounds (LLM latency and
+tokens per round) and tool_executions (tool, ok/err, duration and code
+fingerprint). TPAgent records into the store when a run completes, and
+import_outputs() backfills it from saved outputs/*.json and *.jsonl
+files. The report functions answer the common questions from indexed
+tables instead of re-parsing every output file.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .stall import code_fingerprint, normalize_error
+from ..utils.answers import final_answer
+from ..utils.blobs import BlobStore, resolve_field
+from ..utils.stats import quantile
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    problem TEXT,
+    model TEXT,
+    started_at REAL,
+    finished_at REAL,
+    wall_sec REAL,
+    status TEXT,
+    rounds INTEGER,
+    completed INTEGER,
+    total_messages INTEGER,
+    tool_executions INTEGER,
+    successful_executions INTEGER,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    source TEXT,
+    answer TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_model ON runs(model, started_at);
+CREATE TABLE IF NOT EXISTS rounds (
+    run_id TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    llm_sec REAL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    tool TEXT,
+    PRIMARY KEY (run_id, round)
+);
+CREATE TABLE IF NOT EXISTS tool_executions (
+    run_id TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    tool TEXT NOT NULL,
+    ok INTEGER NOT NULL,
+    duration_sec REAL,
+    timeout REAL,
+    code_fp TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, round)
+);
+CREATE INDEX IF NOT EXISTS idx_tool_fp ON tool_executions(tool, code_fp);
+CREATE TABLE IF NOT EXISTS grades (
+    run_id TEXT PRIMARY KEY,
+    reference TEXT,
+    answer TEXT,
+    verdict TEXT NOT NULL,
+    method TEXT,
+    grade_key TEXT,
+    graded_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_grades_key ON grades(grade_key);
+"""
+
+_OUTPUT_NAME_RE = re.compile(r"^(?P<prefix>.+)_(?P<ts>\d{8}_\d{6})$")
+
+
+def _quantiles(values: Iterable[float]) -> Dict[str, Any]:
+    vals = sorted(v for v in values if v is not None)
+    return {
+        "n": len(vals),
+        "p50": quantile(vals, 0.50),
+        "p90": quantile(vals, 0.90),
+        "p99": quantile(vals, 0.99),
+        "max": vals[-1] if vals else None,
+    }
+
+
+def parse_since(since: Optional[str]) -> Optional[float]:
+    """Turn "30m", "24h" or "7d" into an epoch cutoff; None means no cutoff."""
+    if not since:
+        return None
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", since.strip())
+    if not match:
+        raise ValueError(f"Invalid --since value: {since!r} (expected e.g. 30m, 24h, 7d)")
+    scale = {"s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+    return time.time() - float(match.group(1)) * scale
+
+
+def context_rounds(context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pair each LLM message (and its context index) with the tool result that followed it, if any."""
+    rounds: List[Dict[str, Any]] = []
+    for index, msg in enumerate(context):
+        role = msg.get("role")
+        if role == "llm":
+            rounds.append({"msg": msg, "result": None, "index": index})
+        elif role == "tool" and rounds and rounds[-1]["result"] is None and rounds[-1]["msg"].get("tool"):
+            rounds[-1]["result"] = msg
+    return rounds
+
+
+def _usage_tokens(usage: Optional[Dict[str, Any]]) -> Tuple[Optional[int], Optional[int]]:
+    if not isinstance(usage, dict):
+        return None, None
+    return usage.get("input_tokens"), usage.get("output_tokens")
+
+
+class RunStore:
+    def __init__(self, path: str, blob_store: Optional[BlobStore] = None):
+        self.path = path
+        # Used to read the full stderr of failed executions whose err was offloaded
+        self.blob_store = blob_store
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            # Stores created before final answers were recorded
+            if "answer" not in {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}:
+                conn.execute("ALTER TABLE runs ADD COLUMN answer TEXT")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def record_run(
+        self,
+        run: Dict[str, Any],
+        rounds: List[Dict[str, Any]],
+        tool_executions: List[Dict[str, Any]],
+    ) -> None:
+        """Insert (or replace) one run with its rounds and tool executions."""
+        run_id = run["run_id"]
+        with self._conn() as conn:
+            conn.execute("DELETE FROM rounds WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM tool_executions WHERE run_id = ?", (run_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, problem, model, started_at, finished_at, wall_sec, "
+                "status, rounds, completed, total_messages, tool_executions, successful_executions, "
+                "input_tokens, output_tokens, source, answer) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id, run.get("problem"), run.get("model"), run.get("started_at"), run.get("finished_at"),
+                    run.get("wall_sec"), run.get("status"), len(rounds), int(bool(run.get("completed"))),
+                    run.get("total_messages"), run.get("tool_executions"), run.get("successful_executions"),
+                    run.get("input_tokens"), run.get("output_tokens"), run.get("source"), run.get("answer"),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO rounds (run_id, round, llm_sec, input_tokens, output_tokens, tool) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, r["round"], r.get("llm_sec"), r.get("input_tokens"), r.get("output_tokens"), r.get("tool"))
+                    for r in rounds
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO tool_executions (run_id, round, tool, ok, duration_sec, timeout, code_fp, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, t["round"], t["tool"], int(bool(t["ok"])), t.get("duration_sec"),
+                     t.get("timeout"), t.get("code_fp"), t.get("error"))
+                    for t in tool_executions
+                ],
+            )
+
+    def _build_rows(
+        self,
+        context: List[Dict[str, Any]],
+        timings: Optional[List[Dict[str, Any]]] = None,
+        skip_problem: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        paired = context_rounds(context)
+        if timings is not None:
+            # One row per host round, with the message it appended (none if it was cut short)
+            by_index = {pair["index"]: pair for pair in paired}
+            rows = [(t["round"], t, by_index.get(t.get("context_index"))) for t in timings]
+        else:
+            if skip_problem and paired and not paired[0]["msg"].get("tool") \
+                    and str(paired[0]["msg"].get("say", "")).startswith("Problem:"):
+                paired = paired[1:]
+            rows = [(i, {}, pair) for i, pair in enumerate(paired)]
+
+        rounds: List[Dict[str, Any]] = []
+        tools: List[Dict[str, Any]] = []
+        for number, timing, pair in rows:
+            input_tokens, output_tokens = _usage_tokens(timing.get("usage"))
+            msg, result = (pair["msg"], pair["result"]) if pair is not None else ({}, None)
+            rounds.append({
+                "round": number,
+                "llm_sec": timing.get("llm_sec"),
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "tool": msg.get("tool") if result is not None else None,
+            })
+            if result is not None:
+                err = "" if result.get("ok") else (resolve_field(result, "err", self.blob_store) or "")
+                tools.append({
+                    "round": number,
+                    "tool": msg["tool"],
+                    "ok": result.get("ok"),
+                    "duration_sec": timing.get("tool_sec"),
+                    "timeout": timing.get("timeout", msg.get("timeout")),
+                    "code_fp": code_fingerprint(msg["tool"], msg.get("code", "")),
+                    "error": normalize_error(err) if not result.get("ok") else None,
+                })
+        return rounds, tools
+
+    def record_agent(self, agent: Any, source: str = "agent") -> None:
+        """Record the run an agent just finished."""
+        rounds, tools = self._build_rows(agent.context, agent.rounds)
+        summary = agent.summary.as_dict()
+        self.record_run(
+            {
+                "run_id": agent.run_id,
+                "problem": agent.problem_id,
+                "model": getattr(agent.llm, "model", None),
+                "started_at": agent.started_at,
+                "finished_at": agent.finished_at,
+                "wall_sec": (agent.finished_at - agent.started_at) if agent.started_at and agent.finished_at else None,
+                "status": agent.status,
+                "input_tokens": sum(r["input_tokens"] or 0 for r in rounds) or None,
+                "output_tokens": sum(r["output_tokens"] or 0 for r in rounds) or None,
+                "source": source,
+                "answer": final_answer(agent.context),
+                **summary,
+            },
+            rounds,
+            tools,
+        )
+
+    def import_file(self, path: str) -> bool:
+        """Import one saved run (.json from run_problem.py or a .jsonl transcript)."""
+        stem = Path(path).stem
+        if path.endswith(".jsonl"):
+            from .transcript import read_transcript
+            data = read_transcript(path)
+            meta, context, summary = data["meta"], data["context"], data["summary"]
+            problem_file, timestamp, model = meta.get("problem_file"), meta.get("timestamp"), meta.get("model")
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or "context" not in data:
+                return False
+            context, summary = data["context"], data.get("summary") or {}
+            problem_file, timestamp, model = data.get("problem_file"), data.get("timestamp"), data.get("model")
+
+        problem = Path(problem_file).stem if problem_file else None
+        match = _OUTPUT_NAME_RE.match(stem)
+        if model is None and match and problem and match.group("prefix").startswith(problem + "_"):
+            model = match.group("prefix")[len(problem) + 1:]
+        timestamp = timestamp or (match.group("ts") if match else None)
+        started_at = None
+        if timestamp:
+            try:
+                started_at = datetime.strptime(timestamp, "%Y%m%d_%H%M%S").timestamp()
+            except ValueError:
+                pass
+
+        timings = summary.get("rounds") if isinstance(summary.get("rounds"), list) else None
+        rounds, tools = self._build_rows(context, timings, skip_problem=True)
+        completed = any(m.get("done") for m in context)
+        self.record_run(
+            {
+                "run_id": stem,
+                "problem": problem,
+                "model": model,
+                "started_at": started_at,
+                "wall_sec": summary.get("wall_sec"),
+                "status": summary.get("status") or ("done" if completed else None),
+                "completed": completed,
+                "total_messages": len(context),
+                "tool_executions": len(tools),
+                "successful_executions": sum(1 for t in tools if t["ok"]),
+                "input_tokens": sum(r["input_tokens"] or 0 for r in rounds) or None,
+                "output_tokens": sum(r["output_tokens"] or 0 for r in rounds) or None,
+                "source": os.path.abspath(path),
+                "answer": final_answer(context),
+            },
+            rounds,
+            tools,
+        )
+        return True
+
+    def import_outputs(self, directory: str) -> int:
+        """
+        Import every saved run in a directory. A .jsonl transcript is used
+        only when there is no .json for the same run. Returns the count.
+        """
+        count = 0
+        names = set(os.listdir(directory))
+        for name in sorted(names):
+            is_json = name.endswith(".json")
+            is_orphan_transcript = name.endswith(".jsonl") and name[:-1] not in names
+            if not (is_json or is_orphan_transcript):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if self.import_file(path):
+                    count += 1
+            except (OSError, ValueError, KeyError):
+                continue
+        return count
+
+    def _where(self, since: Optional[str], model: Optional[str], alias: str = "runs") -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        cutoff = parse_since(since)
+        if cutoff is not None:
+            clauses.append(f"{alias}.started_at >= ?")
+            params.append(cutoff)
+        if model:
+            clauses.append(f"{alias}.model = ?")
+            params.append(model)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def latency_report(self, since: Optional[str] = None, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Latency percentiles of whole runs, LLM rounds and each tool, per model."""
+        where, params = self._where(since, model)
+        conn = self._conn()
+        groups: Dict[Tuple[str, str], List[float]] = {}
+        for row in conn.execute(f"SELECT model, wall_sec FROM runs{where}", params):
+            groups.setdefault(("run.wall_sec", row["model"]), []).append(row["wall_sec"])
+        for row in conn.execute(
+            f"SELECT runs.model AS model, rounds.llm_sec AS v FROM rounds JOIN runs USING (run_id){where}", params
+        ):
+            groups.setdefault(("round.llm_sec", row["model"]), []).append(row["v"])
+        for row in conn.execute(
+            f"SELECT runs.model AS model, t.tool AS tool, t.duration_sec AS v "
+            f"FROM tool_executions t JOIN runs USING (run_id){where}", params
+        ):
+            groups.setdefault((f"tool.{row['tool']}", row["model"]), []).append(row["v"])
+        return [
+            dict({"metric": metric, "model": m}, **_quantiles(values))
+            for (metric, m), values in sorted(groups.items(), key=lambda kv: (kv[0][0], str(kv[0][1])))
+        ]
+
+    def rounds_report(self, since: Optional[str] = None, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Completion rate, outcome counts and rounds-to-done per model."""
+        where, params = self._where(since, model)
+        per_model: Dict[str, Dict[str, Any]] = {}
+        for row in self._conn().execute(
+            f"SELECT model, status, completed, rounds, input_tokens, output_tokens FROM runs{where}", params
+        ):
+            entry = per_model.setdefault(row["model"], {"runs": 0, "statuses": {}, "done_rounds": [], "tokens": []})
+            entry["runs"] += 1
+            status = row["status"] or "unknown"
+            entry["statuses"][status] = entry["statuses"].get(status, 0) + 1
+            if row["completed"]:
+                entry["done_rounds"].append(row["rounds"])
+            if row["input_tokens"] or row["output_tokens"]:
+                entry["tokens"].append((row["input_tokens"] or 0) + (row["output_tokens"] or 0))
+
+        report = []
+        for m, entry in sorted(per_model.items(), key=lambda kv: str(kv[0])):
+            q = _quantiles(entry["done_rounds"])
+            report.append({
+                "model": m,
+                "runs": entry["runs"],
+                "completion_rate": round(len(entry["done_rounds"]) / entry["runs"], 4),
+                "statuses": entry["statuses"],
+                "rounds_to_done_p50": q["p50"],
+                "rounds_to_done_p90": q["p90"],
+                "rounds_to_done_mean": (sum(entry["done_rounds"]) / len(entry["done_rounds"])) if entry["done_rounds"] else None,
+                "tokens_mean": (sum(entry["tokens"]) / len(entry["tokens"])) if entry["tokens"] else None,
+            })
+        return report
+
+    def tool_durations(
+        self, tool: str, code_fp: Optional[str] = None, limit: int = 200, timeout_factor: float = 1.0
+    ) -> List[float]:
+        """
+        Most recent execution durations of a tool (optionally one code
+        fingerprint), oldest first; those of timed-out runs are scaled by
+        timeout_factor, since the limit cut them short.
+        """
+        sql = (
+            "SELECT CASE WHEN error LIKE 'Timeout after%' THEN duration_sec * ? ELSE duration_sec END AS duration_sec "
+            "FROM tool_executions WHERE tool = ? AND duration_sec IS NOT NULL"
+        )
+        params: List[Any] = [timeout_factor, tool]
+        if code_fp is not None:
+            sql += " AND code_fp = ?"
+            params.append(code_fp)
+        rows = self._conn().execute(sql + " ORDER BY rowid DESC LIMIT ?", params + [limit]).fetchall()
+        return [row["duration_sec"] for row in reversed(rows)]
+
+    def tool_report(self, since: Optional[str] = None, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-tool execution counts, success rates and timeouts, per model."""
+        where, params = self._where(since, model)
+        rows = self._conn().execute(
+            f"SELECT runs.model AS model, t.tool AS tool, COUNT(*) AS n, SUM(t.ok) AS ok, "
+            f"SUM(CASE WHEN t.error LIKE 'Timeout after%' THEN 1 ELSE 0 END) AS timeouts "
+            f"FROM tool_executions t JOIN runs USING (run_id){where} "
+            f"GROUP BY runs.model, t.tool ORDER BY runs.model, t.tool",
+            params,
+        )
+        return [
+            {
+                "model": row["model"],
+                "tool": row["tool"],
+                "executions": row["n"],
+                "ok": row["ok"],
+                "failed": row["n"] - row["ok"],
+                "success_rate": round(row["ok"] / row["n"], 4) if row["n"] else None,
+                "timeouts": row["timeouts"],
+            }
+            for row in rows
+        ]
+
+    def answers(self, since: Optional[str] = None, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Problem, model and final answer of every stored run."""
+        where, params = self._where(since, model)
+        rows = self._conn().execute(f"SELECT run_id, problem, model, answer FROM runs{where} ORDER BY started_at", params)
+        return [dict(row) for row in rows]
+
+    def cached_grades(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Earlier verdicts by grade key (see grader.Grader.key)."""
+        found: Dict[str, Dict[str, Any]] = {}
+        conn = self._conn()
+        # Stay under SQLite's host-parameter limit
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT grade_key, verdict, method FROM grades WHERE grade_key IN ({','.join('?' * len(batch))})", batch
+            )
+            for row in rows:
+                found[row["grade_key"]] = {"verdict": row["verdict"], "method": row["method"], "sec": 0.0}
+        return found
+
+    def record_grades(self, grades: List[Dict[str, Any]]) -> None:
+        """Insert (or replace) the grade of each run; entries need run_id, verdict and key."""
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO grades (run_id, reference, answer, verdict, method, grade_key, graded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (g["run_id"], g.get("reference"), g.get("answer"), g["verdict"], g.get("method"), g.get("key"), now)
+                    for g in grades
+                ],
+            )
+
+    def grade_report(self, since: Optional[str] = None, model: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Accuracy and verdict counts of graded runs, per model."""
+        where, params = self._where(since, model)
+        rows = self._conn().execute(
+            f"SELECT runs.model AS model, g.verdict AS verdict, COUNT(*) AS n "
+            f"FROM grades g JOIN runs USING (run_id){where} GROUP BY runs.model, g.verdict",
+            params,
+        )
+        per_model: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            per_model.setdefault(row["model"], {})[row["verdict"]] = row["n"]
+        report = []
+        for m, verdicts in sorted(per_model.items(), key=lambda kv: str(kv[0])):
+            decided = sum(n for v, n in verdicts.items() if v != "unknown")
+            report.append({
+                "model": m,
+                "graded": sum(verdicts.values()),
+                "verdicts": verdicts,
+                "accuracy": round(verdicts.get("correct", 0) / decided, 4) if decided else None,
+            })
+        return report
@@ -0,0 +1,380 @@
+"""
+Long-running agent server.
+
+Keeps one LLMInterface (and its HTTP connection pool), a pool of warm
+Python kernels and the Wolfram container alive across problems, so the
+per-request latency excludes interpreter, config and executor start-up.
+
+API (JSON over HTTP, on TCP or a Unix socket):
+
+    POST /v1/problems        {"problem": "<text>"} or {"path": "<file>"},
+                             optional "max_rounds", "wait" (default true),
+                             "stream" (NDJSON, one message per line)
+    GET  /v1/problems/<id>   status or result of a submitted problem
+    GET  /v1/health          queue depth and counters
+    GET  /metrics            Prometheus metrics of this process
+"""
+
+import collections
+import json
+import os
+import socketserver
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Queue
+from typing import Any, Dict, List, Optional
+
+from .host import TPAgent
+from .llm_interface import LLMInterface
+from .problem_io import load_problem, problem_from_text
+from .run_store import RunStore
+from .timeout_policy import TimeoutPolicy
+from ..executors.admission import AdmissionController
+from ..executors.kernel_pool import KernelPool
+from ..executors.placement import CpuPlacer, thread_env
+from ..executors.sweep import SweepExecutor
+from ..executors.tools import MathematicaExecutor, PythonExecutor
+from ..utils.blobs import BlobStore
+from ..utils.metrics import CONTENT_TYPE, get_metrics
+from ..utils.config import (
+    get_admission_settings, get_agent_settings, get_blob_settings, get_config_service, get_placement_settings,
+    get_run_store_settings, get_server_settings, get_sweep_settings, get_timeout_settings,
+)
+
+
+SERVER_JOBS = get_metrics().gauge("tp_server_jobs", "Daemon jobs by state (queued, running)", ("state",))
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class _Job:
+    def __init__(self, context: List[Dict[str, Any]], max_rounds: int, stream: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.status = "queued"
+        self.initial_context = context
+        self.max_rounds = max_rounds
+        self.events: Optional[Queue] = Queue() if stream else None
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def describe(self, include_context: bool = True) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"id": self.id, "status": self.status}
+        if self.error:
+            data["error"] = self.error
+        if self.result is not None:
+            data.update({k: v for k, v in self.result.items() if include_context or k != "context"})
+        if self.started is not None:
+            data["queued_sec"] = round(self.started - self.created, 6)
+        if self.finished is not None and self.started is not None:
+            data["run_sec"] = round(self.finished - self.started, 6)
+        return data
+
+
+class AgentServer:
+    """Owns the warm resources and a bounded queue of agent runs."""
+
+    # Finished jobs kept around for GET /v1/problems/<id>
+    MAX_FINISHED_JOBS = 1000
+
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        llm_interface: Optional[LLMInterface] = None,
+        **overrides: Any,
+    ):
+        # Without an explicit config, agent settings and the system prompt
+        # follow the config service; listener and pool sizes are fixed at start
+        self.config_service = None if config else get_config_service()
+        self.config = config or self.config_service.config()
+        self.settings = get_server_settings(self.config)
+        self.settings.update({k: v for k, v in overrides.items() if v is not None})
+        self.agent_settings = get_agent_settings(self.config)
+
+        self.llm = llm_interface or LLMInterface()
+        self.system_prompt = (self.config_service or get_config_service()).system_prompt()
+        if self.config_service is not None:
+            self.config_service.subscribe(self._apply_config)
+        blob_settings = get_blob_settings(self.config)
+        self.blob_store = None
+        if blob_settings["enabled"]:
+            self.blob_store = BlobStore(blob_settings["dir"], blob_settings["compress_level"])
+        store_settings = get_run_store_settings(self.config)
+        self.run_store = None
+        if store_settings["enabled"]:
+            self.run_store = RunStore(store_settings["path"], blob_store=self.blob_store)
+        # Shared so runtimes observed by one job inform the timeouts of the next
+        self.timeout_settings = get_timeout_settings(self.config)
+        self.timeout_policy = TimeoutPolicy.from_settings(self.timeout_settings, self.agent_settings, self.run_store)
+        placement_settings = get_placement_settings(self.config)
+        self.placer = None
+        if placement_settings["enabled"] and hasattr(os, "sched_setaffinity"):
+            self.placer = CpuPlacer.from_settings(placement_settings)
+        self.kernel_pool = KernelPool(
+            size=self.settings["warm_kernels"],
+            preload=self.settings["preload_modules"],
+            env=thread_env(self.placer.default_cores) if self.placer is not None else None,
+        ).start()
+        admission_settings = get_admission_settings(self.config)
+        self.admission = AdmissionController.from_settings(admission_settings) if admission_settings["enabled"] else None
+        python_exec = PythonExecutor(kernel_pool=self.kernel_pool, admission=self.admission, placer=self.placer)
+        self.tools = {
+            "python_exec": python_exec,
+            "mathematica_exec": MathematicaExecutor(),
+            # Sweep chunks share the warm kernels and admission control of python_exec
+            "python_sweep": SweepExecutor.from_settings(get_sweep_settings(self.config), python_executor=python_exec),
+        }
+        if self.settings["warm_wolfram"]:
+            threading.Thread(target=self._warm_wolfram, daemon=True).start()
+
+        self._pool = ThreadPoolExecutor(max_workers=self.settings["concurrency"])
+        self._jobs: "collections.OrderedDict[str, _Job]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._started_at = time.time()
+        self._httpd: Optional[socketserver.BaseServer] = None
+
+    def _apply_config(self, config: Dict[str, Any]) -> None:
+        self.config = config
+        agent_settings, timeout_settings = get_agent_settings(config), get_timeout_settings(config)
+        # Most reloads touch other sections: keep the policy, and in any case the runtimes it learned
+        if agent_settings != self.agent_settings or timeout_settings != self.timeout_settings:
+            self.timeout_policy = self.timeout_policy.reconfigured(timeout_settings, agent_settings)
+        self.agent_settings, self.timeout_settings = agent_settings, timeout_settings
+
+    def _warm_wolfram(self) -> None:
+        manager = MathematicaExecutor.get_manager()
+        if manager is not None:
+            manager.ensure_ready(os.getenv("WOLFRAM_EMAIL"), os.getenv("WOLFRAM_PASSWORD"))
+
+    def submit(self, context: List[Dict[str, Any]], max_rounds: Optional[int] = None, stream: bool = False) -> _Job:
+        if self.config_service is not None:
+            # Cheap: the service stats the config file at most once per check_interval
+            self.config_service.config()
+            self.system_prompt = self.config_service.system_prompt()
+        job = _Job(context, max_rounds or self.agent_settings.get("max_rounds", 10), stream)
+        with self._lock:
+            if self._queued >= self.settings["max_queue"]:
+                raise QueueFullError(f"Queue is full ({self._queued} problems waiting)")
+            self._queued += 1
+            self._jobs[job.id] = job
+            SERVER_JOBS.set(self._queued, state="queued")
+        self._pool.submit(self._run_job, job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[_Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run_job(self, job: _Job) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            SERVER_JOBS.set(self._queued, state="queued")
+            SERVER_JOBS.set(self._running, state="running")
+        job.status = "running"
+        job.started = time.time()
+        try:
+            agent = TPAgent(
+                llm_interface=self.llm,
+                config=self.config,
+                tools=self.tools,
+                system_prompt=self.system_prompt,
+                run_store=self.run_store,
+                blob_store=self.blob_store,
+                timeout_policy=self.timeout_policy,
+            )
+            agent.problem_id = job.id
+            if job.events is not None:
+                agent.listeners.append(job.events.put)
+            context = agent.run(initial_context=job.initial_context, max_rounds=job.max_rounds)
+            job.result = {
+                "agent_status": agent.status,
+                "summary": dict(
+                    agent.summary.as_dict(),
+                    stall=agent.stall_detector.summary(),
+                    budget=agent.budget.summary() if agent.budget else None,
+                ),
+                "context": context,
+            }
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._running -= 1
+                SERVER_JOBS.set(self._running, state="running")
+                if job.status == "done":
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                self._evict_finished()
+            if job.events is not None:
+                job.events.put(None)
+            job.done.set()
+
+    def _evict_finished(self) -> None:
+        excess = len(self._jobs) - self.MAX_FINISHED_JOBS
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].done.is_set():
+                del self._jobs[job_id]
+                excess -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "concurrency": self.settings["concurrency"],
+                "warm_kernels_idle": self.kernel_pool.idle_count(),
+                "executions_waiting": self.admission.waiting if self.admission else 0,
+                "uptime_sec": round(time.time() - self._started_at, 3),
+            }
+
+    def make_http_server(self) -> socketserver.BaseServer:
+        unix_socket = self.settings.get("unix_socket")
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            httpd: socketserver.BaseServer = _UnixHTTPServer(unix_socket, _RequestHandler)
+        else:
+            httpd = ThreadingHTTPServer((self.settings["host"], self.settings["port"]), _RequestHandler)
+            httpd.daemon_threads = True
+        httpd.agent_server = self  # type: ignore[attr-defined]
+        self._httpd = httpd
+        return httpd
+
+    def serve_forever(self) -> None:
+        httpd = self._httpd or self.make_http_server()
+        try:
+            httpd.serve_forever()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._httpd is not None:
+            self._httpd.server_close()
+            unix_socket = self.settings.get("unix_socket")
+            if unix_socket and os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            self._httpd = None
+        self._pool.shutdown(wait=False)
+        self.kernel_pool.close()
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server_version = "TPAgentServer/0.1"
+
+    @property
+    def agent_server(self) -> AgentServer:
+        return self.server.agent_server  # type: ignore[attr-defined]
+
+    def address_string(self) -> str:
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if os.getenv("TP_AGENT_DEBUG", "").lower() == "true":
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, data: Dict[str, Any]) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/v1/health":
+            self._send_json(200, self.agent_server.stats())
+            return
+        if self.path == "/metrics":
+            body = get_metrics().render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path.startswith("/v1/problems/"):
+            job = self.agent_server.get_job(self.path.rsplit("/", 1)[-1])
+            if job is None:
+                self._send_json(404, {"error": "Unknown problem id"})
+            else:
+                self._send_json(200, job.describe())
+            return
+        self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self) -> None:
+        if self.path != "/v1/problems":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            max_rounds = request.get("max_rounds")
+            if max_rounds is not None and (type(max_rounds) is not int or max_rounds < 1):
+                raise ValueError(f"max_rounds must be a positive integer (got {max_rounds!r})")
+            if request.get("path"):
+                context = load_problem(request["path"])
+            else:
+                context = problem_from_text(request.get("problem", ""))
+        except (ValueError, OSError) as e:
+            # OSError: a missing, unreadable or directory "path"
+            self._send_json(400, {"error": str(e)})
+            return
+
+        stream = bool(request.get("stream", False))
+        try:
+            job = self.agent_server.submit(context, max_rounds, stream=stream)
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)})
+            return
+
+        if stream:
+            self._stream(job)
+        elif request.get("wait", True):
+            job.done.wait()
+            self._send_json(200, job.describe())
+        else:
+            self._send_json(202, {"id": job.id, "status": job.status})
+
+    def _stream(self, job: _Job) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        self.wfile.write((json.dumps({"id": job.id, "event": "accepted"}) + "\n").encode("utf-8"))
+        self.wfile.flush()
+        while True:
+            msg = job.events.get()
+            if msg is None:
+                break
+            self.wfile.write((json.dumps({"event": "message", "message": msg}, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        final = job.describe(include_context=False)
+        final["event"] = "end"
+        self.wfile.write((json.dumps(final, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
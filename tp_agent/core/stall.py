@@ -0,0 +1,215 @@
+"""
+Loop and stall detection for the host loop.
+
+The detector fingerprints normalized tool code and error messages, counts
+repeated failures and rounds without tool progress, and decides how the
+host should intervene according to a configurable policy.
+"""
+
+import hashlib
+import io
+import re
+import tokenize
+from typing import Any, Dict, Optional
+
+
+POLICIES = ("hint", "switch_tool", "stop")
+
+_WL_COMMENT_RE = re.compile(r"\(\*.*?\*\)", re.DOTALL)
+_WS_RE = re.compile(r"\s+")
+_HEX_RE = re.compile(r"0x[0-9a-fA-F]+")
+_NUM_RE = re.compile(r"\d+(\.\d+)?")
+_PATH_RE = re.compile(r"(/[^\s'\":]+)+")
+
+
+def normalize_code(code: str, tool: Optional[str] = None) -> str:
+    """Strip comments and formatting so cosmetic edits map to the same code."""
+    code = code or ""
+    if tool == "mathematica_exec":
+        return _WS_RE.sub(" ", _WL_COMMENT_RE.sub("", code)).strip()
+
+    try:
+        tokens = []
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE,
+                            tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER):
+                continue
+            tokens.append(tok.string)
+        return " ".join(tokens)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        lines = [line.split("#", 1)[0] for line in code.splitlines()]
+        return _WS_RE.sub(" ", " ".join(lines)).strip()
+
+
+def normalize_error(err: str) -> str:
+    """Reduce an error to its final line with paths, addresses and numbers masked."""
+    lines = [line.strip() for line in (err or "").splitlines() if line.strip()]
+    if not lines:
+        return ""
+    last = _PATH_RE.sub("<path>", lines[-1])
+    last = _HEX_RE.sub("<addr>", last)
+    return _NUM_RE.sub("<n>", last)
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def code_fingerprint(tool: str, code: str) -> str:
+    """Fingerprint of a tool call that ignores comments and formatting."""
+    return fingerprint(f"{tool}\0{normalize_code(code, tool)}")
+
+
+class StallDetector:
+    """Tracks repeated failures and idle rounds within one trajectory."""
+
+    def __init__(
+        self,
+        policy: str = "hint",
+        max_repeats: int = 3,
+        max_idle_rounds: int = 4,
+        max_interventions: int = 2,
+        enabled: bool = True,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown stall policy: {policy!r} (expected one of {POLICIES})")
+        self.policy = policy
+        self.max_repeats = max_repeats
+        self.max_idle_rounds = max_idle_rounds
+        self.max_interventions = max_interventions
+        self.enabled = enabled
+        self.reset()
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "StallDetector":
+        return cls(
+            policy=settings.get("policy", "hint"),
+            max_repeats=settings.get("max_repeats", 3),
+            max_idle_rounds=settings.get("max_idle_rounds", 4),
+            max_interventions=settings.get("max_interventions", 2),
+            enabled=settings.get("enabled", True),
+        )
+
+    def reset(self) -> None:
+        self._code_failures: Dict[str, int] = {}
+        self._error_failures: Dict[str, int] = {}
+        self.idle_rounds = 0
+        self.repeated_failures = 0
+        self.max_idle_seen = 0
+        self.stalls = 0
+        self.interventions = 0
+        self.blocked_calls = 0
+        self.blocked_tool: Optional[str] = None
+        self._stall_tool: Optional[str] = None
+        self._blocked_streak = 0
+        self.stalled = False
+        self.last_reason: Optional[str] = None
+
+    def is_blocked(self, tool: str) -> bool:
+        """True if the switch_tool policy currently forbids this tool."""
+        return self.enabled and self.blocked_tool is not None and tool == self.blocked_tool
+
+    def blocked_result(self, tool: str) -> Dict[str, Any]:
+        self.blocked_calls += 1
+        return {
+            "role": "tool",
+            "tool": tool,
+            "ok": False,
+            "out": "",
+            "err": f"Blocked by host: {tool} kept failing on the same code. Use a different tool or approach.",
+        }
+
+    def observe(self, llm_msg: Dict[str, Any], tool_result: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Record one round. Returns a human-readable stall reason if the
+        trajectory is considered stalled after this round, else None.
+        """
+        if not self.enabled:
+            return None
+
+        tool = llm_msg.get("tool")
+        if tool_result is None:
+            if not llm_msg.get("done"):
+                self.idle_rounds += 1
+                self.max_idle_seen = max(self.max_idle_seen, self.idle_rounds)
+            if self.idle_rounds >= self.max_idle_rounds:
+                self.idle_rounds = 0
+                return self._stall(f"{self.max_idle_rounds} consecutive rounds without tool progress")
+            return None
+
+        self.idle_rounds = 0
+        if tool_result.get("ok"):
+            if tool != self.blocked_tool:
+                self.blocked_tool = None
+                self._blocked_streak = 0
+            return None
+        if self.blocked_tool and tool == self.blocked_tool:
+            self._blocked_streak += 1
+            if self._blocked_streak >= self.max_repeats:
+                self._blocked_streak = 0
+                return self._stall(f"kept calling blocked tool {tool}", tool)
+            return None
+
+        code_fp = code_fingerprint(tool, llm_msg.get("code", ""))
+        err_fp = fingerprint(normalize_error(tool_result.get("err", "")))
+        code_count = self._code_failures.get(code_fp, 0) + 1
+        err_count = self._error_failures.get(err_fp, 0) + 1
+        self._code_failures[code_fp] = code_count
+        self._error_failures[err_fp] = err_count
+        if code_count > 1 or err_count > 1:
+            self.repeated_failures += 1
+
+        if code_count >= self.max_repeats:
+            self._code_failures[code_fp] = 0
+            return self._stall(f"{tool} failed {code_count} times on the same code", tool)
+        if err_count >= self.max_repeats:
+            self._error_failures[err_fp] = 0
+            return self._stall(f"the same error occurred {err_count} times", tool)
+        return None
+
+    def _stall(self, reason: str, tool: Optional[str] = None) -> str:
+        self.stalls += 1
+        self.last_reason = reason
+        self._stall_tool = tool
+        return reason
+
+    def intervene(self) -> str:
+        """
+        Decide the action for the most recent stall: "hint", "switch_tool"
+        or "stop". Escalates to "stop" once max_interventions is used up.
+        """
+        if self.policy == "stop" or self.interventions >= self.max_interventions:
+            self.stalled = True
+            return "stop"
+        self.interventions += 1
+        if self.policy == "switch_tool" and self._stall_tool:
+            self.blocked_tool = self._stall_tool
+            return "switch_tool"
+        return "hint"
+
+    def hint_message(self, action: str) -> Dict[str, Any]:
+        reason = self.last_reason or "no progress"
+        if action == "switch_tool" and self.blocked_tool:
+            other = "mathematica_exec" if self.blocked_tool == "python_exec" else "python_exec"
+            text = (
+                f"Stall detected: {reason}. {self.blocked_tool} is disabled until you make "
+                f"progress with {other}."
+            )
+        else:
+            text = (
+                f"Stall detected: {reason}. Do not resubmit the same code; analyze the error, "
+                "change approach or tool, or finish with your best answer."
+            )
+        return {"role": "host", "say": text}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "stalled": self.stalled,
+            "stalls": self.stalls,
+            "interventions": self.interventions,
+            "repeated_failures": self.repeated_failures,
+            "blocked_calls": self.blocked_calls,
+            "max_idle_rounds": self.max_idle_seen,
+            "last_reason": self.last_reason,
+        }
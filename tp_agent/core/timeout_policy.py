@@ -0,0 +1,165 @@
+"""
+Per-tool timeout selection.
+
+Without history a call gets the timeout the model asked for, or the
+configured per-tool timeout (python_timeout / mathematica_timeout) when it
+asked for none. Once a tool has enough recorded runtimes (from the run
+store plus executions seen in this process) the policy takes a high
+quantile of them, scaled by a safety multiplier:
+
+- a requested or configured timeout below the estimate is raised so
+  known-slow work is not killed just before it finishes;
+- one above the estimate is lowered only when the exact code (by
+  fingerprint) has run before, so a repeated quick call cannot hang while
+  new code never gets less than the configured per-tool timeout.
+
+Every result is clamped to [min_sec, max_sec] and tagged with its source:
+"requested", "configured" or "adaptive".
+"""
+
+import math
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .stall import code_fingerprint
+from ..utils.stats import quantile
+
+# Configured default per tool (keys of get_agent_settings)
+TOOL_TIMEOUT_KEYS = {
+    "python_exec": "python_timeout",
+    "mathematica_exec": "mathematica_timeout",
+}
+
+
+class TimeoutPolicy:
+    def __init__(
+        self,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 10,
+        adaptive: bool = True,
+        quantile: float = 0.95,
+        multiplier: float = 1.5,
+        min_samples: int = 5,
+        min_sec: float = 1,
+        max_sec: float = 600,
+        history: int = 200,
+        run_store: Optional[Any] = None,
+    ):
+        self.tool_timeouts = dict(tool_timeouts or {})
+        self.default_timeout = default_timeout
+        self.adaptive = adaptive
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.min_sec = min_sec
+        self.max_sec = max_sec
+        self.history = history
+        # Optional RunStore providing durations from earlier runs
+        self.run_store = run_store
+        self._lock = threading.Lock()
+        # (tool, code_fp or None) -> recent durations, newest last
+        self._samples: Dict[Tuple[str, Optional[str]], List[float]] = {}
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Dict[str, Any],
+        agent_settings: Dict[str, Any],
+        run_store: Optional[Any] = None,
+    ) -> "TimeoutPolicy":
+        """Build from get_timeout_settings() and get_agent_settings() output."""
+        return cls(
+            tool_timeouts={tool: agent_settings[key] for tool, key in TOOL_TIMEOUT_KEYS.items() if key in agent_settings},
+            default_timeout=agent_settings.get("default_timeout", 10),
+            adaptive=settings["adaptive"],
+            quantile=settings["quantile"],
+            multiplier=settings["multiplier"],
+            min_samples=settings["min_samples"],
+            min_sec=settings["min_sec"],
+            max_sec=settings["max_sec"],
+            history=settings["history"],
+            run_store=run_store,
+        )
+
+    def reconfigured(self, settings: Dict[str, Any], agent_settings: Dict[str, Any]) -> "TimeoutPolicy":
+        """A policy built from new settings that keeps the runtimes this one has learned."""
+        policy = self.from_settings(settings, agent_settings, self.run_store)
+        with self._lock:
+            policy._samples = {key: list(samples) for key, samples in self._samples.items()}
+        return policy
+
+    @staticmethod
+    def _keys(tool: str, code: str) -> List[Tuple[str, Optional[str]]]:
+        """Sample keys for a call, most specific first."""
+        keys: List[Tuple[str, Optional[str]]] = [(tool, None)]
+        if code:
+            keys.insert(0, (tool, code_fingerprint(tool, code)))
+        return keys
+
+    def _load(self, key: Tuple[str, Optional[str]]) -> List[float]:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = []
+            if self.run_store is not None:
+                tool, fp = key
+                samples = self.run_store.tool_durations(
+                    tool, code_fp=fp, limit=self.history, timeout_factor=self.multiplier
+                )
+            self._samples[key] = samples
+        return samples
+
+    def estimate(self, tool: str, code: str = "") -> Tuple[Optional[float], bool]:
+        """
+        (seconds, exact) from recorded runtimes, or (None, False) without
+        enough history. exact is True when the estimate comes from runs of
+        this very code rather than of the tool in general.
+        """
+        with self._lock:
+            for key in self._keys(tool, code):
+                exact = key[1] is not None
+                samples = self._load(key)
+                if len(samples) >= self.min_samples:
+                    return quantile(sorted(samples), self.quantile) * self.multiplier, exact
+        return None, False
+
+    def _clamp(self, seconds: float) -> int:
+        # Executors take whole seconds (RLIMIT_CPU needs an int)
+        return int(math.ceil(min(max(seconds, self.min_sec), self.max_sec)))
+
+    def choose(self, tool: str, code: str = "", requested: Optional[float] = None) -> Tuple[int, str]:
+        """Timeout for one call and its source: "requested", "configured" or "adaptive"."""
+        try:
+            requested = float(requested) if requested is not None else None
+        except (TypeError, ValueError):
+            requested = None
+        estimate, exact = self.estimate(tool, code) if self.adaptive else (None, False)
+
+        if requested is None:
+            configured = self.tool_timeouts.get(tool, self.default_timeout)
+            # As for requests: only runs of this very code may lower the configured limit
+            if estimate is not None and (estimate > configured or exact and estimate < configured):
+                adjusted = self._clamp(estimate)
+                if adjusted != self._clamp(configured):
+                    return adjusted, "adaptive"
+            return self._clamp(configured), "configured"
+
+        if estimate is not None and (estimate > requested or exact and estimate < requested):
+            adjusted = self._clamp(estimate)
+            if adjusted != self._clamp(requested):
+                return adjusted, "adaptive"
+        return self._clamp(requested), "requested"
+
+    def observe(self, tool: str, code: str, duration: float, timed_out: bool = False) -> None:
+        """
+        Record a finished execution. A timed-out one only bounds the runtime
+        from below, so it counts as `multiplier` times the limit it hit:
+        otherwise a too-short limit would keep its own estimate short.
+        """
+        if timed_out:
+            duration *= self.multiplier
+        with self._lock:
+            for key in self._keys(tool, code):
+                samples = self._load(key)
+                samples.append(duration)
+                if len(samples) > self.history:
+                    del samples[: len(samples) - self.history]
@@ -0,0 +1,226 @@
+"""
+Streaming transcripts.
+
+TranscriptWriter appends one compact JSON line per context message as the
+agent produces it, so a crash still leaves everything up to the last
+message on disk. The first line holds run metadata under "_meta" and the
+last line (written on close) holds the summary under "_summary".
+render_log turns a transcript into the human-readable .log view without
+loading it into memory.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .messages import message_json
+from ..utils.blobs import BlobStore, resolve_message
+
+
+class RunSummary:
+    """Summary counters maintained incrementally as messages are appended."""
+
+    def __init__(self):
+        self.total_messages = 0
+        self.llm_messages = 0
+        self.tool_executions = 0
+        self.successful_executions = 0
+        self.completed = False
+
+    @classmethod
+    def from_context(cls, context: List[Dict[str, Any]]) -> "RunSummary":
+        summary = cls()
+        for msg in context:
+            summary.update(msg)
+        return summary
+
+    def update(self, msg: Dict[str, Any]) -> None:
+        self.total_messages += 1
+        role = msg.get("role")
+        if role == "llm":
+            self.llm_messages += 1
+            if msg.get("done"):
+                self.completed = True
+        elif role == "tool":
+            self.tool_executions += 1
+            if msg.get("ok"):
+                self.successful_executions += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_messages": self.total_messages,
+            "llm_messages": self.llm_messages,
+            "tool_executions": self.tool_executions,
+            "successful_executions": self.successful_executions,
+            "failed_executions": self.tool_executions - self.successful_executions,
+            "completed": self.completed,
+        }
+
+
+class TranscriptWriter:
+    """
+    Append-only JSONL sink. Instances are callable so they can be used
+    directly as a TPAgent listener.
+
+    Every line is flushed to the OS immediately; fsync is batched to every
+    `fsync_every` lines or `fsync_interval` seconds, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        fsync_every: int = 16,
+        fsync_interval: float = 2.0,
+    ):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.summary = RunSummary()
+        self._write_line({"_meta": metadata or {}})
+        self._sync()
+
+    def _write_line(self, obj: Dict[str, Any]) -> None:
+        self._file.write(message_json(obj))
+        self._file.write("\n")
+        self._file.flush()
+        self._unsynced += 1
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, msg: Dict[str, Any]) -> None:
+        self._write_line(msg)
+        self.summary.update(msg)
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    __call__ = write
+
+    def close(self, extra_summary: Optional[Dict[str, Any]] = None) -> None:
+        if self._file.closed:
+            return
+        summary = self.summary.as_dict()
+        if extra_summary:
+            summary.update(extra_summary)
+        self._write_line({"_summary": summary})
+        self._sync()
+        self._file.close()
+
+    def __enter__(self) -> "TranscriptWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def iter_transcript(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield ("meta" | "message" | "summary", obj) pairs from a transcript.
+    A truncated final line (from a crash mid-write) is skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "_meta" in obj and len(obj) == 1:
+                yield "meta", obj["_meta"]
+            elif "_summary" in obj and len(obj) == 1:
+                yield "summary", obj["_summary"]
+            else:
+                yield "message", obj
+
+
+def read_transcript(path: str) -> Dict[str, Any]:
+    """Load a transcript into {"meta", "context", "summary"}; the summary is rebuilt if missing."""
+    meta: Dict[str, Any] = {}
+    context: List[Dict[str, Any]] = []
+    summary: Optional[Dict[str, Any]] = None
+    for kind, obj in iter_transcript(path):
+        if kind == "meta":
+            meta = obj
+        elif kind == "summary":
+            summary = obj
+        else:
+            context.append(obj)
+    if summary is None:
+        summary = RunSummary.from_context(context).as_dict()
+    return {"meta": meta, "context": context, "summary": summary}
+
+
+def _write_block(f, label: str, text: str) -> None:
+    f.write(f"    {label}:\n")
+    for line in text.split("\n"):
+        f.write(f"        {line}\n")
+
+
+def render_log(
+    transcript_path: str,
+    log_path: Optional[str] = None,
+    blob_store: Optional[BlobStore] = None,
+) -> str:
+    """
+    Render the human-readable .log view of a transcript, streaming message by
+    message. Offloaded outputs are expanded from blob_store, or from the
+    "blob_dir" recorded in the transcript metadata. Returns the log path.
+    """
+    if log_path is None:
+        log_path = os.path.splitext(transcript_path)[0] + ".log"
+
+    running = RunSummary()
+    summary: Optional[Dict[str, Any]] = None
+    with open(log_path, "w", encoding="utf-8") as f:
+        for kind, obj in iter_transcript(transcript_path):
+            if kind == "meta":
+                if blob_store is None and obj.get("blob_dir") and os.path.isdir(obj["blob_dir"]):
+                    blob_store = BlobStore(obj["blob_dir"])
+                f.write("=== TP-Agent Execution Log ===\n")
+                f.write(f"Problem: {obj.get('problem_file')}\n")
+                f.write(f"Timestamp: {obj.get('timestamp')}\n")
+                f.write("=" * 50 + "\n\n")
+                if obj.get("system_prompt"):
+                    f.write("=== System Prompt ===\n")
+                    f.write(obj["system_prompt"])
+                    f.write("\n" + "=" * 50 + "\n\n")
+                continue
+            if kind == "summary":
+                summary = obj
+                continue
+
+            running.update(obj)
+            obj = resolve_message(obj, blob_store)
+            f.write(f"[{running.total_messages}] Role: {obj.get('role')}\n")
+            if "say" in obj:
+                f.write(f"    Say: {obj['say']}\n")
+            if "tool" in obj:
+                f.write(f"    Tool: {obj['tool']}\n")
+                if "code" in obj:
+                    _write_block(f, "Code", obj["code"])
+            if "out" in obj:
+                _write_block(f, "Output", obj["out"])
+            if obj.get("err"):
+                _write_block(f, "Error", obj["err"])
+            f.write("\n")
+
+        summary = summary or running.as_dict()
+        f.write("=" * 50 + "\n")
+        f.write(f"Total messages: {summary.get('total_messages', running.total_messages)}\n")
+        f.write(f"Completed: {'Yes' if summary.get('completed') else 'No'}\n")
+        if summary.get("status"):
+            f.write(f"Status: {summary['status']}\n")
+
+    return log_path
@@ -0,0 +1,417 @@
+"""
+Work queue for draining one problem set from several hosts.
+
+QueueBackend defines the lease protocol; SQLiteQueue implements it on a
+single SQLite file, which may live on a shared filesystem so that no
+external service is needed. Workers lease a problem for a visibility
+timeout, extend it with heartbeats while the agent runs, and write the
+result back. Leases that expire (crashed or partitioned workers) are
+returned to the queue until max_attempts is reached.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from ..utils.metrics import get_metrics
+
+_metrics = get_metrics()
+QUEUE_DEPTH = _metrics.gauge("tp_work_queue_depth", "Work queue tasks by status, as last seen by this worker", ("status",))
+QUEUE_TASKS = _metrics.counter(
+    "tp_work_queue_tasks_total", "Tasks finished by this worker by result (completed, failed, lost)", ("result",)
+)
+
+
+class QueueBackend:
+    def enqueue(self, problem_id: str, payload: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def heartbeat(self, lease: Dict[str, Any], visibility_timeout: float) -> bool:
+        raise NotImplementedError
+
+    def complete(self, lease: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def fail(self, lease: Dict[str, Any], error: str) -> bool:
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    problem_id TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, id);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    busy_sec REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class SQLiteQueue(QueueBackend):
+    """
+    Queue stored in one SQLite database.
+
+    The default rollback journal works on shared filesystems; pass wal=True
+    when every worker runs on the same host for better concurrency.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, wal: bool = False, busy_timeout: float = 30.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._wal = wal
+        self._busy_timeout = busy_timeout
+        self._local = threading.local()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self._busy_timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            if self._wal:
+                conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._conn())
+
+    def enqueue(self, problem_id: str, payload: Dict[str, Any]) -> bool:
+        """Add a problem. Returns False if problem_id is already queued or done."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO tasks (problem_id, payload, enqueued_at) VALUES (?, ?, ?)",
+                (problem_id, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+            return cur.rowcount == 1
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', error = 'Lease expired too many times', "
+            "lease_token = NULL, finished_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, self.max_attempts),
+        )
+        cur = conn.execute(
+            "UPDATE tasks SET status = 'queued', lease_token = NULL, worker_id = NULL "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now,),
+        )
+        return cur.rowcount
+
+    def requeue_expired(self) -> int:
+        with self._transaction() as conn:
+            return self._requeue_expired(conn, time.time())
+
+    def _touch_worker(self, conn: sqlite3.Connection, worker_id: str, now: float) -> None:
+        conn.execute(
+            "INSERT INTO workers (worker_id, host, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen",
+            (worker_id, socket.gethostname(), now, now),
+        )
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[Dict[str, Any]]:
+        """Atomically claim the oldest queued problem, or return None if the queue is empty."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            self._touch_worker(conn, worker_id, now)
+            row = conn.execute(
+                "SELECT id, problem_id, payload, attempts FROM tasks "
+                "WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', worker_id = ?, lease_token = ?, "
+                "lease_expires = ?, attempts = attempts + 1, started_at = ? WHERE id = ?",
+                (worker_id, token, now + visibility_timeout, now, row["id"]),
+            )
+        return {
+            "id": row["id"],
+            "problem_id": row["problem_id"],
+            "payload": json.loads(row["payload"]),
+            "attempts": row["attempts"] + 1,
+            "worker_id": worker_id,
+            "token": token,
+            "started_at": now,
+        }
+
+    def heartbeat(self, lease: Dict[str, Any], visibility_timeout: float) -> bool:
+        """Extend a lease. Returns False if the lease was lost to expiry."""
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (now + visibility_timeout, lease["id"], lease["token"]),
+            )
+            self._touch_worker(conn, lease["worker_id"], now)
+            return cur.rowcount == 1
+
+    def _finish(self, lease: Dict[str, Any], status: str, result: Optional[Dict[str, Any]], error: Optional[str]) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ?, lease_token = NULL "
+                "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                (
+                    status,
+                    json.dumps(result, ensure_ascii=False) if result is not None else None,
+                    error,
+                    now,
+                    lease["id"],
+                    lease["token"],
+                ),
+            )
+            if cur.rowcount != 1:
+                return False
+            column = "completed" if status == "done" else "failed"
+            self._touch_worker(conn, lease["worker_id"], now)
+            conn.execute(
+                f"UPDATE workers SET {column} = {column} + 1, busy_sec = busy_sec + ? WHERE worker_id = ?",
+                (now - lease["started_at"], lease["worker_id"]),
+            )
+            return True
+
+    def complete(self, lease: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        return self._finish(lease, "done", result, None)
+
+    def fail(self, lease: Dict[str, Any], error: str) -> bool:
+        """Mark a leased problem failed; it is re-queued while attempts remain."""
+        if lease["attempts"] < self.max_attempts:
+            with self._transaction() as conn:
+                cur = conn.execute(
+                    "UPDATE tasks SET status = 'queued', error = ?, lease_token = NULL, worker_id = NULL "
+                    "WHERE id = ? AND lease_token = ? AND status = 'leased'",
+                    (error, lease["id"], lease["token"]),
+                )
+                return cur.rowcount == 1
+        return self._finish(lease, "failed", None, error)
+
+    def results(self) -> Iterable[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT problem_id, status, attempts, worker_id, result, error FROM tasks "
+            "WHERE status IN ('done', 'failed') ORDER BY id"
+        )
+        for row in rows:
+            yield {
+                "problem_id": row["problem_id"],
+                "status": row["status"],
+                "attempts": row["attempts"],
+                "worker_id": row["worker_id"],
+                "result": json.loads(row["result"]) if row["result"] else None,
+                "error": row["error"],
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        now = time.time()
+        depth = {row["status"]: row["n"] for row in conn.execute(
+            "SELECT status, COUNT(*) AS n FROM tasks GROUP BY status"
+        )}
+        workers: List[Dict[str, Any]] = []
+        for row in conn.execute("SELECT * FROM workers ORDER BY worker_id"):
+            span = max(row["last_seen"] - row["first_seen"], 1e-9)
+            finished = row["completed"] + row["failed"]
+            workers.append({
+                "worker_id": row["worker_id"],
+                "host": row["host"],
+                "completed": row["completed"],
+                "failed": row["failed"],
+                "per_hour": round(row["completed"] * 3600.0 / span, 2) if row["completed"] else 0.0,
+                "avg_sec": round(row["busy_sec"] / finished, 2) if finished else None,
+                "idle_sec": round(now - row["last_seen"], 1),
+            })
+        return {
+            "queued": depth.get("queued", 0),
+            "leased": depth.get("leased", 0),
+            "done": depth.get("done", 0),
+            "failed": depth.get("failed", 0),
+            "workers": workers,
+        }
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, so concurrent leases never claim the same row."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+
+
+def enqueue_problem_files(queue: QueueBackend, paths: Iterable[str], max_rounds: Optional[int] = None) -> int:
+    """
+    Enqueue problem files by content so workers on other hosts do not need
+    the same paths. Returns the number of newly queued problems.
+    """
+    added = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        payload: Dict[str, Any] = {"problem_file": path, "text": text}
+        if max_rounds:
+            payload["max_rounds"] = max_rounds
+        if queue.enqueue(os.path.splitext(os.path.basename(path))[0], payload):
+            added += 1
+    return added
+
+
+def enqueue_problems(queue: QueueBackend, problems: Iterable[Any], max_rounds: Optional[int] = None) -> int:
+    """
+    Enqueue problems from a ProblemSource (see problem_sources.py) under
+    their ids. Returns the number of newly queued problems.
+    """
+    added = 0
+    for problem in problems:
+        payload = problem.payload()
+        if max_rounds:
+            payload["max_rounds"] = max_rounds
+        if queue.enqueue(problem.id, payload):
+            added += 1
+    return added
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _report_depth(queue: QueueBackend) -> None:
+    stats = queue.stats()
+    for status in ("queued", "leased", "done", "failed"):
+        QUEUE_DEPTH.set(stats.get(status, 0), status=status)
+
+
+def run_worker(
+    queue: QueueBackend,
+    agent_factory: Callable[[], Any],
+    worker_id: Optional[str] = None,
+    visibility_timeout: float = 600.0,
+    heartbeat_interval: Optional[float] = None,
+    poll_interval: float = 5.0,
+    max_tasks: Optional[int] = None,
+    exit_when_empty: bool = False,
+    stop_event: Optional[threading.Event] = None,
+) -> int:
+    """
+    Lease problems and run them with agents from agent_factory until stopped.
+    Returns the number of problems completed by this worker.
+    """
+    from .problem_io import problem_from_text
+
+    worker_id = worker_id or default_worker_id()
+    heartbeat_interval = heartbeat_interval or visibility_timeout / 3.0
+    stop_event = stop_event or threading.Event()
+    completed = 0
+
+    while not stop_event.is_set() and (max_tasks is None or completed < max_tasks):
+        lease = queue.lease(worker_id, visibility_timeout)
+        _report_depth(queue)
+        if lease is None:
+            if exit_when_empty:
+                break
+            stop_event.wait(poll_interval)
+            continue
+
+        lost = threading.Event()
+        finished = threading.Event()
+        # The agent working on this lease, once built
+        running: List[Any] = []
+
+        def _beat(lease: Dict[str, Any], lost: threading.Event, finished: threading.Event,
+                  running: List[Any]) -> None:
+            while not finished.wait(heartbeat_interval):
+                if not queue.heartbeat(lease, visibility_timeout):
+                    lost.set()
+                    # Another worker may already hold the problem: stop spending on it
+                    if running:
+                        running[0].cancel()
+                    return
+
+        beat = threading.Thread(target=_beat, args=(lease, lost, finished, running), daemon=True)
+        beat.start()
+        try:
+            payload = lease["payload"]
+            agent = agent_factory()
+            agent.problem_id = lease["problem_id"]
+            running.append(agent)
+            if lost.is_set():
+                agent.cancel()
+            context = agent.run(
+                initial_context=problem_from_text(payload["text"]),
+                max_rounds=payload.get("max_rounds", agent.agent_settings.get("max_rounds", 10)),
+            )
+            result = {
+                "problem_file": payload.get("problem_file"),
+                "status": agent.status,
+                "context": context,
+                "summary": dict(
+                    agent.summary.as_dict(),
+                    stall=agent.stall_detector.summary(),
+                    budget=agent.budget.summary() if agent.budget else None,
+                ),
+            }
+        except Exception as e:
+            finished.set()
+            queue.fail(lease, str(e))
+            QUEUE_TASKS.inc(result="failed")
+            continue
+        finally:
+            finished.set()
+
+        if not lost.is_set() and queue.complete(lease, result):
+            completed += 1
+            QUEUE_TASKS.inc(result="completed")
+        else:
+            QUEUE_TASKS.inc(result="lost")
+
+    return completed
@@ -1,7 +1,11 @@
 """Executors for different programming languages."""
 
-from .tools import PythonExecutor, MathematicaExecutor, BaseExecutor
-from .wolfram_manager import WolframContainerManager, get_wolfram_manager
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .tools import PythonExecutor, MathematicaExecutor, BaseExecutor
+    from .wolfram_manager import WolframContainerManager, get_wolfram_manager
 
 __all__ = [
     'PythonExecutor',
@@ -9,4 +13,26 @@ __all__ = [
     'BaseExecutor',
     'WolframContainerManager',
     'get_wolfram_manager'
-]
\ No newline at end of file
+]
+
+# Attributes resolved on first access (PEP 562) to keep `import tp_agent.executors` cheap
+_LAZY_ATTRS = {
+    'PythonExecutor': '.tools',
+    'MathematicaExecutor': '.tools',
+    'BaseExecutor': '.tools',
+    'WolframContainerManager': '.wolfram_manager',
+    'get_wolfram_manager': '.wolfram_manager',
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -0,0 +1,371 @@
+"""
+Memory admission control for sandboxed executions.
+
+RLIMIT_AS cannot bound python_exec: NumPy/OpenBLAS reserve far more
+address space than they touch, so any useful cap breaks them. Instead the
+controller bounds what the host actually pays for:
+
+- per execution: a watcher thread polls the resident set of the process
+  tree (/proc) and kills it once it exceeds `limit_bytes`. When a
+  delegated cgroup v2 directory is configured (`cgroup_parent`, with the
+  memory controller enabled in its cgroup.subtree_control) each execution
+  also gets its own child cgroup with memory.max, so the kernel enforces
+  the limit between polls;
+- across executions: every running execution counts as its observed RSS
+  (at least `reserve_bytes`) against `budget_bytes`. A new tool call waits
+  until its reservation fits under the budget and the host has that much
+  MemAvailable, and fails with an error result after `queue_timeout`.
+
+Without /proc (non-Linux) only the reservations are enforced.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from ..utils.metrics import get_metrics
+
+MiB = 1024 * 1024
+
+_metrics = get_metrics()
+ADMISSION_WAITING = _metrics.gauge("tp_admission_waiting", "Tool calls waiting for memory admission")
+ADMISSION_RUNNING = _metrics.gauge("tp_admission_running", "Executions admitted and running")
+ADMISSION_MEMORY = _metrics.gauge("tp_admission_memory_bytes", "Memory charged to running executions")
+ADMISSION_REJECTED = _metrics.counter(
+    "tp_admission_rejected_total", "Executions refused by reason (queue_timeout, memory_limit)", ("reason",)
+)
+
+
+def _read_kb(path: str, field: str) -> Optional[int]:
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _children(pid: int) -> List[int]:
+    kids: List[int] = []
+    task_dir = f"/proc/{pid}/task"
+    try:
+        tids = os.listdir(task_dir)
+    except OSError:
+        return kids
+    found_file = False
+    for tid in tids:
+        try:
+            with open(f"{task_dir}/{tid}/children", "r") as f:
+                kids.extend(int(k) for k in f.read().split())
+            found_file = True
+        except OSError:
+            continue
+    if found_file:
+        return kids
+    # Kernels without CONFIG_PROC_CHILDREN: scan for processes whose parent is pid
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; fields after it are fixed
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1 and int(fields[1]) == pid:
+            kids.append(int(entry))
+    return kids
+
+
+def tree_rss(pid: int) -> Optional[int]:
+    """Resident bytes of pid and its descendants, or None if /proc is unavailable."""
+    total = _read_kb(f"/proc/{pid}/status", "VmRSS:")
+    if total is None:
+        return None
+    stack = _children(pid)
+    seen = {pid}
+    while stack:
+        child = stack.pop()
+        if child in seen:
+            continue
+        seen.add(child)
+        total += _read_kb(f"/proc/{child}/status", "VmRSS:") or 0
+        stack.extend(_children(child))
+    return total
+
+
+def host_memory() -> Dict[str, Optional[int]]:
+    """MemTotal and MemAvailable of the host, and the memory limit of our own cgroup if any."""
+    limit = None
+    try:
+        with open("/proc/self/cgroup", "r") as f:
+            lines = f.read().splitlines()
+        for line in lines:
+            hierarchy, controllers, path = line.split(":", 2)
+            if hierarchy == "0":
+                candidate = f"/sys/fs/cgroup{path}/memory.max"
+            elif "memory" in controllers.split(","):
+                candidate = "/sys/fs/cgroup/memory/memory.limit_in_bytes"
+            else:
+                continue
+            try:
+                with open(candidate, "r") as f:
+                    value = f.read().strip()
+            except OSError:
+                continue
+            # "max" (v2) or a page-rounded 2**63 (v1) mean unlimited
+            if value.isdigit() and int(value) < 1 << 60:
+                limit = int(value) if limit is None else min(limit, int(value))
+    except OSError:
+        pass
+    return {
+        "total": _read_kb("/proc/meminfo", "MemTotal:"),
+        "available": _read_kb("/proc/meminfo", "MemAvailable:"),
+        "cgroup_limit": limit,
+    }
+
+
+class CgroupLimiter:
+    """Per-execution child cgroups with memory.max under a delegated cgroup v2 directory."""
+
+    def __init__(self, parent: str):
+        self.parent = parent
+
+    @classmethod
+    def create(cls, parent: Optional[str]) -> Optional["CgroupLimiter"]:
+        """A limiter for parent, or None if it is not a writable cgroup with the memory controller."""
+        if not parent:
+            return None
+        try:
+            with open(os.path.join(parent, "cgroup.subtree_control"), "r") as f:
+                if "memory" not in f.read().split():
+                    return None
+        except OSError:
+            return None
+        return cls(parent) if os.access(parent, os.W_OK) else None
+
+    def attach(self, pid: int, limit_bytes: int) -> Optional[str]:
+        path = os.path.join(self.parent, f"tp-exec-{uuid.uuid4().hex[:12]}")
+        try:
+            os.mkdir(path)
+            with open(os.path.join(path, "memory.max"), "w") as f:
+                f.write(str(limit_bytes))
+            with open(os.path.join(path, "memory.swap.max"), "w") as f:
+                f.write("0")
+        except OSError:
+            pass
+        try:
+            with open(os.path.join(path, "cgroup.procs"), "w") as f:
+                f.write(str(pid))
+        except OSError:
+            self.remove(path)
+            return None
+        return path
+
+    @staticmethod
+    def oom_killed(path: str) -> bool:
+        counts = {}
+        try:
+            with open(os.path.join(path, "memory.events"), "r") as f:
+                for line in f:
+                    key, _, value = line.partition(" ")
+                    counts[key] = int(value or 0)
+        except (OSError, ValueError):
+            return False
+        return counts.get("oom_kill", 0) > 0
+
+    @staticmethod
+    def remove(path: str) -> None:
+        try:
+            os.rmdir(path)
+        except OSError:
+            pass
+
+
+class Slot:
+    """One admitted execution; watches the process it is given."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.controller = controller
+        self.charged = controller.reserve_bytes
+        self.peak = 0
+        self.exceeded = False
+        self._proc: Optional[Any] = None
+        self._cgroup: Optional[str] = None
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, proc: Any) -> None:
+        """Start enforcing the per-execution limit on a running subprocess.Popen."""
+        self._proc = proc
+        controller = self.controller
+        if controller.cgroups is not None:
+            self._cgroup = controller.cgroups.attach(proc.pid, controller.limit_bytes)
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+
+    def _poll(self) -> None:
+        controller = self.controller
+        while not self._done.wait(controller.poll_interval):
+            if self._proc.poll() is not None:
+                return
+            rss = tree_rss(self._proc.pid)
+            if rss is None:
+                return
+            self.peak = max(self.peak, rss)
+            controller._charge(self, max(rss, controller.reserve_bytes))
+            if rss > controller.limit_bytes:
+                self.exceeded = True
+                ADMISSION_REJECTED.inc(reason="memory_limit")
+                try:
+                    self._proc.kill()
+                except OSError:
+                    pass
+                return
+
+    def limit_error(self) -> Optional[str]:
+        """Error text if the execution was killed for memory, else None."""
+        if not self.exceeded and self._cgroup and CgroupLimiter.oom_killed(self._cgroup):
+            self.exceeded = True
+            ADMISSION_REJECTED.inc(reason="memory_limit")
+        if not self.exceeded:
+            return None
+        return (
+            f"MemoryError: execution used {self.peak // MiB} MiB or more and was killed "
+            f"(limit {self.controller.limit_bytes // MiB} MiB per execution)"
+        )
+
+    def close(self) -> None:
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._cgroup is not None:
+            CgroupLimiter.remove(self._cgroup)
+        self.controller._release(self)
+
+
+class AdmissionError(RuntimeError):
+    pass
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        limit_bytes: int = 512 * MiB,
+        budget_bytes: Optional[int] = None,
+        reserve_bytes: int = 256 * MiB,
+        poll_interval: float = 0.2,
+        queue_timeout: float = 300.0,
+        cgroup_parent: Optional[str] = None,
+        budget_fraction: float = 0.7,
+    ):
+        self.limit_bytes = int(limit_bytes)
+        self.reserve_bytes = min(int(reserve_bytes), self.limit_bytes)
+        if budget_bytes is None:
+            memory = host_memory()
+            sizes = [s for s in (memory["total"], memory["cgroup_limit"]) if s]
+            budget_bytes = int(min(sizes) * budget_fraction) if sizes else None
+        # None: no aggregate budget (memory size unknown)
+        self.budget_bytes = budget_bytes
+        self.poll_interval = poll_interval
+        self.queue_timeout = queue_timeout
+        self.cgroups = CgroupLimiter.create(cgroup_parent)
+        self._cond = threading.Condition()
+        self._charges: Dict[int, int] = {}
+        self.waiting = 0
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "AdmissionController":
+        """Build from get_admission_settings() output."""
+        return cls(
+            limit_bytes=settings["limit_bytes"],
+            budget_bytes=settings["budget_bytes"],
+            reserve_bytes=settings["reserve_bytes"],
+            poll_interval=settings["poll_interval"],
+            queue_timeout=settings["queue_timeout"],
+            cgroup_parent=settings["cgroup_parent"],
+            budget_fraction=settings["budget_fraction"],
+        )
+
+    def in_use(self) -> int:
+        with self._cond:
+            return sum(self._charges.values())
+
+    def _fits(self) -> bool:
+        if not self._charges:
+            # Always let one execution run, however small the budget
+            return True
+        if self.budget_bytes is not None and sum(self._charges.values()) + self.reserve_bytes > self.budget_bytes:
+            return False
+        available = host_memory()["available"]
+        return available is None or available >= self.reserve_bytes
+
+    def acquire(self, timeout: Optional[float] = None) -> Slot:
+        """Wait for room for one more execution; raises AdmissionError after the queue timeout."""
+        timeout = self.queue_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.waiting += 1
+            ADMISSION_WAITING.set(self.waiting)
+            try:
+                while not self._fits():
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        ADMISSION_REJECTED.inc(reason="queue_timeout")
+                        raise AdmissionError(
+                            f"Host memory busy: {len(self._charges)} execution(s) using "
+                            f"{sum(self._charges.values()) // MiB} MiB of a {(self.budget_bytes or 0) // MiB} MiB "
+                            f"budget; waited {timeout:g} s for admission"
+                        )
+                    # Re-check periodically: MemAvailable changes without a release
+                    self._cond.wait(min(left, max(self.poll_interval, 0.05) * 5))
+                slot = Slot(self)
+                self._charges[id(slot)] = slot.charged
+                self._report()
+                return slot
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAITING.set(self.waiting)
+
+    def _charge(self, slot: Slot, amount: int) -> None:
+        with self._cond:
+            if id(slot) in self._charges:
+                self._charges[id(slot)] = amount
+                self._report()
+
+    def _release(self, slot: Slot) -> None:
+        with self._cond:
+            self._charges.pop(id(slot), None)
+            self._report()
+            self._cond.notify_all()
+
+    def _report(self) -> None:
+        ADMISSION_RUNNING.set(len(self._charges))
+        ADMISSION_MEMORY.set(sum(self._charges.values()))
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Process-wide controller built from the config service, shared by every
+    PythonExecutor that is not given one; None when admission is disabled.
+    """
+    global _controller
+    if _controller is None:
+        from ..utils.config import get_admission_settings, get_config_service
+
+        settings = get_admission_settings(get_config_service().config())
+        if not settings["enabled"]:
+            return None
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController.from_settings(settings)
+    return _controller
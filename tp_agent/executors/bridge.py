@@ -0,0 +1,168 @@
+"""
+Symbolic values shared between python_exec and mathematica_exec.
+
+Tool code exports a result under a name:
+
+    tp_export("E0", hbar*omega/2)          # python_exec (any SymPy expression)
+    TPExport["E0", hbar omega/2]           (* mathematica_exec *)
+
+and later code in either tool refers to E0 as if it had computed it. The
+value is kept in the run's SymbolSession in the exporting engine's own
+form (SymPy srepr or Wolfram InputForm). When code mentions a stored name,
+the session prepends one line that defines it, converted if it came from
+the other engine: SymPy's Mathematica printer in one direction and its
+Mathematica parser in the other. Conversions are cached process-wide by
+a hash of the expression text, so a value used in many calls, or the same
+value in many runs, is converted once. Names are letters and digits only,
+so they are valid identifiers in both languages.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+PYTHON = "python"
+WOLFRAM = "wolfram"
+
+EXPORT_MARKER = "\x1etp_export "
+NAME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9]*$")
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9_]*")
+
+# One line each, so tracebacks and messages are off by at most one line
+_PYTHON_EXPORT = (
+    "import sympy as _tp_sympy; "
+    "tp_export = lambda name, value: print({marker!r} + str(name) + ' ' "
+    "+ _tp_sympy.srepr(_tp_sympy.sympify(value)), flush=True) or value"
+).format(marker=EXPORT_MARKER)
+_WOLFRAM_EXPORT = (
+    'TPExport[name_String, value_] := (WriteString["stdout", FromCharacterCode[30] <> "tp_export " <> name '
+    '<> " " <> ToString[value, InputForm, PageWidth -> Infinity] <> "\\n"]; value);'
+)
+
+_CACHE_SIZE = 2048
+_conversions: "OrderedDict[str, str]" = OrderedDict()
+_conversions_lock = threading.Lock()
+
+
+def _cached(direction: str, text: str, convert: Any) -> str:
+    key = hashlib.sha256(f"{direction}\0{text}".encode("utf-8")).hexdigest()
+    with _conversions_lock:
+        if key in _conversions:
+            _conversions.move_to_end(key)
+            return _conversions[key]
+    converted = convert(text)
+    with _conversions_lock:
+        _conversions[key] = converted
+        while len(_conversions) > _CACHE_SIZE:
+            _conversions.popitem(last=False)
+    return converted
+
+
+def _sympy_to_wolfram(text: str) -> str:
+    import sympy
+    from sympy.printing.mathematica import mathematica_code
+
+    return mathematica_code(sympy.sympify(text))
+
+
+def _wolfram_to_sympy(text: str) -> str:
+    import sympy
+    from sympy.parsing.mathematica import parse_mathematica
+
+    return sympy.srepr(parse_mathematica(text))
+
+
+def convert(text: str, source: str, target: str) -> str:
+    """Expression text from one engine's form to the other's (cached by expression hash)."""
+    if source == target:
+        return text
+    if target == WOLFRAM:
+        return _cached("py>wl", text, _sympy_to_wolfram)
+    return _cached("wl>py", text, _wolfram_to_sympy)
+
+
+class SymbolSession:
+    """Named values exported by the tool calls of one run."""
+
+    def __init__(self, max_values: int = 64, max_chars: int = 20000):
+        self.max_values = max_values
+        self.max_chars = max_chars
+        # name -> (engine it came from, expression text in that engine's form)
+        self.values: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "SymbolSession":
+        """Build from get_bridge_settings() output."""
+        return cls(max_values=settings["max_values"], max_chars=settings["max_chars"])
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self.values)
+
+    def prepare(self, language: str, code: str) -> Tuple[str, List[str]]:
+        """
+        code with a first line defining the stored names it mentions (and the
+        export helper if it uses it), plus conversion errors to report.
+        """
+        with self._lock:
+            used = [(name, self.values[name]) for name in dict.fromkeys(_WORD_RE.findall(code)) if name in self.values]
+        helper = "tp_export" if language == PYTHON else "TPExport"
+        prelude, errors = [], []
+        if helper in code:
+            prelude.append(_PYTHON_EXPORT if language == PYTHON else _WOLFRAM_EXPORT)
+        for name, (source, text) in used:
+            try:
+                value = convert(text, source, language)
+            except Exception as e:
+                errors.append(f"{name} could not be converted from {source}: {type(e).__name__}: {e}")
+                continue
+            if language == PYTHON:
+                prelude.append(f"import sympy as _tp_sympy; {name} = _tp_sympy.sympify({value!r})")
+            else:
+                prelude.append(f"{name} = {value};")
+        if not prelude:
+            return code, errors
+        # Wolfram parts end in ";" already, and ";;" would be Span
+        separator = "; " if language == PYTHON else " "
+        return separator.join(prelude) + "\n" + code, errors
+
+    def collect(self, language: str, result: Dict[str, Any], errors: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Take the exported values out of a tool result's output and store them."""
+        out = result.get("out") or ""
+        errors = list(errors or [])
+        exported = []
+        if EXPORT_MARKER in out:
+            kept = []
+            for line in out.split("\n"):
+                if not line.startswith(EXPORT_MARKER):
+                    kept.append(line)
+                    continue
+                name, _, text = line[len(EXPORT_MARKER):].partition(" ")
+                error = self._store(language, name, text.strip())
+                if error:
+                    errors.append(error)
+                else:
+                    exported.append(name)
+            result = dict(result, out="\n".join(kept))
+        if exported:
+            result["exported"] = exported
+        if errors:
+            notes = "\n".join(errors)
+            result = dict(result, err=f"{result['err']}\n{notes}" if result.get("err") else notes)
+        return result
+
+    def _store(self, language: str, name: str, text: str) -> Optional[str]:
+        if not NAME_RE.match(name):
+            return f"cannot export {name!r}: names are letters and digits only, starting with a letter"
+        if not text:
+            return f"cannot export {name}: empty value"
+        if len(text) > self.max_chars:
+            return f"cannot export {name}: {len(text)} characters (limit {self.max_chars})"
+        with self._lock:
+            if name not in self.values and len(self.values) >= self.max_values:
+                return f"cannot export {name}: {self.max_values} values already exported in this run"
+            self.values[name] = (language, text)
+        return None
@@ -0,0 +1,180 @@
+"""
+Background jobs for long-running tool calls.
+
+A tool call with "background": true is submitted to the agent's JobManager
+and answered at once with a job id. The job runs the same executor on a
+worker thread under its own deadline (not the 60 s foreground limit) and
+its own CancelScope, so cancelling it kills the tool process. The model
+follows up with the job verbs:
+
+    {"tool": "job_status", "job": "job-1"}              # one job, or all without "job"
+    {"tool": "job_wait", "job": "job-1", "timeout": 30}  # block up to max_wait seconds
+    {"tool": "job_cancel", "job": "job-1"}
+
+and the host adds the result of every job that finishes unasked to the
+context before the next LLM call (see TPAgent._report_jobs).
+"""
+
+import itertools
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ..utils.cancel import CancelScope
+from ..utils.metrics import get_metrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import ThreadPoolExecutor
+
+JOB_VERBS = ("job_status", "job_wait", "job_cancel")
+
+_metrics = get_metrics()
+JOBS_RUNNING = _metrics.gauge("tp_jobs_running", "Background tool jobs submitted and not finished")
+JOBS = _metrics.counter("tp_jobs_total", "Finished background tool jobs by status", ("status",))
+
+
+class JobError(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, job_id: str, tool: str, code: str, deadline: int):
+        self.id = job_id
+        self.tool = tool
+        self.code = code
+        self.deadline = deadline
+        # "running", then "done", "failed" or "cancelled"
+        self.status = "running"
+        self.result: Optional[Dict[str, Any]] = None
+        self.submitted = time.monotonic()
+        self.elapsed: Optional[float] = None
+        # Set once the model has seen the final result
+        self.reported = False
+        self.scope = CancelScope()
+        self.finished = threading.Event()
+
+    def message(self, verb: Optional[str] = None) -> Dict[str, Any]:
+        """Tool message describing the job; carries out/err once it has finished."""
+        elapsed = self.elapsed if self.elapsed is not None else time.monotonic() - self.submitted
+        msg: Dict[str, Any] = {
+            "role": "tool",
+            "tool": verb or self.tool,
+            "job": self.id,
+            "job_tool": self.tool,
+            "status": self.status,
+            "ok": self.status in ("running", "done"),
+            "elapsed_sec": round(elapsed, 3),
+        }
+        if self.status == "running":
+            msg["deadline"] = self.deadline
+        elif self.result is not None:
+            msg["out"] = self.result.get("out", "")
+            msg["err"] = self.result.get("err", "")
+        return msg
+
+
+class JobManager:
+    def __init__(self, max_jobs: int = 4, default_deadline: int = 600, max_deadline: int = 3600, max_wait: int = 60):
+        self.max_jobs = max(1, int(max_jobs))
+        self.default_deadline = default_deadline
+        self.max_deadline = max_deadline
+        self.max_wait = max_wait
+        self._jobs: Dict[str, Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pool: Optional["ThreadPoolExecutor"] = None
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "JobManager":
+        """Build from get_jobs_settings() output."""
+        return cls(
+            max_jobs=settings["max_jobs"],
+            default_deadline=settings["default_deadline"],
+            max_deadline=settings["max_deadline"],
+            max_wait=settings["max_wait"],
+        )
+
+    def running(self) -> List[Job]:
+        with self._lock:
+            return [job for job in self._jobs.values() if job.status == "running"]
+
+    def submit(self, executor: Any, tool: str, code: str, deadline: Optional[int] = None, **options: Any) -> Job:
+        """Start code on executor in the background; raises JobError when max_jobs are running."""
+        deadline = int(min(deadline or self.default_deadline, self.max_deadline))
+        with self._lock:
+            if sum(1 for job in self._jobs.values() if job.status == "running") >= self.max_jobs:
+                raise JobError(f"{self.max_jobs} background jobs already running; wait for or cancel one first")
+            job = Job(f"job-{next(self._ids)}", tool, code, deadline)
+            self._jobs[job.id] = job
+            if self._pool is None:
+                # Imported here: most runs never start a job
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="tp-job")
+        JOBS_RUNNING.inc()
+        self._pool.submit(self._run, job, executor, options)
+        return job
+
+    def _run(self, job: Job, executor: Any, options: Dict[str, Any]) -> None:
+        previous = job.scope.activate()
+        try:
+            result = executor.execute(job.code, job.deadline, **options)
+        except Exception as e:
+            result = {"role": "tool", "tool": job.tool, "ok": False, "out": "", "err": f"{type(e).__name__}: {e}"}
+        finally:
+            CancelScope.deactivate(previous)
+        self._finish(job, "done" if result.get("ok") else "failed", result)
+
+    def _finish(self, job: Job, status: str, result: Optional[Dict[str, Any]]) -> None:
+        with self._lock:
+            if job.status != "running":
+                return
+            job.status = status
+            job.result = result
+            job.elapsed = time.monotonic() - job.submitted
+        job.finished.set()
+        JOBS_RUNNING.dec()
+        JOBS.inc(status=status)
+
+    def get(self, job_id: Any) -> Job:
+        with self._lock:
+            job = self._jobs.get(str(job_id))
+        if job is None:
+            raise JobError(f"Unknown job {job_id!r}")
+        return job
+
+    def wait(self, job_id: Any, timeout: Optional[float] = None) -> Job:
+        """Block until the job finishes or up to min(timeout, max_wait) seconds."""
+        job = self.get(job_id)
+        job.finished.wait(min(timeout or self.max_wait, self.max_wait))
+        return job
+
+    def cancel(self, job_id: Any) -> Job:
+        job = self.get(job_id)
+        job.scope.cancel()
+        self._finish(job, "cancelled", {"out": "", "err": "Cancelled"})
+        return job
+
+    def cancel_all(self) -> None:
+        for job in self.running():
+            self.cancel(job.id)
+
+    def report(self, job: Job) -> bool:
+        """Mark a finished job's result as seen by the model; True the first time."""
+        with self._lock:
+            if job.status == "running" or job.reported:
+                return False
+            job.reported = True
+            return True
+
+    def updates(self) -> List[Job]:
+        """Finished jobs whose result the model has not seen yet (marked as seen)."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if self.report(job)]
+
+    def close(self) -> None:
+        self.cancel_all()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,128 @@
+"""
+Warm Python kernels for python_exec.
+
+A kernel is a pre-spawned interpreter that has already imported the heavy
+scientific stack (numpy, sympy, scipy) and is blocked reading code from
+stdin. Each kernel runs exactly one snippet and then exits, so executions
+stay isolated from each other while skipping interpreter start-up and
+import cost.
+"""
+
+import collections
+import os
+import subprocess
+import sys
+import threading
+from typing import Deque, Dict, Iterable, Optional
+
+from ..utils.metrics import get_metrics
+
+
+DEFAULT_PRELOAD = ("numpy", "scipy", "sympy")
+
+_metrics = get_metrics()
+POOL_ACQUIRES = _metrics.counter(
+    "tp_kernel_pool_acquires_total", "Kernel acquisitions by result (hit: warm kernel, miss: cold spawn)", ("result",)
+)
+POOL_IDLE = _metrics.gauge("tp_kernel_pool_idle", "Warm kernels waiting in the pool")
+
+_BOOTSTRAP = r"""
+import sys
+for _name in sys.argv[1:]:
+    try:
+        __import__(_name)
+    except Exception:
+        pass
+_src = sys.stdin.read()
+sys.argv = ["<python_exec>"]
+import traceback as _traceback
+_globals = {"__name__": "__main__", "__builtins__": __builtins__}
+try:
+    exec(compile(_src, "<python_exec>", "exec"), _globals)
+except SystemExit:
+    raise
+except BaseException:
+    _etype, _evalue, _tb = sys.exc_info()
+    _traceback.print_exception(_etype, _evalue, _tb.tb_next)
+    sys.exit(1)
+"""
+
+
+class KernelPool:
+    """Keeps `size` idle interpreters ready to receive a code snippet."""
+
+    def __init__(self, size: int = 2, preload: Optional[Iterable[str]] = None, env: Optional[Dict[str, str]] = None):
+        self.size = max(0, int(size))
+        self.preload = list(DEFAULT_PRELOAD if preload is None else preload)
+        # Extra environment for the kernels, e.g. BLAS thread counts (see placement.py);
+        # it must be set at spawn since the preloaded libraries read it on import
+        self.env = dict(os.environ, **env) if env else None
+        self._idle: Deque[subprocess.Popen] = collections.deque()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [sys.executable, "-c", _BOOTSTRAP, *self.preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            env=self.env,
+        )
+
+    def start(self) -> "KernelPool":
+        """Fill the pool up to its configured size."""
+        with self._lock:
+            while not self._closed and len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+            POOL_IDLE.set(len(self._idle))
+        return self
+
+    def acquire(self) -> subprocess.Popen:
+        """
+        Take a warm kernel (or a cold one if none is idle) and spawn a
+        replacement so the pool stays full.
+        """
+        proc = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.popleft()
+                if candidate.poll() is None:
+                    proc = candidate
+                    break
+            if proc is not None:
+                self.hits += 1
+                POOL_ACQUIRES.inc(result="hit")
+            else:
+                self.misses += 1
+                POOL_ACQUIRES.inc(result="miss")
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+            POOL_IDLE.set(len(self._idle))
+        return proc if proc is not None else self._spawn()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def close(self) -> None:
+        """Kill all idle kernels."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), collections.deque()
+            POOL_IDLE.set(0)
+        for proc in idle:
+            try:
+                proc.kill()
+                proc.communicate()
+            except Exception:
+                pass
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
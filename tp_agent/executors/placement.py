@@ -0,0 +1,144 @@
+"""
+CPU placement for sandboxed executions.
+
+Every python_exec process gets a CPU set (sched_setaffinity on each of its
+threads) and BLAS/OpenMP thread counts that match it, so concurrent agents
+do not each start one BLAS thread per core. A call runs on `default_cores`
+CPUs; a tool call may ask for more ("cores": N) and is granted up to N of
+the CPUs that are idle at that moment, never fewer than the default. When
+every CPU is busy, new executions share the least-loaded ones rather than
+wait. `wolfram_cores` CPUs are kept out of the pool for the Wolfram
+container (applied with docker --cpuset-cpus).
+
+Warm kernels are spawned with the default thread counts, so calls granted
+more than the default run in a fresh interpreter.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from ..utils.metrics import get_metrics
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+                   "VECLIB_MAXIMUM_THREADS")
+
+CPUS_BUSY = get_metrics().gauge("tp_placement_cpu_executions", "Executions placed on each CPU", ("cpu",))
+
+
+def thread_env(threads: int) -> Dict[str, str]:
+    """Environment variables pinning BLAS/OpenMP pools to `threads` threads."""
+    return {name: str(max(1, threads)) for name in THREAD_ENV_VARS}
+
+
+def set_affinity(pid: int, cpus: Iterable[int]) -> bool:
+    """Pin every existing thread of pid (and so the threads it starts later) to cpus."""
+    cpus = set(cpus)
+    try:
+        tids = [int(t) for t in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        tids = [pid]
+    ok = False
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, cpus)
+            ok = True
+        except OSError:
+            continue
+    return ok
+
+
+class Allocation:
+    def __init__(self, placer: "CpuPlacer", cpus: List[int], requested: Optional[int]):
+        self.placer = placer
+        self.cpus = cpus
+        self.requested = requested
+
+    @property
+    def cores(self) -> int:
+        return len(self.cpus)
+
+    def env(self) -> Dict[str, str]:
+        return thread_env(self.cores)
+
+    def apply(self, pid: int) -> bool:
+        return set_affinity(pid, self.cpus)
+
+    def release(self) -> None:
+        self.placer._release(self)
+
+
+class CpuPlacer:
+    def __init__(
+        self,
+        cpus: Optional[Iterable[int]] = None,
+        default_cores: int = 1,
+        max_cores: Optional[int] = None,
+        wolfram_cores: int = 0,
+    ):
+        available = sorted(cpus if cpus is not None else os.sched_getaffinity(0))
+        # The last CPUs go to the Wolfram container, if any remain for Python
+        wolfram_cores = max(0, min(wolfram_cores, len(available) - 1))
+        self.wolfram_cpus = available[len(available) - wolfram_cores:] if wolfram_cores else []
+        self.cpus = available[:len(available) - wolfram_cores]
+        self.default_cores = max(1, min(default_cores, len(self.cpus)))
+        self.max_cores = max(self.default_cores, min(max_cores or len(self.cpus), len(self.cpus)))
+        self._load: Dict[int, int] = {cpu: 0 for cpu in self.cpus}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "CpuPlacer":
+        """Build from get_placement_settings() output."""
+        return cls(
+            cpus=settings["cpus"],
+            default_cores=settings["default_cores"],
+            max_cores=settings["max_cores"],
+            wolfram_cores=settings["wolfram_cores"],
+        )
+
+    def allocate(self, cores: Optional[int] = None) -> Allocation:
+        """CPUs for one execution: `cores` if that many are idle, else at least the default."""
+        wanted = self.default_cores if cores is None else max(1, min(int(cores), self.max_cores))
+        with self._lock:
+            ranked = sorted(self.cpus, key=lambda c: (self._load[c], c))
+            idle = sum(1 for c in ranked if self._load[c] == 0)
+            granted = wanted if wanted <= self.default_cores else max(self.default_cores, min(wanted, idle))
+            chosen = ranked[:granted]
+            for cpu in chosen:
+                self._load[cpu] += 1
+                CPUS_BUSY.set(self._load[cpu], cpu=cpu)
+        return Allocation(self, chosen, cores)
+
+    def _release(self, allocation: Allocation) -> None:
+        with self._lock:
+            for cpu in allocation.cpus:
+                self._load[cpu] = max(0, self._load[cpu] - 1)
+                CPUS_BUSY.set(self._load[cpu], cpu=cpu)
+            allocation.cpus = []
+
+    def load(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._load)
+
+
+_placer: Optional[CpuPlacer] = None
+_placer_lock = threading.Lock()
+
+
+def get_cpu_placer() -> Optional[CpuPlacer]:
+    """
+    Process-wide placer built from the config service, shared by every
+    PythonExecutor that is not given one; None when placement is disabled
+    or the platform has no sched_setaffinity.
+    """
+    global _placer
+    if _placer is None:
+        from ..utils.config import get_config_service, get_placement_settings
+
+        settings = get_placement_settings(get_config_service().config())
+        if not settings["enabled"] or not hasattr(os, "sched_setaffinity"):
+            return None
+        with _placer_lock:
+            if _placer is None:
+                _placer = CpuPlacer.from_settings(settings)
+    return _placer
@@ -0,0 +1,149 @@
+"""
+Opt-in profiling of python_exec code ("profile": true on a tool call).
+
+The code runs under cProfile inside the sandboxed interpreter. A timer
+interrupts it shortly before the tool timeout, so slow code, which is the
+case that needs a profile, still writes its stats before the executor
+would kill it. The full stats are kept as a .prof artifact (pstats /
+snakeviz format). The tool result gets wall and CPU time plus a top-N
+table of functions by cumulative time, so the model can see that, say,
+sympy.simplify took most of the budget.
+"""
+
+import json
+import os
+import pstats
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+_DRIVER = r"""
+import cProfile as _cProfile
+import json as _json
+import signal as _signal
+import sys as _sys
+import time as _time
+import traceback as _traceback
+
+
+class _ProfileTimeout(BaseException):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _ProfileTimeout()
+
+
+_profiler = _cProfile.Profile()
+_timed_out = False
+_error = None
+_code = compile(_SOURCE, "<python_exec>", "exec")
+_ns = {"__name__": "__main__", "__builtins__": __builtins__}
+if hasattr(_signal, "setitimer"):
+    _signal.signal(_signal.SIGALRM, _on_alarm)
+    _signal.setitimer(_signal.ITIMER_REAL, _TIME_LIMIT)
+_wall, _cpu = _time.perf_counter(), _time.process_time()
+try:
+    _profiler.enable()
+    try:
+        exec(_code, _ns)
+    finally:
+        _profiler.disable()
+except _ProfileTimeout:
+    _timed_out = True
+except SystemExit:
+    raise
+except BaseException:
+    # Reported below without the wrapper's own frame
+    _etype, _evalue, _tb = _sys.exc_info()
+    _error = (_etype, _evalue, _tb.tb_next)
+finally:
+    if hasattr(_signal, "setitimer"):
+        _signal.setitimer(_signal.ITIMER_REAL, 0)
+    _wall, _cpu = _time.perf_counter() - _wall, _time.process_time() - _cpu
+    _sys.stdout.flush()
+    _profiler.dump_stats(_STATS_PATH)
+    with open(_STATS_PATH + ".json", "w") as _f:
+        _json.dump({"wall_sec": _wall, "cpu_sec": _cpu, "timed_out": _timed_out}, _f)
+if _error is not None:
+    _traceback.print_exception(*_error)
+    _sys.exit(1)
+if _timed_out:
+    _sys.exit(f"Timeout after {_TIMEOUT} seconds (profiled; see the profile hotspots)")
+"""
+
+
+def profiled_source(code: str, stats_path: str, timeout: int) -> str:
+    """Wrap code so it runs under cProfile and dumps stats to stats_path before `timeout`."""
+    # Leave time to write the stats before the executor's hard timeout
+    time_limit = max(timeout - 1.0, timeout * 0.8)
+    return (
+        f"_SOURCE = {code!r}\n_STATS_PATH = {stats_path!r}\n_TIME_LIMIT = {time_limit!r}\n_TIMEOUT = {timeout!r}\n"
+        + _DRIVER
+    )
+
+
+def _short_path(path: str) -> str:
+    marker = "site-packages" + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1]
+    return os.sep.join(path.split(os.sep)[-2:])
+
+
+def hotspots(stats_path: str, top: int = 15) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Top-N table by cumulative time and the timing summary, or None if no stats were written."""
+    try:
+        with open(stats_path + ".json", "r") as f:
+            summary = json.load(f)
+        stats = pstats.Stats(stats_path)
+    except (OSError, ValueError, TypeError, EOFError):
+        return None
+    total = max(summary["wall_sec"], 1e-9)
+    rows = []
+    for (path, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        # The frames of the wrapper itself: exec() and the top level of the tool code
+        if name in ("<built-in method builtins.exec>", "<method 'disable' of '_lsprof.Profiler' objects>"):
+            continue
+        if path.startswith("<frozen importlib") or name in ("<module>", "<built-in method builtins.__import__>"):
+            # Import machinery folds into one row: cProfile counts recursive time once
+            if name == "_find_and_load":
+                rows.append((cumtime, 0.0, ncalls, "(imports)"))
+            continue
+        where = name if path == "~" else f"{_short_path(path)}:{line}({name})"
+        rows.append((cumtime, tottime, ncalls, where))
+    rows.sort(reverse=True)
+    lines = ["  cum%   cum_s  self_s    calls  function"]
+    for cumtime, tottime, ncalls, where in rows[:top]:
+        lines.append(f"{100 * cumtime / total:6.1f} {cumtime:7.3f} {tottime:7.3f} {ncalls:8d}  {where}")
+    summary = {key: round(value, 3) if isinstance(value, float) else value for key, value in summary.items()}
+    return "\n".join(lines), summary
+
+
+class Profiling:
+    """Where profiles go and how much of them the model sees."""
+
+    def __init__(self, store_dir: str = os.path.join("outputs", "profiles"), top: int = 15):
+        self.store_dir = store_dir
+        self.top = top
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "Profiling":
+        """Build from get_profile_settings() output."""
+        return cls(store_dir=settings["dir"], top=settings["top"])
+
+    def prepare(self, code: str, timeout: int) -> Tuple[str, str]:
+        """The wrapped source and the path its stats will be written to."""
+        os.makedirs(self.store_dir, exist_ok=True)
+        stats_path = os.path.abspath(os.path.join(self.store_dir, f"{uuid.uuid4().hex[:12]}.prof"))
+        return profiled_source(code, stats_path, timeout), stats_path
+
+    def report(self, stats_path: str) -> Dict[str, Any]:
+        """The "profile" entry of the tool result."""
+        found = hotspots(stats_path, self.top)
+        if found is None:
+            return {"error": "no profile: the process was killed before it could write one (stuck in native code?)"}
+        table, summary = found
+        try:
+            os.unlink(stats_path + ".json")
+        except OSError:
+            pass
+        return dict(summary, hotspots=table, artifact=stats_path)
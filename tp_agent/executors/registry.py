@@ -0,0 +1,63 @@
+"""Tool registry that constructs executors on first use."""
+
+import threading
+from typing import Any, Callable, Dict, Iterator, MutableMapping, Optional
+
+
+class ToolRegistry(MutableMapping):
+    """
+    Mapping of tool name -> executor. Tools registered with a factory are
+    only instantiated when first looked up, so agents that never call
+    mathematica_exec never touch the Wolfram manager. Membership checks
+    and iteration do not construct anything. Construction is locked, so
+    threads looking up the same tool at once (consensus trajectories,
+    background jobs) share one executor.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable[[], Any]]] = None):
+        self._factories: Dict[str, Callable[[], Any]] = dict(factories or {})
+        self._instances: Dict[str, Any] = {}
+        # Reentrant: a factory may look up another tool
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def __getitem__(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(name)
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def __setitem__(self, name: str, executor: Any) -> None:
+        with self._lock:
+            self._factories[name] = lambda: executor
+            self._instances[name] = executor
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            del self._factories[name]
+            self._instances.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._factories
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def __repr__(self) -> str:
+        loaded = ", ".join(f"{n}{'' if n in self._instances else ' (lazy)'}" for n in self._factories)
+        return f"ToolRegistry({loaded})"
@@ -0,0 +1,299 @@
+"""
+Parallel parameter sweeps (the python_sweep tool).
+
+The model sends code defining `kernel(**params)` and a grid:
+
+    {"tool": "python_sweep", "code": "def kernel(g, B): ...",
+     "grid": {"g": [0.1, 0.2], "B": [0, 1, 2]}}
+
+"grid" is either a mapping of parameter name to values (the Cartesian
+product is swept) or an explicit list of parameter dicts. The points are
+split into chunks; each chunk runs as one python_exec snippet (so warm
+kernels, admission control, CPU placement and cancellation all apply) on
+up to `workers` chunks at a time. A failing point records its exception
+and the sweep goes on.
+
+Results are appended to a per-kernel JSONL file under `dir` as each chunk
+returns, so a sweep that times out or is cancelled resumes where it
+stopped: calling again with the same code skips every point that already
+succeeded. The reply is a tab-separated table; past `table_rows` rows it
+shows the head and tail and writes the full table next to the results.
+"""
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.cancel import current_scope
+from ..utils.metrics import get_metrics
+from .tools import BaseExecutor, PythonExecutor
+
+SWEEP_POINTS = get_metrics().counter(
+    "tp_sweep_points_total", "Sweep points by outcome (ok, error, cached)", ("outcome",)
+)
+
+_MARKER = "\x1esweep "
+
+_DRIVER = r"""
+import contextlib as _contextlib
+import io as _io
+import json as _json
+import sys as _sys
+
+_ns = {"__name__": "__sweep__"}
+exec(compile(_KERNEL, "<python_sweep>", "exec"), _ns)
+if not callable(_ns.get("kernel")):
+    _sys.exit("python_sweep: code must define kernel(**params)")
+
+
+def _plain(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, complex):
+        return [value.real, value.imag]
+    return str(value)
+
+
+for _i, _point in _json.loads(_POINTS):
+    try:
+        # Prints inside the kernel would interleave with the result lines
+        with _contextlib.redirect_stdout(_io.StringIO()):
+            _value = _ns["kernel"](**_point)
+        _line = _json.dumps({"i": _i, "ok": True, "value": _value}, default=_plain)
+    except Exception as _e:
+        _line = _json.dumps({"i": _i, "ok": False, "err": f"{type(_e).__name__}: {_e}"})
+    _sys.stdout.write(_MARKER + _line + "\n")
+    _sys.stdout.flush()
+"""
+
+
+_pythons: Dict[int, PythonExecutor] = {}
+_pythons_lock = threading.Lock()
+
+
+def get_sweep_python(workers: int) -> PythonExecutor:
+    """
+    Process-wide PythonExecutor with `workers` warm single-threaded kernels,
+    shared by every SweepExecutor that is not given one (so agents built per
+    run do not each start, and leak, a pool of their own).
+    """
+    with _pythons_lock:
+        if workers not in _pythons:
+            from .kernel_pool import KernelPool
+            from .placement import thread_env
+
+            _pythons[workers] = PythonExecutor(kernel_pool=KernelPool(size=workers, env=thread_env(1)).start())
+        return _pythons[workers]
+
+
+def expand_grid(grid: Any) -> List[Dict[str, Any]]:
+    """Points of a grid given as {name: values} (Cartesian product) or a list of dicts."""
+    if isinstance(grid, dict):
+        names = list(grid)
+        axes = [v if isinstance(v, list) else [v] for v in grid.values()]
+        return [dict(zip(names, values)) for values in itertools.product(*axes)]
+    if isinstance(grid, list) and all(isinstance(p, dict) for p in grid):
+        return [dict(p) for p in grid]
+    raise ValueError("grid must be {name: [values]} or a list of {name: value} points")
+
+
+def _point_key(point: Dict[str, Any]) -> str:
+    return json.dumps(point, sort_keys=True, separators=(",", ":"))
+
+
+def _cell(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":")) if not isinstance(value, str) else value
+
+
+class SweepExecutor(BaseExecutor):
+    tool_name = "python_sweep"
+
+    def __init__(
+        self,
+        python_executor: Optional[PythonExecutor] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        max_points: int = 10000,
+        table_rows: int = 40,
+        store_dir: str = os.path.join("outputs", "sweeps"),
+    ):
+        if workers is None:
+            workers = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+        self.workers = max(1, int(workers))
+        # Warm kernels, one per worker, so chunks skip interpreter start-up
+        self.python = python_executor if python_executor is not None else get_sweep_python(self.workers)
+        self.chunk_size = chunk_size
+        self.max_points = max_points
+        self.table_rows = table_rows
+        self.store_dir = store_dir
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any], python_executor: Optional[PythonExecutor] = None) -> "SweepExecutor":
+        """Build from get_sweep_settings() output."""
+        return cls(
+            python_executor=python_executor,
+            workers=settings["workers"],
+            chunk_size=settings["chunk_size"],
+            max_points=settings["max_points"],
+            table_rows=settings["table_rows"],
+            store_dir=settings["dir"],
+        )
+
+    @staticmethod
+    def _result(ok: bool, out: str, err: str, **extra: Any) -> Dict[str, Any]:
+        return dict({"role": "tool", "tool": "python_sweep", "ok": ok, "out": out, "err": err}, **extra)
+
+    def _load(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """Successful points of earlier runs of the same kernel, by point key."""
+        done: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of an interrupted run
+                    if record.get("ok"):
+                        done[_point_key(record["point"])] = record
+        except OSError:
+            pass
+        return done
+
+    def _run_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]], code: str, timeout: int, scope: Any,
+                   options: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+        """Run one chunk in a kernel; returns the per-point lines and the chunk's error text."""
+        previous = scope.activate() if scope is not None else None
+        try:
+            driver = f"_MARKER = {_MARKER!r}\n_KERNEL = {code!r}\n_POINTS = {json.dumps(json.dumps(chunk))}\n" + _DRIVER
+            result = self.python.execute(driver, timeout, **options)
+        finally:
+            if scope is not None:
+                scope.deactivate(previous)
+        lines = []
+        # Not splitlines(): it also splits on the \x1e of the marker
+        for line in result.get("out", "").split("\n"):
+            if line.startswith(_MARKER):
+                try:
+                    lines.append(json.loads(line[len(_MARKER):]))
+                except ValueError:
+                    continue
+        return lines, "" if result.get("ok") else (result.get("err") or "chunk failed").strip()
+
+    def _execute(self, code: str, timeout: int, grid: Any = None, **options: Any) -> Dict[str, Any]:
+        try:
+            points = expand_grid(grid)
+        except ValueError as e:
+            return self._result(False, "", str(e))
+        if not points:
+            return self._result(False, "", "grid is empty")
+        if len(points) > self.max_points:
+            return self._result(False, "", f"grid has {len(points)} points; at most {self.max_points} per sweep")
+
+        kernel_id = hashlib.sha256(code.encode("utf-8")).hexdigest()[:16]
+        os.makedirs(self.store_dir, exist_ok=True)
+        results_path = os.path.join(self.store_dir, f"{kernel_id}.jsonl")
+        previous = self._load(results_path)
+        records: List[Optional[Dict[str, Any]]] = [previous.get(_point_key(p)) for p in points]
+        cached = sum(1 for r in records if r is not None)
+        SWEEP_POINTS.inc(cached, outcome="cached")
+        todo = [(i, p) for i, p in enumerate(points) if records[i] is None]
+
+        deadline = time.monotonic() + timeout
+        if todo:
+            size = self.chunk_size or max(1, min(256, math.ceil(len(todo) / (self.workers * 4))))
+            chunks = [todo[i:i + size] for i in range(0, len(todo), size)]
+            scope = current_scope()
+            # Only forwarded when asked for, as in the host; per-chunk profiles would go unseen
+            options = {k: v for k, v in options.items() if v and k != "profile"}
+            pool = ThreadPoolExecutor(max_workers=min(self.workers, len(chunks)), thread_name_prefix="tp-sweep")
+            remaining = iter(chunks)
+            pending: Dict[Any, List[Tuple[int, Dict[str, Any]]]] = {}
+
+            def submit() -> bool:
+                chunk = next(remaining, None)
+                left = math.ceil(deadline - time.monotonic())
+                if chunk is None or left < 1 or (scope is not None and scope.cancelled):
+                    return False
+                pending[pool.submit(self._run_chunk, chunk, code, left, scope, options)] = chunk
+                return True
+
+            try:
+                for _ in range(min(self.workers, len(chunks))):
+                    submit()
+                with open(results_path, "a", encoding="utf-8") as log:
+                    while pending:
+                        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                        for future in done:
+                            chunk = pending.pop(future)
+                            lines, chunk_err = future.result()
+                            by_index = {line["i"]: line for line in lines if "i" in line}
+                            for i, point in chunk:
+                                line = by_index.get(i) or {"ok": False, "err": chunk_err or "no result"}
+                                record = {"point": point, "ok": line["ok"]}
+                                record.update({"value": line["value"]} if line["ok"] else {"err": line["err"]})
+                                records[i] = record
+                                SWEEP_POINTS.inc(outcome="ok" if line["ok"] else "error")
+                                # Written as they arrive: an interrupted sweep resumes from here
+                                log.write(json.dumps(record, default=str) + "\n")
+                            log.flush()
+                            submit()
+            finally:
+                pool.shutdown(wait=True)
+
+        return self._report(points, records, cached, kernel_id)
+
+    def _report(self, points: List[Dict[str, Any]], records: List[Optional[Dict[str, Any]]], cached: int,
+                kernel_id: str) -> Dict[str, Any]:
+        names = list(points[0])
+        for point in points[1:]:
+            names.extend(n for n in point if n not in names)
+        rows = ["\t".join(names + ["value"])]
+        errors: Dict[str, List[Dict[str, Any]]] = {}
+        failed = missing = 0
+        for point, record in zip(points, records):
+            if record is None:
+                missing += 1
+                value = "(not run)"
+            elif record["ok"]:
+                value = _cell(record["value"])
+            else:
+                failed += 1
+                errors.setdefault(record["err"], []).append(point)
+                value = "ERROR"
+            rows.append("\t".join([_cell(point.get(n, "")) for n in names] + [value]))
+
+        artifact = None
+        shown = rows
+        if len(rows) - 1 > self.table_rows:
+            grid_id = hashlib.sha256("\n".join(_point_key(p) for p in points).encode("utf-8")).hexdigest()[:8]
+            artifact = os.path.join(self.store_dir, f"{kernel_id}-{grid_id}.tsv")
+            with open(artifact, "w", encoding="utf-8") as f:
+                f.write("\n".join(rows) + "\n")
+            half = self.table_rows // 2
+            shown = rows[:half + 1] + [f"... {len(rows) - 1 - 2 * half} more rows in {artifact} ..."] + rows[-half:]
+
+        err_lines = [
+            f"{len(pts)} point(s) failed with {err} (e.g. {_point_key(pts[0])})" for err, pts in list(errors.items())[:5]
+        ]
+        if missing:
+            err_lines.append(f"{missing} point(s) not run before the timeout; call again with the same code to resume")
+        summary = {
+            "points": len(points),
+            "cached": cached,
+            "computed": len(points) - cached - missing,
+            "failed": failed,
+            "missing": missing,
+        }
+        return self._result(
+            failed == 0 and missing == 0,
+            "\n".join(shown) + "\n",
+            "\n".join(err_lines),
+            sweep=summary,
+            artifact=artifact,
+        )
@@ -3,79 +3,179 @@ import tempfile
 import os
 import sys
 import shutil
+import time
 from typing import Dict, Any, Optional
 
-try:
-    import resource  # type: ignore
-except Exception:  # pragma: no cover - not available on non-Unix
-    resource = None  # type: ignore
+from ..utils.cancel import current_scope, run_process
+from ..utils.metrics import get_metrics
+from .admission import AdmissionError, get_admission_controller
+from .placement import get_cpu_placer
+
+_metrics = get_metrics()
+TOOL_EXECUTIONS = _metrics.counter(
+    "tp_tool_executions_total", "Tool executions by tool and outcome (ok, error, timeout)", ("tool", "outcome")
+)
+TOOL_SECONDS = _metrics.histogram("tp_tool_seconds", "Tool execution latency in seconds", ("tool",))
+
+
+def _outcome(result: Dict[str, Any]) -> str:
+    if result.get("ok"):
+        return "ok"
+    return "timeout" if str(result.get("err", "")).startswith("Timeout after") else "error"
 
 
 class BaseExecutor:
-    def execute(self, code: str, timeout: int = 10) -> Dict[str, Any]:
+    # Tool label used in the metrics
+    tool_name = "tool"
+    # Engine whose values can be shared through a SymbolSession (see bridge.py), if any
+    language: Optional[str] = None
+
+    def execute(self, code: str, timeout: int = 10, session: Optional[Any] = None, **options: Any) -> Dict[str, Any]:
+        """
+        Run code via _execute and report the outcome and latency. options are
+        per-call requests from the tool call (e.g. cores); executors ignore
+        the ones they do not support. With a session, names exported by
+        earlier calls are defined for the code and its exports are stored.
+        """
+        errors = None
+        if session is not None and self.language is not None:
+            code, errors = session.prepare(self.language, code)
+        t0 = time.perf_counter()
+        result = self._execute(code, timeout, **options)
+        if session is not None and self.language is not None:
+            result = session.collect(self.language, result, errors)
+        TOOL_SECONDS.observe(time.perf_counter() - t0, tool=self.tool_name)
+        TOOL_EXECUTIONS.inc(tool=self.tool_name, outcome=_outcome(result))
+        return result
+
+    def _execute(self, code: str, timeout: int, **options: Any) -> Dict[str, Any]:
         raise NotImplementedError
 
 
 class PythonExecutor(BaseExecutor):
-    def execute(self, code: str, timeout: int = 10) -> Dict[str, Any]:
+    tool_name = "python_exec"
+    language = "python"
+
+    def __init__(
+        self,
+        kernel_pool: Optional[Any] = None,
+        admission: Optional[Any] = None,
+        placer: Optional[Any] = None,
+        profiling: Optional[Any] = None,
+    ):
+        # Optional KernelPool of pre-spawned interpreters (see kernel_pool.py)
+        self.kernel_pool = kernel_pool
+        # AdmissionController bounding memory per execution and across
+        # concurrent executions (see admission.py); defaults to the shared one
+        self.admission = admission if admission is not None else get_admission_controller()
+        # CpuPlacer assigning CPUs and BLAS thread counts (see placement.py); defaults to the shared one
+        self.placer = placer if placer is not None else get_cpu_placer()
+        # Profiling settings for "profile": true calls (see profiling.py); read from config on first use
+        self.profiling = profiling
+
+    @staticmethod
+    def _result(ok: bool, out: str, err: str) -> Dict[str, Any]:
+        return {
+            "role": "tool",
+            "tool": "python_exec",
+            "ok": ok,
+            "out": out,
+            "err": err
+        }
+
+    def _communicate(
+        self, proc: subprocess.Popen, stdin: Optional[str], timeout: int, slot: Optional[Any], allocation: Optional[Any]
+    ) -> Dict[str, Any]:
+        scope = current_scope()
+        token = scope.register(proc.kill) if scope is not None else None
+        try:
+            if allocation is not None:
+                allocation.apply(proc.pid)
+            if slot is not None:
+                slot.watch(proc)
+            stdout, stderr = proc.communicate(stdin, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return self._result(False, "", f"Timeout after {timeout} seconds")
+        except Exception as e:
+            proc.kill()
+            return self._result(False, "", str(e))
+        finally:
+            if scope is not None:
+                scope.unregister(token)
+        if scope is not None and scope.cancelled:
+            return self._result(False, stdout, "Cancelled")
+        memory_error = slot.limit_error() if slot is not None else None
+        if memory_error:
+            return self._result(False, stdout, f"{stderr}\n{memory_error}" if stderr else memory_error)
+        return self._result(proc.returncode == 0, stdout, stderr)
+
+    def _execute_cold(self, code: str, timeout: int, slot: Optional[Any], allocation: Optional[Any]) -> Dict[str, Any]:
         with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
             f.write(code)
             temp_path = f.name
-
-        def _limit_resources() -> None:
-            if resource is None:
-                return
-            # Best-effort lightweight sandboxing on Unix-like systems
-            try:
-                # CPU time limit (seconds)
-                resource.setrlimit(resource.RLIMIT_CPU, (timeout + 1, timeout + 1))
-            except Exception:
-                pass
-            try:
-                # Address space / memory limit (soft cap ~512MB)
-                mem_bytes = 512 * 1024 * 1024
-                resource.setrlimit(resource.RLIMIT_AS, (mem_bytes, mem_bytes))
-            except Exception:
-                pass
-
         try:
-            cmd = [sys.executable, temp_path]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
+            proc = subprocess.Popen(
+                [sys.executable, temp_path],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
-                timeout=timeout,
-                # preexec_fn=_limit_resources if resource is not None else None,  # Disabled due to NumPy issues
+                env=dict(os.environ, **allocation.env()) if allocation is not None else None,
             )
-            return {
-                "role": "tool",
-                "tool": "python_exec",
-                "ok": result.returncode == 0,
-                "out": result.stdout,
-                "err": result.stderr
-            }
-        except subprocess.TimeoutExpired:
-            return {
-                "role": "tool",
-                "tool": "python_exec",
-                "ok": False,
-                "out": "",
-                "err": f"Timeout after {timeout} seconds"
-            }
+            return self._communicate(proc, None, timeout, slot, allocation)
         except Exception as e:
-            return {
-                "role": "tool",
-                "tool": "python_exec",
-                "ok": False,
-                "out": "",
-                "err": str(e)
-            }
+            return self._result(False, "", str(e))
         finally:
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
 
+    def _execute(
+        self, code: str, timeout: int, cores: Optional[int] = None, profile: bool = False, **options: Any
+    ) -> Dict[str, Any]:
+        if cores is not None:
+            try:
+                cores = int(cores)
+            except (TypeError, ValueError):
+                return self._result(False, "", f"Invalid cores {cores!r}: expected a whole number of CPUs")
+        stats_path = None
+        if profile:
+            if self.profiling is None:
+                from ..utils.config import get_config_service, get_profile_settings
+                from .profiling import Profiling
+
+                self.profiling = Profiling.from_settings(get_profile_settings(get_config_service().config()))
+            code, stats_path = self.profiling.prepare(code, timeout)
+        slot = None
+        if self.admission is not None:
+            try:
+                slot = self.admission.acquire()
+            except AdmissionError as e:
+                return self._result(False, "", str(e))
+        allocation = None
+        try:
+            allocation = self.placer.allocate(cores) if self.placer is not None else None
+            # Warm kernels start with the default BLAS thread count; bigger grants need a fresh interpreter
+            if self.kernel_pool is not None and (allocation is None or allocation.cores <= self.placer.default_cores):
+                result = self._communicate(self.kernel_pool.acquire(), code, timeout, slot, allocation)
+            else:
+                result = self._execute_cold(code, timeout, slot, allocation)
+            if cores is not None and allocation is not None:
+                # Tell the model how many cores it actually got
+                result["cores"] = allocation.cores
+            if stats_path is not None:
+                result["profile"] = self.profiling.report(stats_path)
+            return result
+        finally:
+            if allocation is not None:
+                allocation.release()
+            if slot is not None:
+                slot.close()
+
 
 class MathematicaExecutor(BaseExecutor):
+    tool_name = "mathematica_exec"
+    language = "wolfram"
     _manager: Optional[Any] = None
 
     @classmethod
@@ -88,7 +188,17 @@ class MathematicaExecutor(BaseExecutor):
             except ImportError:
                 cls._manager = None
         return cls._manager
-    def execute(self, code: str, timeout: int = 10) -> Dict[str, Any]:
+
+    @staticmethod
+    def _cancelled() -> bool:
+        scope = current_scope()
+        return scope is not None and scope.cancelled
+
+    @staticmethod
+    def _cancelled_result(out: str) -> Dict[str, Any]:
+        return {"role": "tool", "tool": "mathematica_exec", "ok": False, "out": out, "err": "Cancelled"}
+
+    def _execute(self, code: str, timeout: int, **options: Any) -> Dict[str, Any]:
         # First, try to use the managed container approach
         manager = self.get_manager()
         if manager is not None:
@@ -98,6 +208,8 @@ class MathematicaExecutor(BaseExecutor):
 
             if manager.ensure_ready(email, password):
                 result = manager.execute_code(code, timeout)
+                if self._cancelled():
+                    return self._cancelled_result(result["out"])
                 return {
                     "role": "tool",
                     "tool": "mathematica_exec",
@@ -114,12 +226,7 @@ class MathematicaExecutor(BaseExecutor):
         try:
             wolfram_bin = shutil.which('wolframscript')
             if wolfram_bin:
-                result = subprocess.run(
-                    [wolfram_bin, '-file', temp_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout
-                )
+                result = run_process([wolfram_bin, '-file', temp_path], timeout)
             else:
                 # Docker fallback
                 use_docker = os.getenv('USE_WOLFRAMENGINE_DOCKER', '0') == '1' or bool(
@@ -157,13 +264,10 @@ class MathematicaExecutor(BaseExecutor):
                     'wolframscript', '-code', code,
                 ]
 
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout
-                )
+                result = run_process(cmd, timeout)
 
+            if self._cancelled():
+                return self._cancelled_result(result.stdout)
             return {
                 "role": "tool",
                 "tool": "mathematica_exec",
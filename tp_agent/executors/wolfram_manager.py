@@ -12,6 +12,16 @@ import time
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+from ..utils.cancel import run_process
+from ..utils.metrics import get_metrics
+from ..utils.spans import span
+
+_metrics = get_metrics()
+# One container serves every caller: utilization is rate(tp_wolfram_busy_seconds_total)
+WOLFRAM_BUSY = _metrics.gauge("tp_wolfram_busy", "Wolfram executions currently running in the container")
+WOLFRAM_BUSY_SECONDS = _metrics.counter("tp_wolfram_busy_seconds_total", "Seconds spent executing Wolfram code")
+WOLFRAM_READY = _metrics.gauge("tp_wolfram_ready", "1 if the last readiness check of the container passed")
+
 
 class WolframContainerManager:
     """Manages a persistent Wolfram Engine container with activation."""
@@ -19,11 +29,14 @@ class WolframContainerManager:
     CONTAINER_NAME = "tp-wolfram-engine"
     IMAGE_NAME = "wolframresearch/wolframengine"
     STATE_FILE = Path.home() / ".tp_agent" / "wolfram_state.json"
+    # Seconds a successful readiness check stays valid before docker is probed again
+    READY_TTL = 60.0
 
     def __init__(self):
         """Initialize the Wolfram container manager."""
         self.STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
         self._load_state()
+        self._ready_at: Optional[float] = None
 
     def _load_state(self) -> None:
         """Load the container state from file."""
@@ -62,6 +75,16 @@ class WolframContainerManager:
         except:
             return False
 
+    @staticmethod
+    def _cpuset() -> Optional[str]:
+        """CPUs reserved for the container by the CPU placer (placement.wolfram_cores), as a docker cpuset."""
+        from .placement import get_cpu_placer
+
+        placer = get_cpu_placer()
+        if placer is None or not placer.wolfram_cpus:
+            return None
+        return ",".join(str(cpu) for cpu in placer.wolfram_cpus)
+
     def _create_container(self) -> bool:
         """Create a new container."""
         try:
@@ -73,10 +96,12 @@ class WolframContainerManager:
             )
 
             # Create new container with persistent storage
+            cpuset = self._cpuset()
             result = subprocess.run(
                 [
                     "docker", "run", "-d",
                     "--name", self.CONTAINER_NAME,
+                    *(["--cpuset-cpus", cpuset] if cpuset else []),
                     "-v", f"{Path.home()}/.wolfram_engine:/root/.Wolfram",
                     "-v", f"{Path.home()}/.wolfram_engine:/root/.Mathematica",
                     self.IMAGE_NAME,
@@ -88,6 +113,7 @@ class WolframContainerManager:
 
             if result.returncode == 0:
                 self.state["container_id"] = result.stdout.strip()
+                self.state["cpuset"] = cpuset
                 self._save_state()
                 return True
             return False
@@ -140,6 +166,15 @@ class WolframContainerManager:
         Returns:
             True if container is ready, False otherwise
         """
+        if self._ready_at is not None and time.monotonic() - self._ready_at < self.READY_TTL:
+            return True
+        with span("wolfram.ensure_ready"):
+            ready = self._ensure_ready(email, password)
+        self._ready_at = time.monotonic() if ready else None
+        WOLFRAM_READY.set(1 if ready else 0)
+        return ready
+
+    def _ensure_ready(self, email: Optional[str], password: Optional[str]) -> bool:
         # Check if container exists and is running
         if not self._container_exists():
             print("Creating Wolfram Engine container...")
@@ -152,6 +187,16 @@ class WolframContainerManager:
             subprocess.run(["docker", "start", self.CONTAINER_NAME], capture_output=True)
             time.sleep(2)
 
+        cpuset = self._cpuset()
+        if cpuset and self.state.get("cpuset") != cpuset:
+            # Containers created before the reservation (or with another one) are re-pinned in place
+            result = subprocess.run(
+                ["docker", "update", "--cpuset-cpus", cpuset, self.CONTAINER_NAME], capture_output=True
+            )
+            if result.returncode == 0:
+                self.state["cpuset"] = cpuset
+                self._save_state()
+
         # Test if already activated
         if self._test_container():
             self.state["activated"] = True
@@ -202,14 +247,15 @@ class WolframContainerManager:
                 "err": "Container not ready. Please ensure activation."
             }
 
+        WOLFRAM_BUSY.inc()
+        t0 = time.perf_counter()
         try:
-            result = subprocess.run(
-                ["docker", "exec", self.CONTAINER_NAME, "wolframscript", "-code", code],
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
+            # Cancelling the run kills the docker exec client
+            result = run_process(["docker", "exec", self.CONTAINER_NAME, "wolframscript", "-code", code], timeout)
 
+            if result.returncode != 0:
+                # Force a full readiness check next time in case the container died
+                self._ready_at = None
             return {
                 "ok": result.returncode == 0,
                 "out": result.stdout,
@@ -227,6 +273,9 @@ class WolframContainerManager:
                 "out": "",
                 "err": str(e)
             }
+        finally:
+            WOLFRAM_BUSY.dec()
+            WOLFRAM_BUSY_SECONDS.inc(time.perf_counter() - t0)
 
     def cleanup(self) -> None:
         """Stop and remove the container."""
@@ -242,6 +291,7 @@ class WolframContainerManager:
                 stderr=subprocess.DEVNULL
             )
             self.state = {"activated": False, "container_id": None}
+            self._ready_at = None
             self._save_state()
         except:
             pass
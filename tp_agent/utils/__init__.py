@@ -1,6 +1,6 @@
 """Utility modules for TP-Agent."""
 
-from .config import load_config, get_openai_settings
+from .config import ConfigService, get_config_service, load_config, get_openai_settings
 from .prompts import get_system_prompt
 
-__all__ = ['load_config', 'get_openai_settings', 'get_system_prompt']
\ No newline at end of file
+__all__ = ['ConfigService', 'get_config_service', 'load_config', 'get_openai_settings', 'get_system_prompt']
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Final-answer extraction and equivalence.
+
+extract_answer() pulls the result out of a `done` message: an explicit
+"answer" field, the last \\boxed{...}, an "answer: ..." phrase, or the
+right-hand side of the last equation in the summary. answers_equivalent()
+compares two extracted answers as normalized text, as numbers, and
+(when SymPy is installed) as expressions, by expanding their difference
+and by evaluating it at random points.
+"""
+
+import math
+import random
+import re
+from typing import Any, Dict, List, Optional, Union
+
+_ANSWER_RE = re.compile(r"(?:final answer|answer|result)\s*(?:is|:|=)\s*(.+)", re.IGNORECASE)
+_LATEX_REPLACEMENTS = (
+    (r"\left", ""), (r"\right", ""), (r"\,", ""), (r"\;", ""), (r"\!", ""), (r"\cdot", "*"),
+    (r"\times", "*"), (r"\pi", "pi"), (r"\hbar", "hbar"), (r"\infty", "oo"), (r"\ln", "log"),
+    (r"\exp", "exp"), (r"\sin", "sin"), (r"\cos", "cos"), (r"\tan", "tan"),
+)
+
+
+def _braced(text: str, start: int) -> Optional[str]:
+    """Contents of the {...} group opening at text[start]."""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "{":
+            depth += 1
+        elif text[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:i]
+    return None
+
+
+def extract_answer(message: Union[Dict[str, Any], str, None]) -> Optional[str]:
+    """The final result stated in a done message (or its text), or None."""
+    if isinstance(message, dict):
+        if message.get("answer") not in (None, ""):
+            return str(message["answer"]).strip()
+        message = message.get("say")
+    if not message:
+        return None
+    text = str(message)
+
+    boxed = text.rfind(r"\boxed{")
+    if boxed != -1:
+        inner = _braced(text, boxed + len(r"\boxed"))
+        if inner:
+            return inner.strip()
+
+    match = None
+    for match in _ANSWER_RE.finditer(text):
+        pass
+    if match is not None:
+        # "the answer is E = 3/2 hbar omega" -> "3/2 hbar omega"
+        return match.group(1).rsplit("=", 1)[-1].strip().rstrip(".").strip("$ ")
+
+    for line in reversed(text.strip().splitlines()):
+        if "=" in line:
+            rhs = line.rsplit("=", 1)[1].strip().rstrip(".").strip("$ ")
+            if rhs:
+                return rhs
+    return None
+
+
+def final_answer(context: List[Dict[str, Any]]) -> Optional[str]:
+    """Answer stated in the last done message of a context, or None."""
+    final = next((m for m in reversed(context) if m.get("role") == "llm" and m.get("done")), None)
+    return extract_answer(final)
+
+
+def normalize_answer(answer: str) -> str:
+    text = answer.strip().strip("$").rstrip(".")
+    for old, new in _LATEX_REPLACEMENTS:
+        text = text.replace(old, new)
+    return re.sub(r"\s+", "", text)
+
+
+def _latex_to_sympy_text(text: str) -> str:
+    """Rewrite the LaTeX constructs common in answers (\\frac, \\sqrt, braces) as plain syntax."""
+    for command, template in ((r"\frac", "(({0})/({1}))"), (r"\dfrac", "(({0})/({1}))"), (r"\sqrt", "sqrt({0})")):
+        while command in text:
+            start = text.index(command)
+            pos = start + len(command)
+            args = []
+            for _ in range(template.count("{")):
+                if pos >= len(text) or text[pos] != "{":
+                    return text
+                inner = _braced(text, pos)
+                if inner is None:
+                    return text
+                args.append(inner)
+                pos += len(inner) + 2
+            text = text[:start] + template.format(*args) + text[pos:]
+    # Remaining commands (\omega, \hbar) become names, separated so implicit products still parse
+    text = re.sub(r"\\([A-Za-z]+)", r" \1 ", text)
+    return text.replace("{", "(").replace("}", ")").replace("\\", " ")
+
+
+def _to_float(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _to_sympy(text: str) -> Any:
+    import sympy
+    from sympy.parsing.sympy_parser import (
+        convert_xor, function_exponentiation, implicit_application, implicit_multiplication, parse_expr,
+        standard_transformations,
+    )
+
+    transformations = standard_transformations + (
+        implicit_multiplication, implicit_application, function_exponentiation, convert_xor,
+    )
+    # Letters SymPy would read as constants or classes but physics uses as quantities (E: energy)
+    local_dict = {name: sympy.Symbol(name) for name in ("E", "S", "N", "Q", "O", "C")}
+    for old, new in _LATEX_REPLACEMENTS:
+        if new in ("*", "", "log"):
+            text = text.replace(old, f" {new} " if new else " ")
+    return parse_expr(_latex_to_sympy_text(text), local_dict=local_dict, transformations=transformations)
+
+
+def _sympy_equal(a: str, b: str, rel_tol: float, samples: int = 3) -> bool:
+    try:
+        import sympy
+    except ImportError:
+        return False
+    try:
+        expr_a = _to_sympy(a)
+        diff = sympy.expand(expr_a - _to_sympy(b))
+    except Exception:
+        return False
+    if diff == 0:
+        return True
+    symbols = sorted(diff.free_symbols, key=str)
+    # Positive sample points: physical quantities under square roots and logs
+    rng = random.Random(0)
+    try:
+        for _ in range(samples):
+            point = {s: rng.uniform(0.5, 2.0) for s in symbols}
+            value = complex(diff.evalf(subs=point))
+            scale = max(abs(complex(expr_a.evalf(subs=point))), 1.0)
+            if abs(value) > rel_tol * scale:
+                return False
+    except Exception:
+        return False
+    return True
+
+
+def answers_equivalent(a: Optional[str], b: Optional[str], rel_tol: float = 1e-6) -> bool:
+    """True if two extracted answers agree textually, numerically or symbolically."""
+    if a is None or b is None:
+        return False
+    na, nb = normalize_answer(a), normalize_answer(b)
+    if na == nb:
+        return True
+    fa, fb = _to_float(na), _to_float(nb)
+    if fa is not None and fb is not None:
+        return math.isclose(fa, fb, rel_tol=rel_tol, abs_tol=rel_tol * 1e-6)
+    return _sympy_equal(a.strip().strip("$").rstrip("."), b.strip().strip("$").rstrip("."), rel_tol)
@@ -0,0 +1,114 @@
+"""
+Content-addressed blob store for large tool outputs.
+
+Blobs are zlib-compressed files named by the SHA-256 of their content, so
+identical outputs are stored once no matter how many rounds or runs
+produce them. Context entries keep a preview plus a `<field>_blob`
+reference ({"ref": ..., "size": ...}) and readers resolve the full text
+only when they need it.
+"""
+
+import hashlib
+import os
+import tempfile
+import zlib
+from typing import Any, Dict, List, Optional
+
+from .metrics import get_metrics
+
+BLOB_FIELDS = ("out", "err")
+
+BLOB_PUTS = get_metrics().counter(
+    "tp_blob_puts_total", "Blob store writes by result (stored, or dedup when the blob already existed)", ("result",)
+)
+
+
+class BlobStore:
+    def __init__(self, root: str, compress_level: int = 6):
+        self.root = root
+        self.compress_level = compress_level
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.root, ref[:2], ref[2:] + ".z")
+
+    def put(self, text: str) -> str:
+        """Store text and return its reference. Existing blobs are not rewritten."""
+        data = text.encode("utf-8")
+        ref = hashlib.sha256(data).hexdigest()
+        path = self._path(ref)
+        if os.path.exists(path):
+            BLOB_PUTS.inc(result="dedup")
+        else:
+            BLOB_PUTS.inc(result="stored")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(zlib.compress(data, self.compress_level))
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+        return ref
+
+    def get(self, ref: str) -> str:
+        with open(self._path(ref), "rb") as f:
+            return zlib.decompress(f.read()).decode("utf-8")
+
+    def exists(self, ref: str) -> bool:
+        return os.path.exists(self._path(ref))
+
+
+def make_preview(text: str, preview_chars: int, ref: str) -> str:
+    """Head and tail of the text (results and tracebacks usually end the output)."""
+    head = preview_chars // 2
+    tail = preview_chars - head
+    omitted = len(text) - head - tail
+    return (
+        f"{text[:head]}\n... [{omitted} chars omitted; full output stored as blob {ref[:12]}] ...\n"
+        f"{text[-tail:] if tail else ''}"
+    )
+
+
+def offload_message(msg: Dict[str, Any], store: BlobStore, threshold: int, preview_chars: int) -> Dict[str, Any]:
+    """
+    Move oversized out/err fields of a tool result into the store.
+    Returns the message unchanged if nothing exceeds the threshold.
+    """
+    oversized = [f for f in BLOB_FIELDS if isinstance(msg.get(f), str) and len(msg[f]) > threshold]
+    if not oversized:
+        return msg
+    msg = dict(msg)
+    for field in oversized:
+        text = msg[field]
+        ref = store.put(text)
+        msg[field] = make_preview(text, preview_chars, ref)
+        msg[f"{field}_blob"] = {"ref": ref, "size": len(text)}
+    return msg
+
+
+def resolve_field(msg: Dict[str, Any], field: str, store: Optional[BlobStore]) -> Any:
+    """Full value of a possibly offloaded field; falls back to the preview."""
+    blob = msg.get(f"{field}_blob")
+    if store is not None and isinstance(blob, dict) and blob.get("ref"):
+        try:
+            return store.get(blob["ref"])
+        except (OSError, zlib.error):
+            pass
+    return msg.get(field)
+
+
+def resolve_message(msg: Dict[str, Any], store: Optional[BlobStore]) -> Dict[str, Any]:
+    """Copy of msg with blob references replaced by the full text."""
+    if store is None or not any(f"{f}_blob" in msg for f in BLOB_FIELDS):
+        return msg
+    resolved = {k: v for k, v in msg.items() if not k.endswith("_blob")}
+    for field in BLOB_FIELDS:
+        if f"{field}_blob" in msg:
+            resolved[field] = resolve_field(msg, field, store)
+    return resolved
+
+
+def resolve_context(context: List[Dict[str, Any]], store: Optional[BlobStore]) -> List[Dict[str, Any]]:
+    return [resolve_message(msg, store) for msg in context]
@@ -0,0 +1,87 @@
+"""
+Cooperative cancellation of an agent run.
+
+TPAgent activates its CancelScope on the run thread, like a SpanRecorder;
+executors register a callback (usually `proc.kill`) for the work they
+start, so cancel() from another thread stops in-flight tool processes at
+once. The host checks `cancelled` between steps and drops whatever an
+in-flight LLM call returns after cancellation.
+"""
+
+import itertools
+import subprocess
+import threading
+from typing import Callable, Dict, List, Optional
+
+_local = threading.local()
+
+
+class CancelScope:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._ids = itertools.count()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = list(self._callbacks.values()), {}
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def register(self, callback: Callable[[], None]) -> Optional[int]:
+        """Call `callback` on cancel(); runs it now and returns None if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                token = next(self._ids)
+                self._callbacks[token] = callback
+                return token
+        callback()
+        return None
+
+    def unregister(self, token: Optional[int]) -> None:
+        if token is not None:
+            with self._lock:
+                self._callbacks.pop(token, None)
+
+    def activate(self) -> Optional["CancelScope"]:
+        """Make this the current thread's scope; returns the one it replaces."""
+        previous = getattr(_local, "scope", None)
+        _local.scope = self
+        return previous
+
+    @staticmethod
+    def deactivate(previous: Optional["CancelScope"] = None) -> None:
+        _local.scope = previous
+
+
+def current_scope() -> Optional[CancelScope]:
+    return getattr(_local, "scope", None)
+
+
+def run_process(cmd: List[str], timeout: float) -> subprocess.CompletedProcess:
+    """
+    subprocess.run(cmd, capture_output=True, text=True, timeout=timeout),
+    except that cancel() of the current thread's scope kills the process.
+    """
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    scope = current_scope()
+    token = scope.register(proc.kill) if scope is not None else None
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        raise
+    finally:
+        if scope is not None:
+            scope.unregister(token)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
@@ -1,6 +1,9 @@
 import json
 import os
-from typing import Any, Dict, Optional
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 
 DEFAULT_CONFIG_FILES = [
@@ -76,6 +79,137 @@ def load_config(path: Optional[str] = None) -> Dict[str, Any]:
         return {}
 
 
+def _file_stamp(path: Optional[str]) -> Optional[Tuple[str, int, int]]:
+    """(path, mtime_ns, size) of a file, or None if it does not exist."""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (path, st.st_mtime_ns, st.st_size)
+
+
+class ConfigService:
+    """
+    Process-wide cache of the parsed config, API key and system prompt.
+
+    Each file is re-read only when its path, mtime or size changes, and the
+    filesystem is checked at most once every `check_interval` seconds, so
+    constructing thousands of agents costs a dict lookup each. Callbacks
+    registered with subscribe() receive the new config whenever the config
+    file changes; bound methods are held weakly so subscribers can be
+    garbage collected. Returned config dicts are shared and must be treated
+    as read-only.
+    """
+
+    def __init__(self, config_path: Optional[str] = None, check_interval: float = 1.0):
+        self.config_path = config_path
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        # key -> (stamp, value, monotonic time of the last check)
+        self._entries: Dict[str, Tuple[Hashable, Any, float]] = {}
+        self._subscribers: List[Any] = []
+
+    def _cached(self, key: str, stamp_fn: Callable[[], Hashable], load_fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (value, changed); changed is True only when a cached value was replaced."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] < self.check_interval:
+                return entry[1], False
+            stamp = stamp_fn()
+            if entry is not None and entry[0] == stamp:
+                self._entries[key] = (stamp, entry[1], now)
+                return entry[1], False
+            value = load_fn()
+            self._entries[key] = (stamp, value, now)
+            return value, entry is not None
+
+    def config(self) -> Dict[str, Any]:
+        """Current config; subscribers are notified if it was reloaded."""
+        cfg, changed = self._cached(
+            "config",
+            lambda: _file_stamp(find_config_path(self.config_path)),
+            lambda: load_config(self.config_path),
+        )
+        if changed:
+            self.reloads += 1
+            self._notify(cfg)
+        return cfg
+
+    def api_key(self) -> Optional[str]:
+        # The environment always wins and is cheap to read
+        env_key = os.getenv("OPENAI_API_KEY")
+        if env_key:
+            return env_key
+        key, _ = self._cached(
+            "api_key",
+            lambda: tuple(_file_stamp(p) for p in DEFAULT_API_KEY_FILES),
+            load_api_key,
+        )
+        return key
+
+    def system_prompt(self, path: Optional[str] = None) -> str:
+        from .prompts import find_system_prompt_path, get_system_prompt
+
+        prompt, _ = self._cached(
+            f"system_prompt:{path or ''}",
+            lambda: (os.getenv("TP_AGENT_SYSTEM_PROMPT_PATH"), _file_stamp(find_system_prompt_path(path))),
+            lambda: get_system_prompt(path),
+        )
+        return prompt
+
+    def poll(self) -> bool:
+        """Check the config file now (ignoring check_interval). Returns True if it was reloaded."""
+        with self._lock:
+            entry = self._entries.get("config")
+            if entry is not None:
+                self._entries["config"] = (entry[0], entry[1], float("-inf"))
+        before = self.reloads
+        self.config()
+        return self.reloads != before
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> Callable[[], None]:
+        """Call `callback(config)` on every reload. Returns a function that unsubscribes."""
+        ref: Any
+        if hasattr(callback, "__self__") and hasattr(callback, "__func__"):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback  # noqa: E731
+        with self._lock:
+            self._subscribers.append(ref)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if ref in self._subscribers:
+                    self._subscribers.remove(ref)
+
+        return unsubscribe
+
+    def _notify(self, cfg: Dict[str, Any]) -> None:
+        with self._lock:
+            live = [(ref, ref()) for ref in self._subscribers]
+            self._subscribers = [ref for ref, cb in live if cb is not None]
+        for _, callback in live:
+            if callback is not None:
+                callback(cfg)
+
+
+_config_service: Optional[ConfigService] = None
+_config_service_lock = threading.Lock()
+
+
+def get_config_service() -> ConfigService:
+    """The process-wide ConfigService, created on first use."""
+    global _config_service
+    with _config_service_lock:
+        if _config_service is None:
+            _config_service = ConfigService()
+        return _config_service
+
+
 def get_openai_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
     """
     Extract OpenAI settings from config with defaults.
@@ -86,7 +220,7 @@ def get_openai_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, st
     openai_cfg = providers.get("openai", {}) if isinstance(providers, dict) else {}
 
     # Load API key from separate file or env var
-    api_key = load_api_key() or ""
+    api_key = get_config_service().api_key() or ""
 
     base_url = (
         openai_cfg.get("base_url") if isinstance(openai_cfg, dict)
@@ -124,6 +258,344 @@ def get_agent_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any
     }
 
 
+def get_stall_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract loop/stall detection settings from config with defaults.
+    """
+    cfg = config or {}
+    stall = cfg.get("stall", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(stall, dict):
+        stall = {}
+
+    return {
+        "enabled": stall.get("enabled", True),
+        "policy": stall.get("policy", "hint"),
+        "max_repeats": stall.get("max_repeats", 3),
+        "max_idle_rounds": stall.get("max_idle_rounds", 4),
+        "max_interventions": stall.get("max_interventions", 2),
+    }
+
+
+def get_timeout_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract adaptive tool timeout settings from config with defaults.
+    Per-tool defaults come from execution.python_timeout / mathematica_timeout.
+    """
+    cfg = config or {}
+    timeouts = cfg.get("timeouts", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(timeouts, dict):
+        timeouts = {}
+
+    return {
+        "adaptive": timeouts.get("adaptive", False),
+        "quantile": timeouts.get("quantile", 0.95),
+        "multiplier": timeouts.get("multiplier", 1.5),
+        "min_samples": timeouts.get("min_samples", 5),
+        "min_sec": timeouts.get("min_sec", 1),
+        "max_sec": timeouts.get("max_sec", 600),
+        "history": timeouts.get("history", 200),
+    }
+
+
+def get_admission_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract sandbox memory admission settings from config with defaults.
+    The per-execution limit defaults to execution.python_memory_limit.
+    """
+    cfg = config or {}
+    admission = cfg.get("admission", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(admission, dict):
+        admission = {}
+    execution = cfg.get("execution", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(execution, dict):
+        execution = {}
+
+    return {
+        "enabled": admission.get("enabled", True),
+        "limit_bytes": admission.get("limit_bytes", execution.get("python_memory_limit", 512 * 1024 * 1024)),
+        "budget_bytes": admission.get("budget_bytes"),
+        "budget_fraction": admission.get("budget_fraction", 0.7),
+        "reserve_bytes": admission.get("reserve_bytes", 256 * 1024 * 1024),
+        "poll_interval": admission.get("poll_interval", 0.2),
+        "queue_timeout": admission.get("queue_timeout", 300),
+        "cgroup_parent": admission.get("cgroup_parent"),
+    }
+
+
+def get_placement_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract CPU placement settings for sandboxed executions from config with defaults.
+    cpus=None uses every CPU this process may run on.
+    """
+    cfg = config or {}
+    placement = cfg.get("placement", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(placement, dict):
+        placement = {}
+
+    return {
+        "enabled": placement.get("enabled", True),
+        "cpus": placement.get("cpus"),
+        "default_cores": placement.get("default_cores", 1),
+        "max_cores": placement.get("max_cores"),
+        "wolfram_cores": placement.get("wolfram_cores", 0),
+    }
+
+
+def get_budget_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract per-run budget settings from config with defaults (None = unlimited).
+    """
+    cfg = config or {}
+    budget = cfg.get("budget", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(budget, dict):
+        budget = {}
+
+    return {
+        "deadline_sec": budget.get("deadline_sec"),
+        "max_tokens": budget.get("max_tokens"),
+        "max_tool_sec": budget.get("max_tool_sec"),
+        "min_output_tokens": budget.get("min_output_tokens", 1024),
+    }
+
+
+def get_consensus_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract self-consistency settings (parallel trajectories per problem) from config with defaults.
+    """
+    cfg = config or {}
+    consensus = cfg.get("consensus", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(consensus, dict):
+        consensus = {}
+
+    return {
+        "trajectories": consensus.get("trajectories", 1),
+        "quorum": consensus.get("quorum", 2),
+        "rel_tol": consensus.get("rel_tol", 1e-6),
+    }
+
+
+def get_jobs_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract background job settings (tool calls with "background": true) from config with defaults.
+    """
+    cfg = config or {}
+    jobs = cfg.get("jobs", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(jobs, dict):
+        jobs = {}
+
+    return {
+        "max_jobs": jobs.get("max_jobs", 4),
+        "default_deadline": jobs.get("default_deadline", 600),
+        "max_deadline": jobs.get("max_deadline", 3600),
+        "max_wait": jobs.get("max_wait", 60),
+    }
+
+
+def get_sweep_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract python_sweep settings (parallel parameter sweeps) from config with defaults.
+    """
+    cfg = config or {}
+    sweep = cfg.get("sweep", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(sweep, dict):
+        sweep = {}
+
+    return {
+        # None: one worker per CPU this process may run on
+        "workers": sweep.get("workers"),
+        # None: about four chunks per worker
+        "chunk_size": sweep.get("chunk_size"),
+        "max_points": sweep.get("max_points", 10000),
+        "table_rows": sweep.get("table_rows", 40),
+        "dir": sweep.get("dir", os.path.join("outputs", "sweeps")),
+    }
+
+
+def get_bridge_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract settings for values shared between python_exec and mathematica_exec from config with defaults.
+    """
+    cfg = config or {}
+    bridge = cfg.get("bridge", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(bridge, dict):
+        bridge = {}
+
+    return {
+        "enabled": bridge.get("enabled", True),
+        "max_values": bridge.get("max_values", 64),
+        "max_chars": bridge.get("max_chars", 20000),
+    }
+
+
+def get_profile_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract settings for profiled tool calls ("profile": true) from config with defaults.
+    """
+    cfg = config or {}
+    profiling = cfg.get("profiling", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(profiling, dict):
+        profiling = {}
+
+    return {
+        "dir": profiling.get("dir", os.path.join("outputs", "profiles")),
+        "top": profiling.get("top", 15),
+    }
+
+
+def get_grader_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract answer grader settings from config with defaults.
+    """
+    cfg = config or {}
+    grader = cfg.get("grader", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(grader, dict):
+        grader = {}
+
+    return {
+        # None: one worker process per CPU; 0: grade in-process
+        "workers": grader.get("workers", None),
+        "rel_tol": grader.get("rel_tol", 1e-6),
+        "samples": grader.get("samples", 16),
+        "symbolic_timeout": grader.get("symbolic_timeout", 5.0),
+        "default_domain": grader.get("default_domain", "positive"),
+        "domains": grader.get("domains", {}),
+    }
+
+
+def get_server_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract daemon/server settings from config with defaults.
+    """
+    cfg = config or {}
+    server = cfg.get("server", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(server, dict):
+        server = {}
+
+    return {
+        "host": server.get("host", "127.0.0.1"),
+        "port": server.get("port", 8765),
+        "unix_socket": server.get("unix_socket"),
+        "concurrency": server.get("concurrency", 4),
+        "max_queue": server.get("max_queue", 64),
+        "warm_kernels": server.get("warm_kernels", 2),
+        "preload_modules": server.get("preload_modules", ["numpy", "scipy", "sympy"]),
+        "warm_wolfram": server.get("warm_wolfram", False),
+    }
+
+
+def get_queue_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract distributed work queue settings from config with defaults.
+    """
+    cfg = config or {}
+    queue = cfg.get("queue", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(queue, dict):
+        queue = {}
+
+    return {
+        "db_path": queue.get("db_path", os.path.join("outputs", "queue.sqlite")),
+        "visibility_timeout": queue.get("visibility_timeout", 600),
+        "heartbeat_interval": queue.get("heartbeat_interval", 60),
+        "poll_interval": queue.get("poll_interval", 5),
+        "max_attempts": queue.get("max_attempts", 3),
+        "wal": queue.get("wal", False),
+    }
+
+
+def get_problem_source_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract problem bank settings (JSONL/Parquet/directory sources) from config with defaults.
+    """
+    cfg = config or {}
+    sources = cfg.get("problem_sources", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(sources, dict):
+        sources = {}
+
+    return {
+        "dedupe": sources.get("dedupe", True),
+        # Write .idx sidecars next to JSONL banks for random access
+        "cache_index": sources.get("cache_index", True),
+        "text_fields": sources.get("text_fields", ["problem", "text", "question"]),
+        "id_fields": sources.get("id_fields", ["id", "problem_id"]),
+        "reference_fields": sources.get("reference_fields", ["reference", "answer"]),
+        "tags_field": sources.get("tags_field", "tags"),
+    }
+
+
+def get_batch_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract offline batch-mode LLM settings (OpenAI Batch API) from config with defaults.
+    """
+    cfg = config or {}
+    batch = cfg.get("batch", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(batch, dict):
+        batch = {}
+
+    return {
+        "dir": batch.get("dir", os.path.join("outputs", "batches")),
+        "poll_interval": batch.get("poll_interval", 30.0),
+        "max_requests": batch.get("max_requests", 50000),
+        # Flush without the stragglers after this many seconds
+        "max_wait": batch.get("max_wait", 60.0),
+        "settle": batch.get("settle", 1.0),
+        "max_in_flight": batch.get("max_in_flight", 1000),
+        "endpoint": batch.get("endpoint", "/v1/responses"),
+        "completion_window": batch.get("completion_window", "24h"),
+    }
+
+
+def get_metrics_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract metrics exporter settings from config with defaults.
+    Nothing is exported unless a port or a file path is set.
+    """
+    cfg = config or {}
+    metrics = cfg.get("metrics", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(metrics, dict):
+        metrics = {}
+
+    return {
+        "host": metrics.get("host", "127.0.0.1"),
+        "port": metrics.get("port"),
+        "path": metrics.get("path"),
+        "interval": metrics.get("interval", 15),
+    }
+
+
+def get_run_store_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract run store settings from config with defaults.
+    """
+    cfg = config or {}
+    store = cfg.get("run_store", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(store, dict):
+        store = {}
+
+    return {
+        "enabled": store.get("enabled", False),
+        "path": store.get("path", os.path.join("outputs", "runs.sqlite")),
+    }
+
+
+def get_blob_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract large-output blob offload settings from config with defaults.
+    """
+    cfg = config or {}
+    blobs = cfg.get("blobs", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(blobs, dict):
+        blobs = {}
+
+    return {
+        "enabled": blobs.get("enabled", False),
+        "dir": blobs.get("dir", os.path.join("outputs", "blobs")),
+        "threshold": blobs.get("threshold", 8192),
+        "preview_chars": blobs.get("preview_chars", 2000),
+        "send_full_to_llm": blobs.get("send_full_to_llm", False),
+        "compress_level": blobs.get("compress_level", 6),
+    }
+
+
 def get_output_settings(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Extract output settings from config with defaults.
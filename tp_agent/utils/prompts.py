@@ -3,6 +3,22 @@ import pkgutil
 from typing import Optional
 
 
+def find_system_prompt_path(path: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve the system prompt file, or None when the packaged default or
+    the built-in fallback would be used.
+    """
+    env_path = path or os.getenv("TP_AGENT_SYSTEM_PROMPT_PATH")
+    if env_path and os.path.exists(env_path):
+        return env_path
+
+    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "config", "system_prompt.txt")
+    if os.path.exists(config_path):
+        return config_path
+
+    return None
+
+
 def get_system_prompt(path: Optional[str] = None) -> str:
     """
     Load the system prompt from a file.
@@ -10,17 +26,12 @@ def get_system_prompt(path: Optional[str] = None) -> str:
     Order of precedence:
     1) Explicit path arg
     2) Env var TP_AGENT_SYSTEM_PROMPT_PATH
-    3) Packaged default: tp_agent/system_prompt.txt
+    3) config/system_prompt.txt
+    4) Packaged default: tp_agent/system_prompt.txt
     """
-    env_path = path or os.getenv("TP_AGENT_SYSTEM_PROMPT_PATH")
-    if env_path and os.path.exists(env_path):
-        with open(env_path, "r", encoding="utf-8") as f:
-            return f.read()
-
-    # Try config directory
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "config", "system_prompt.txt")
-    if os.path.exists(config_path):
-        with open(config_path, "r", encoding="utf-8") as f:
+    prompt_path = find_system_prompt_path(path)
+    if prompt_path:
+        with open(prompt_path, "r", encoding="utf-8") as f:
             return f.read()
 
     data = pkgutil.get_data("tp_agent", "system_prompt.txt")
@@ -32,4 +43,3 @@ def get_system_prompt(path: Optional[str] = None) -> str:
         "You are a reasoning-first assistant. Output JSON only. "
         "If you need a tool, set tool/code fields; otherwise provide `say` and `done`."
     )
-
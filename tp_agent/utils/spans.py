@@ -0,0 +1,90 @@
+"""
+Lightweight timing spans.
+
+TPAgent activates a SpanRecorder on its thread for the duration of a run;
+code further down the stack (LLMInterface, the Wolfram manager) marks its
+own work with `with span("name"):`. When no recorder is active, span()
+returns a shared no-op context manager, so instrumented code costs one
+thread-local lookup outside of agent runs.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+_local = threading.local()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder: "SpanRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> bool:
+        self.recorder.finish(self.name, self.start, time.perf_counter())
+        return False
+
+
+class SpanRecorder:
+    """
+    Collects finished spans as {"name", "start", "sec"} dicts, with start in
+    seconds since the recorder was created. begin_round() points collection
+    at a round record's "spans" list; on_span(span, record) is called for
+    every finished span when given.
+    """
+
+    def __init__(self, on_span: Optional[Callable[[Dict[str, Any], Optional[Dict[str, Any]]], None]] = None):
+        self.origin = time.perf_counter()
+        self.on_span = on_span
+        self.spans: List[Dict[str, Any]] = []
+        self.record: Optional[Dict[str, Any]] = None
+
+    def begin_round(self, record: Dict[str, Any]) -> None:
+        self.record = record
+        self.spans = record["spans"] = []
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def finish(self, name: str, start: float, end: float) -> None:
+        finished = {"name": name, "start": round(start - self.origin, 6), "sec": round(end - start, 6)}
+        self.spans.append(finished)
+        if self.on_span is not None:
+            self.on_span(finished, self.record)
+
+    def activate(self) -> Optional["SpanRecorder"]:
+        """Make this the current thread's recorder; returns the one it replaces."""
+        previous = getattr(_local, "recorder", None)
+        _local.recorder = self
+        return previous
+
+    @staticmethod
+    def deactivate(previous: Optional["SpanRecorder"] = None) -> None:
+        _local.recorder = previous
+
+
+def span(name: str) -> Any:
+    """Context manager timing a block into the active recorder, if any."""
+    recorder = getattr(_local, "recorder", None)
+    if recorder is None:
+        return _NULL_SPAN
+    return recorder.span(name)
@@ -0,0 +1,13 @@
+"""Order statistics shared by the run store, the timeout policy and the benchmarks."""
+
+from typing import List, Optional
+
+
+def quantile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated q-quantile (0 <= q <= 1) of an already sorted list; None if it is empty."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)